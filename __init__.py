@@ -2,14 +2,27 @@ import asyncio
 import logging
 
 from async_timeout import timeout
+import voluptuous as vol
+from .profiler import async_profile
 from .russound import Russound
-from .error import RussoundError
+from .store import RussoundStateStore
+from .rio.error import RussoundError
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers import device_registry as dr
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall
 from homeassistant.helpers import device_registry as dr
 from homeassistant.components.media_player.const import DOMAIN as MEDIA_PLAYER_DOMAIN
-from .const import DOMAIN as RUSSOUND_DOMAIN, STATE_CONNECTED
+from homeassistant.components.number import DOMAIN as NUMBER_DOMAIN
+from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
+from homeassistant.components.switch import DOMAIN as SWITCH_DOMAIN
+from .const import (
+    ATTR_DURATION,
+    DEFAULT_PROFILE_DURATION,
+    DOMAIN as RUSSOUND_DOMAIN,
+    MAX_PROFILE_DURATION,
+    SERVICE_PROFILE,
+    STATE_CONNECTED,
+)
 from homeassistant.const import (
     CONF_NAME,
     CONF_HOST,
@@ -20,15 +33,59 @@ from homeassistant.exceptions import ConfigEntryNotReady
 
 _LOGGER = logging.getLogger(__name__)
 
+PLATFORMS = [MEDIA_PLAYER_DOMAIN, NUMBER_DOMAIN, SENSOR_DOMAIN, SWITCH_DOMAIN]
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=DEFAULT_PROFILE_DURATION): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=MAX_PROFILE_DURATION)
+        )
+    }
+)
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Load a config entry."""
     hass.data.setdefault(RUSSOUND_DOMAIN, {})
-    await hass.config_entries.async_forward_entry_setup(entry, MEDIA_PLAYER_DOMAIN)
+    controller = Russound(entry)
+    # Entities start from the last known state until the controller reports
+    store = RussoundStateStore(hass, entry.entry_id, controller)
+    await store.async_restore()
+    try:
+        await controller.connect()
+    except (RussoundError, ConnectionError) as err:
+        await controller.disconnect()
+        _LOGGER.debug("Unable to connect: %s", err)
+        raise ConfigEntryNotReady from err
+
+    store.start()
+    entry.async_on_unload(store.async_stop)
+    hass.data[RUSSOUND_DOMAIN][entry.entry_id] = controller
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    if not hass.services.has_service(RUSSOUND_DOMAIN, SERVICE_PROFILE):
+        _register_services(hass)
 
     return True
 
 
+def _register_services(hass: HomeAssistant) -> None:
+    """Registers the services shared by all controllers."""
+
+    async def profile(call: ServiceCall) -> None:
+        controllers = {
+            entry.title: hass.data[RUSSOUND_DOMAIN][entry.entry_id]
+            for entry in hass.config_entries.async_entries(RUSSOUND_DOMAIN)
+            if entry.entry_id in hass.data[RUSSOUND_DOMAIN]
+        }
+        await async_profile(hass, controllers, call.data[ATTR_DURATION])
+
+    hass.services.async_register(
+        RUSSOUND_DOMAIN, SERVICE_PROFILE, profile, schema=PROFILE_SCHEMA
+    )
+
+
 # async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 #     """Load a config entry."""
 #     hass.data.setdefault(RUSSOUND_DOMAIN, {})
@@ -54,13 +111,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload config entry."""
     controller: Russound = hass.data[RUSSOUND_DOMAIN][entry.entry_id]
-    await controller._connection.disconnect()
-    await hass.config_entries.async_forward_entry_unload(entry, MEDIA_PLAYER_DOMAIN)
+    await controller.disconnect()
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     del hass.data[RUSSOUND_DOMAIN][entry.entry_id]
-    return True
+    if not hass.data[RUSSOUND_DOMAIN]:
+        hass.services.async_remove(RUSSOUND_DOMAIN, SERVICE_PROFILE)
+    return unload_ok
 
 
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
-    await async_unload_entry(hass, ConfigEntry)
-    await async_setup_entry(hass, ConfigEntry)
+    await hass.config_entries.async_reload(entry.entry_id)
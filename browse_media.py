@@ -0,0 +1,151 @@
+"""Media browsing over the sources and the tuner preset catalog."""
+
+from __future__ import annotations
+
+from homeassistant.components.media_player import BrowseError, BrowseMedia
+from homeassistant.components.media_player.const import MediaClass, MediaType
+
+from .const import SOURCE_TYPE_TUNER
+from .russound import Russound
+
+CONTENT_ROOT = "root"
+CONTENT_SOURCE = "source"
+CONTENT_BANK = "bank"
+CONTENT_PRESET = "preset"
+
+
+def content_id(kind: str, *ids: int) -> str:
+    """Returns the media content id of a node, e.g. 'preset:1:2:3'."""
+    return ":".join([kind, *(str(part) for part in ids)])
+
+
+def parse_content_id(media_id: str) -> tuple[str, list[int]]:
+    """Splits a media content id into its kind and numeric ids."""
+    kind, *ids = media_id.split(":")
+    try:
+        return kind, [int(part) for part in ids]
+    except ValueError:
+        raise BrowseError(f"Unknown media {media_id}") from None
+
+
+class PresetBrowser:
+    """Builds the browse tree of a controller, sources → banks → presets.
+
+    Nodes are only built when browsed and are kept until the controller's
+    source or preset catalog changes, so every zone shares one tree.
+    """
+
+    def __init__(self, controller: Russound):
+        self._controller = controller
+        self._sources = None
+        self._presets = None
+        self._nodes: dict[str, BrowseMedia] = {}
+
+    def _catalog(self) -> tuple[list, list]:
+        sources, presets = self._controller.sources, self._controller.presets
+        if sources is not self._sources or presets is not self._presets:
+            # Enumeration replaces the lists, so a new list means a new catalog
+            self._sources, self._presets = sources, presets
+            self._nodes.clear()
+        return sources, presets
+
+    def browse(self, media_content_id: str | None) -> BrowseMedia:
+        """Returns the node with the given content id and its children."""
+        sources, presets = self._catalog()
+        media_content_id = media_content_id or CONTENT_ROOT
+        node = self._nodes.get(media_content_id)
+        if node is None:
+            node = self._build(media_content_id, sources, presets)
+            self._nodes[media_content_id] = node
+        return node
+
+    def _build(self, media_content_id, sources, presets) -> BrowseMedia:
+        kind, ids = parse_content_id(media_content_id)
+        if kind == CONTENT_ROOT:
+            return _directory(
+                CONTENT_ROOT,
+                "Sources",
+                [_source(source, presets) for source in sources],
+            )
+        if kind == CONTENT_SOURCE and len(ids) == 1:
+            for source in sources:
+                if source[0] == ids[0]:
+                    banks = sorted({p[1] for p in presets if p[0] == source[0]})
+                    return _source(
+                        source,
+                        presets,
+                        [_bank(source[0], bank_id) for bank_id in banks],
+                    )
+        elif kind == CONTENT_BANK and len(ids) == 2:
+            source_id, bank_id = ids
+            children = [
+                _preset(preset)
+                for preset in presets
+                if preset[0] == source_id and preset[1] == bank_id
+            ]
+            if children:
+                return _bank(source_id, bank_id, children)
+        raise BrowseError(f"Unknown media {media_content_id}")
+
+    def find_preset(self, source_id: int, bank_id: int, preset_id: int):
+        """Returns the catalog entry of a preset, or None."""
+        _, presets = self._catalog()
+        for preset in presets:
+            if preset[:3] == (source_id, bank_id, preset_id):
+                return preset
+        return None
+
+
+def _directory(media_id, title, children=None) -> BrowseMedia:
+    return BrowseMedia(
+        media_class=MediaClass.DIRECTORY,
+        media_content_id=media_id,
+        media_content_type=MediaType.CHANNELS,
+        title=title,
+        can_play=False,
+        can_expand=True,
+        children=children,
+        children_media_class=MediaClass.DIRECTORY,
+    )
+
+
+def _source(source, presets, children=None) -> BrowseMedia:
+    source_id, name, source_type = source
+    has_presets = source_type == SOURCE_TYPE_TUNER and any(
+        preset[0] == source_id for preset in presets
+    )
+    return BrowseMedia(
+        media_class=MediaClass.DIRECTORY if has_presets else MediaClass.MUSIC,
+        media_content_id=content_id(CONTENT_SOURCE, source_id),
+        media_content_type=MediaType.CHANNELS if has_presets else MediaType.MUSIC,
+        title=name,
+        can_play=True,
+        can_expand=has_presets,
+        children=children,
+        children_media_class=MediaClass.DIRECTORY if has_presets else None,
+    )
+
+
+def _bank(source_id, bank_id, children=None) -> BrowseMedia:
+    return BrowseMedia(
+        media_class=MediaClass.DIRECTORY,
+        media_content_id=content_id(CONTENT_BANK, source_id, bank_id),
+        media_content_type=MediaType.CHANNELS,
+        title=f"Bank {bank_id}",
+        can_play=False,
+        can_expand=True,
+        children=children,
+        children_media_class=MediaClass.CHANNEL,
+    )
+
+
+def _preset(preset) -> BrowseMedia:
+    source_id, bank_id, preset_id, _, name = preset
+    return BrowseMedia(
+        media_class=MediaClass.CHANNEL,
+        media_content_id=content_id(CONTENT_PRESET, source_id, bank_id, preset_id),
+        media_content_type=MediaType.CHANNEL,
+        title=name,
+        can_play=True,
+        can_expand=False,
+    )
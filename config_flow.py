@@ -7,8 +7,19 @@ import voluptuous as vol
 from async_timeout import timeout
 from homeassistant import config_entries
 from homeassistant.const import CONF_NAME, CONF_HOST, CONF_PORT
+from homeassistant.core import callback
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    CONF_BULK_CONNECTIONS,
+    CONF_ELIDE_COMMANDS,
+    CONF_KEEPALIVE_INTERVAL,
+    CONF_PRESETS_IN_SOURCE_LIST,
+    DEFAULT_BULK_CONNECTIONS,
+    DEFAULT_KEEPALIVE_INTERVAL,
+    DEFAULT_PRESETS_IN_SOURCE_LIST,
+    MAX_BULK_CONNECTIONS,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,6 +46,12 @@ class RussoundConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Init discovery flow."""
         self._domain = DOMAIN
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return RussoundOptionsFlow(config_entry)
+
     async def async_step_user(self, user_input=None):
         errors = {}
         _LOGGER.debug("Handle the confirmation step.")
@@ -56,3 +73,48 @@ class RussoundConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return self.async_show_form(
             step_id="user", data_schema=DATA_SCHEMA, errors=errors
         )
+
+
+class RussoundOptionsFlow(config_entries.OptionsFlow):
+    """Russound options flow."""
+
+    def __init__(self, config_entry) -> None:
+        """Init options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_KEEPALIVE_INTERVAL,
+                        default=options.get(
+                            CONF_KEEPALIVE_INTERVAL, DEFAULT_KEEPALIVE_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Required(
+                        CONF_ELIDE_COMMANDS,
+                        default=options.get(CONF_ELIDE_COMMANDS, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_PRESETS_IN_SOURCE_LIST,
+                        default=options.get(
+                            CONF_PRESETS_IN_SOURCE_LIST, DEFAULT_PRESETS_IN_SOURCE_LIST
+                        ),
+                    ): bool,
+                    vol.Required(
+                        CONF_BULK_CONNECTIONS,
+                        default=options.get(
+                            CONF_BULK_CONNECTIONS, DEFAULT_BULK_CONNECTIONS
+                        ),
+                    ): vol.All(
+                        vol.Coerce(int), vol.Range(min=0, max=MAX_BULK_CONNECTIONS)
+                    ),
+                }
+            ),
+        )
@@ -0,0 +1,152 @@
+"""Bounded cache of the cover art served through Home Assistant's image proxy.
+
+Zones playing the same source show the same art, and every dashboard asks
+for it separately. The cache fetches each image once, keeps recently used
+ones within a count and byte budget, and revalidates them with the source
+instead of downloading them again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+import logging
+import time
+
+import aiohttp
+
+from .const import (
+    ART_CACHE_MAX_BYTES,
+    ART_CACHE_MAX_ENTRIES,
+    ART_CACHE_REVALIDATE,
+    ART_FETCH_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class _CachedArt:
+    content: bytes
+    content_type: str | None
+    etag: str | None
+    last_modified: str | None
+    validated: float
+
+
+class CoverArtCache:
+    """LRU cache of images keyed by URL, bounded by count and total bytes."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        max_entries: int = ART_CACHE_MAX_ENTRIES,
+        max_bytes: int = ART_CACHE_MAX_BYTES,
+        revalidate_after: float = ART_CACHE_REVALIDATE,
+    ):
+        self._session = session
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._revalidate_after = revalidate_after
+        self._entries: OrderedDict[str, _CachedArt] = OrderedDict()
+        self._size = 0
+        self._pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.shared_requests = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def as_dict(self) -> dict:
+        """Returns the cache statistics."""
+        return {
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "shared_requests": self.shared_requests,
+            "evictions": self.evictions,
+            "errors": self.errors,
+        }
+
+    async def async_get(self, url: str) -> tuple[bytes | None, str | None]:
+        """
+        Returns the content and content type of the image at url, or
+        (None, None) when it can't be fetched.
+        A cached image is returned as is until it is ART_CACHE_REVALIDATE
+        seconds old, then it is revalidated with a conditional request.
+        Concurrent requests for the same image share a single download.
+        """
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+            if time.monotonic() - entry.validated < self._revalidate_after:
+                self.hits += 1
+                return entry.content, entry.content_type
+
+        pending = self._pending.get(url)
+        if pending is None:
+            self.misses += 1
+            pending = asyncio.ensure_future(self._fetch(url, entry))
+            self._pending[url] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(url, None))
+        else:
+            self.shared_requests += 1
+        return await asyncio.shield(pending)
+
+    async def _fetch(self, url, entry):
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        try:
+            async with self._session.get(
+                url,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=ART_FETCH_TIMEOUT),
+            ) as response:
+                if response.status == 304 and entry is not None:
+                    self.revalidated += 1
+                    entry.validated = time.monotonic()
+                    return entry.content, entry.content_type
+                response.raise_for_status()
+                content = await response.read()
+                content_type = response.headers.get(aiohttp.hdrs.CONTENT_TYPE)
+                etag = response.headers.get(aiohttp.hdrs.ETAG)
+                last_modified = response.headers.get(aiohttp.hdrs.LAST_MODIFIED)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            self.errors += 1
+            _LOGGER.debug("Unable to fetch cover art %s: %s", url, err)
+            if entry is not None:
+                # Keep showing the art we have while the source is unreachable
+                return entry.content, entry.content_type
+            return None, None
+
+        self._store(
+            url,
+            _CachedArt(content, content_type, etag, last_modified, time.monotonic()),
+        )
+        return content, content_type
+
+    def _store(self, url, entry):
+        previous = self._entries.pop(url, None)
+        if previous is not None:
+            self._size -= len(previous.content)
+        if len(entry.content) > self._max_bytes:
+            return
+        self._entries[url] = entry
+        self._size += len(entry.content)
+        while len(self._entries) > self._max_entries or self._size > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted.content)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drops every cached image."""
+        self._entries.clear()
+        self._size = 0
@@ -0,0 +1,88 @@
+"""Diagnostics support for the Russound RIO integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN as RUSSOUND_DOMAIN
+from .russound import Russound
+
+TO_REDACT = {CONF_HOST}
+
+
+def _cache_snapshot(cache: dict) -> dict[str, Any]:
+    """Copies a state cache keyed by string ids, with per entry sizes."""
+    return {
+        str(key): {"size": len(variables), "variables": dict(variables)}
+        for key, variables in list(cache.items())
+    }
+
+
+def _callback_snapshot(callbacks: list) -> list[dict[str, Any]]:
+    """Describes the registered callbacks and the entity that owns them."""
+    described = []
+    for callback in list(callbacks):
+        owner = getattr(callback, "__self__", None)
+        described.append(
+            {
+                "callback": getattr(callback, "__qualname__", repr(callback)),
+                "entity_id": getattr(owner, "entity_id", None),
+                "count": getattr(owner, "callback_count", None),
+            }
+        )
+    return described
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry.
+
+    Everything is copied from in-memory state without awaiting the controller,
+    so a dump can be taken while the connection is busy.
+    """
+    controller: Russound = hass.data[RUSSOUND_DOMAIN][entry.entry_id]
+    connection = controller.connection
+
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "topology": {
+            "zones": [[str(zone_id), name] for zone_id, name in controller.zones],
+            "sources": [list(source) for source in controller.sources],
+            "presets": [list(preset) for preset in controller.presets],
+            "discovery_timing": controller.discovery_timing,
+        },
+        "cache": {
+            "zones": _cache_snapshot(connection._zone_state),
+            "sources": _cache_snapshot(connection._source_state),
+            "presets": _cache_snapshot(connection._preset_state),
+            "stale": connection.stale_count,
+        },
+        "watched": {
+            "zones": sorted(str(zone_id) for zone_id in connection._watched_zones),
+            "sources": sorted(connection._watched_sources),
+        },
+        "connection": {
+            "state": connection._state,
+            "history": [
+                {"time": timestamp, "state": state}
+                for timestamp, state in connection.state_history
+            ],
+            "reconnects": connection.reconnect_count,
+            "errors": connection.connection_errors,
+        },
+        "metrics": connection.metrics.as_dict(),
+        "monitor": connection.monitor.as_dict(),
+        "pacer": connection.pacer.budget,
+        "pool": controller.pool.as_dict(),
+        "callbacks": {
+            "zone": _callback_snapshot(connection._zone_callbacks),
+            "source": _callback_snapshot(connection._source_callbacks),
+            "preset": _callback_snapshot(connection._preset_callbacks),
+        },
+    }
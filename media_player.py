@@ -1,21 +1,28 @@
 """Support for Russound multizone controllers using RIO Protocol."""
 
 from .russound import Russound
+from .browse_media import PresetBrowser
+from .cover_art import CoverArtCache
 from .russound_zone import RussoundMediaPlayer
-from .error import RussoundError
+from .rio.connection import CommandException
+from .rio.error import RussoundError
 
 import logging
 import asyncio
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers import entity_platform
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import device_registry as dr
 from .const import (
     DOMAIN as RUSSOUND_DOMAIN,
-    SIGNAL_CONNECTION_EVENT,
+    DISCOVERY_RETRY_DELAY,
+    EVENT_CONTROLLER_CONNECTED,
+    SIGNAL_CONTROLLER_EVENT,
+    SIGNAL_ZONE_ADDED,
+    ZONE_SETTINGS,
 )
 from homeassistant.const import (
     EVENT_HOMEASSISTANT_STOP,
@@ -24,54 +31,25 @@ from homeassistant.const import (
 _LOGGER = logging.getLogger(__name__)
 
 
-logging.basicConfig(level=logging.DEBUG)
-# PYTHONASYNCIODEBUG=1
-
-
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities
 ):
     """Set up the platform from a config entry."""
     platform = entity_platform.async_get_current_platform()
-    controller = Russound(entry)
-    hass.data[RUSSOUND_DOMAIN][entry.entry_id] = controller
-    try:
-        await controller.connect()
-        if controller.is_connected:
-            async_add_entities(new_entities=[controller])
-            sources = await controller.enumerate_sources()
-            presets = await controller.enumerate_presets()
-            valid_zones = await controller.enumerate_zones()
-
-            for source_id, source_name, source_type in sources:
-                await controller.watch_source(source_id)
-
-            for zone_id, name in valid_zones:
-                await controller.watch_zone(zone_id)
-                _LOGGER.info("Opretter %s:%s", zone_id, name)
-                async_add_entities(
-                    new_entities=[
-                        RussoundMediaPlayer(
-                            entry, controller, zone_id, name, sources, presets
-                        )
-                    ]
-                )
-    except (RussoundError, ConnectionError) as err:
-        await controller._connection.disconnect()
-        _LOGGER.error("Unable to connect: %s", err)
-        raise ConfigEntryNotReady from err
-
-    async def async_create_entities(self) -> None:
-        """Handles reconnecting entities."""
-        for zone_id, name in valid_zones:
-            await controller.watch_zone(zone_id)
-
-        for source_id, source_name, source_type in sources:
-            await controller.watch_source(source_id)
-
-    controller._signals = [
-        controller.dispatcher.connect(SIGNAL_CONNECTION_EVENT, async_create_entities)
-    ]
+    controller: Russound = hass.data[RUSSOUND_DOMAIN][entry.entry_id]
+    if controller.is_connected:
+        async_add_entities(new_entities=[controller])
+        # Zones are added as they are found, the sources and presets of their
+        # source lists follow once the catalog is complete
+        # Zones playing the same source share the downloads of its cover art
+        art_cache = CoverArtCache(async_get_clientsession(hass))
+        browser = PresetBrowser(controller)
+        discovery = hass.async_create_task(
+            _async_discover(
+                hass, controller, entry, art_cache, browser, async_add_entities
+            )
+        )
+        entry.async_on_unload(discovery.cancel)
 
     @callback
     def on_stop(event):
@@ -79,3 +57,121 @@ async def async_setup_entry(
         hass.loop.create_task(controller.disconnect())
 
     hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, on_stop)
+
+
+async def _async_discover(
+    hass: HomeAssistant,
+    controller: Russound,
+    entry: ConfigEntry,
+    art_cache: CoverArtCache,
+    browser: PresetBrowser,
+    async_add_entities,
+) -> None:
+    """Add a media player for every zone as soon as it is found, then fill in
+    the source and preset catalog.
+
+    When discovery fails before any zone was added the entry is reloaded, so
+    setup is retried. Otherwise discovery runs again, skipping the zones
+    already added, once the controller is connected again.
+    """
+    added = set()
+    while True:
+        try:
+            await _async_discover_once(
+                controller, entry, art_cache, browser, async_add_entities, added
+            )
+            break
+        except (
+            RussoundError,
+            CommandException,
+            ConnectionError,
+            asyncio.TimeoutError,
+        ) as err:
+            if not added:
+                _LOGGER.error("Discovery of %s failed, reloading: %s", entry.title, err)
+                hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
+                return
+            _LOGGER.warning("Discovery of %s failed: %s", entry.title, err)
+        await _async_wait_for_retry(controller)
+
+    timing = controller.discovery_timing
+    _LOGGER.info(
+        "First zone of %s usable after %.2fs, discovery completed in %.2fs "
+        "(zones %.2fs, sources %.2fs, presets %.2fs)",
+        entry.title,
+        timing["first_zone"] or 0.0,
+        timing["presets"],
+        timing["zones"],
+        timing["sources"],
+        timing["presets"],
+    )
+
+
+async def _async_wait_for_retry(controller: Russound) -> None:
+    """Waits until the controller is connected again, or for
+    DISCOVERY_RETRY_DELAY when it still is."""
+    if controller.is_connected:
+        await asyncio.sleep(DISCOVERY_RETRY_DELAY)
+        return
+    connected = asyncio.Event()
+
+    async def controller_event(event: str, *args) -> None:
+        if event == EVENT_CONTROLLER_CONNECTED:
+            connected.set()
+
+    signal = controller.dispatcher.connect(SIGNAL_CONTROLLER_EVENT, controller_event)
+    try:
+        await connected.wait()
+    finally:
+        signal.disconnect()
+
+
+async def _async_discover_once(
+    controller: Russound,
+    entry: ConfigEntry,
+    art_cache: CoverArtCache,
+    browser: PresetBrowser,
+    async_add_entities,
+    added: set,
+) -> None:
+    """Adds a media player for every zone found that isn't in added yet. A
+    zone that can't be watched is skipped."""
+    async for zone_id, name in controller.discover_zones():
+        if zone_id in added:
+            continue
+        try:
+            await controller.watch_zone(zone_id)
+        except (CommandException, asyncio.TimeoutError) as err:
+            _LOGGER.error("Watching %s of %s failed: %s", zone_id, entry.title, err)
+            continue
+        async_add_entities(
+            new_entities=[
+                RussoundMediaPlayer(
+                    entry,
+                    controller,
+                    zone_id,
+                    name,
+                    controller.sources,
+                    controller.presets,
+                    art_cache,
+                    browser,
+                )
+            ]
+        )
+        added.add(zone_id)
+        controller.zone_usable()
+        # The settings are pushed from now on, read them once in a batch
+        try:
+            await controller.fetch_zone_variables(zone_id, ZONE_SETTINGS)
+        except (CommandException, asyncio.TimeoutError) as err:
+            _LOGGER.warning(
+                "Reading the settings of %s of %s failed: %s",
+                zone_id,
+                entry.title,
+                err,
+            )
+        controller.dispatcher.send(SIGNAL_ZONE_ADDED, zone_id, name)
+
+    # Sources are watched on demand, while a powered zone uses them
+    controller.source_watcher.start()
+    await controller.enumerate_catalog()
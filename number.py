@@ -0,0 +1,80 @@
+"""Number entities for the audio settings of a zone."""
+
+from __future__ import annotations
+
+from homeassistant.components.number import (
+    NumberEntity,
+    NumberEntityDescription,
+    NumberMode,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .zone_settings import RussoundZoneSettingEntity, async_setup_zone_settings
+
+NUMBERS: tuple[NumberEntityDescription, ...] = (
+    NumberEntityDescription(
+        key="bass",
+        name="Bass",
+        icon="mdi:speaker",
+        native_min_value=-10,
+        native_max_value=10,
+        native_step=1,
+        mode=NumberMode.SLIDER,
+    ),
+    NumberEntityDescription(
+        key="treble",
+        name="Treble",
+        icon="mdi:speaker",
+        native_min_value=-10,
+        native_max_value=10,
+        native_step=1,
+        mode=NumberMode.SLIDER,
+    ),
+    NumberEntityDescription(
+        key="balance",
+        name="Balance",
+        icon="mdi:scale-balance",
+        native_min_value=-10,
+        native_max_value=10,
+        native_step=1,
+        mode=NumberMode.SLIDER,
+    ),
+    NumberEntityDescription(
+        key="turnOnVolume",
+        name="Turn on volume",
+        icon="mdi:volume-medium",
+        native_min_value=0,
+        native_max_value=50,
+        native_step=1,
+        mode=NumberMode.SLIDER,
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities
+):
+    """Set up the zone setting numbers from a config entry."""
+    await async_setup_zone_settings(
+        hass, entry, async_add_entities, NUMBERS, RussoundZoneNumber
+    )
+
+
+class RussoundZoneNumber(RussoundZoneSettingEntity, NumberEntity):
+    """A numeric audio setting of a zone."""
+
+    entity_description: NumberEntityDescription
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the setting from the cache."""
+        value = self._cached_value
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    async def async_set_native_value(self, value: float) -> None:
+        """Change the setting."""
+        await self._async_set(int(value))
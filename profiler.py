@@ -0,0 +1,140 @@
+"""On demand CPU and memory profiling of the integration.
+
+Nothing here runs until the profile service is called. A session enables
+cProfile and tracemalloc for the requested time, then writes the statistics
+of the integration's own code to the config directory.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import sys
+import time
+import tracemalloc
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import PROFILE_TOP_ENTRIES
+from .russound import Russound
+
+_LOGGER = logging.getLogger(__name__)
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_session_lock = asyncio.Lock()
+
+
+def _deep_size(value, seen=None) -> int:
+    """Approximate bytes held by a container and everything it references."""
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += _deep_size(key, seen) + _deep_size(item, seen)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += _deep_size(item, seen)
+    return size
+
+
+def _state_sizes(controller: Russound) -> list[tuple[str, int, int]]:
+    """Returns (name, entries, bytes) of the connection's state containers."""
+    connection = controller.connection
+    containers = {
+        "zone_state": connection._zone_state,
+        "source_state": connection._source_state,
+        "preset_state": connection._preset_state,
+        "fetched": connection._fetched,
+        "negative_cache": connection._negative_cache,
+        "provisional": connection._provisional,
+        "stale": connection._stale,
+        "zone_callbacks": connection._zone_callbacks,
+        "source_callbacks": connection._source_callbacks,
+        "preset_callbacks": connection._preset_callbacks,
+    }
+    return [
+        (name, len(container), _deep_size(container))
+        for name, container in containers.items()
+    ]
+
+
+def _write_report(
+    path: str,
+    profile: cProfile.Profile,
+    snapshot: tracemalloc.Snapshot,
+    duration: float,
+    sizes: dict[str, list[tuple[str, int, int]]],
+) -> None:
+    profile.dump_stats(path + ".pstats")
+    with open(path + ".txt", "w", encoding="utf-8") as report:
+        report.write("Russound RIO profile, %.1f seconds\n\n" % duration)
+
+        report.write("== CPU, integration code by cumulative time ==\n")
+        stream = io.StringIO()
+        stats = pstats.Stats(profile, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE)
+        stats.print_stats(re.escape(PACKAGE_DIR), PROFILE_TOP_ENTRIES)
+        report.write(stream.getvalue())
+
+        report.write("\n== Allocations by integration code ==\n")
+        snapshot = snapshot.filter_traces(
+            [tracemalloc.Filter(True, os.path.join(PACKAGE_DIR, "*"))]
+        )
+        for stat in snapshot.statistics("lineno")[:PROFILE_TOP_ENTRIES]:
+            report.write("%s\n" % (stat,))
+
+        report.write("\n== Connection state ==\n")
+        for title, rows in sizes.items():
+            report.write("%s\n" % (title,))
+            for row in rows:
+                report.write("  %-18s %8d entries %10d bytes\n" % row)
+
+
+async def async_profile(
+    hass: HomeAssistant, controllers: dict[str, Russound], duration: float
+) -> str:
+    """Profiles the event loop for duration seconds and returns the path of
+    the report, without extension. controllers maps entry titles to the
+    controllers whose state is measured."""
+    if _session_lock.locked():
+        raise HomeAssistantError("A profiling session is already running")
+    async with _session_lock:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as err:
+            # Another profiler is active on the event loop thread
+            raise HomeAssistantError(f"Unable to start profiling: {err}") from err
+        started_tracemalloc = not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            profile.disable()
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracemalloc:
+                tracemalloc.stop()
+
+        sizes = {
+            title: _state_sizes(controller) for title, controller in controllers.items()
+        }
+        path = hass.config.path(
+            "russound_rio_profile_%s" % time.strftime("%Y%m%d_%H%M%S")
+        )
+        await hass.async_add_executor_job(
+            _write_report, path, profile, snapshot, duration, sizes
+        )
+        _LOGGER.info("Profile written to %s.txt and %s.pstats", path, path)
+        return path
@@ -0,0 +1,29 @@
+"""Pure asyncio client for the Russound RIO protocol.
+
+Nothing in this package depends on Home Assistant, so it can be imported on
+its own by scripts, benchmarks and tools. The integration builds its entities
+on top of RussoundClient.
+"""
+
+from .client import RussoundClient
+from .connection import (
+    CommandException,
+    Connection,
+    PresetID,
+    UncachedVariable,
+    ZoneID,
+)
+from .dispatcher import Dispatcher
+from .error import ConnectionLostError, RussoundError
+
+__all__ = [
+    "CommandException",
+    "Connection",
+    "ConnectionLostError",
+    "Dispatcher",
+    "PresetID",
+    "RussoundClient",
+    "RussoundError",
+    "UncachedVariable",
+    "ZoneID",
+]
@@ -0,0 +1,159 @@
+"""Recording and replay of the raw traffic of a controller connection.
+
+A capture is an append-only file starting with a short magic header, followed
+by one record per line sent or received. Each record holds the wall clock
+time, the direction and the length of the raw line, followed by the line
+itself. Captures can be replayed through a Connection's response processing,
+cache and callbacks to reproduce real-world traffic patterns.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import mmap
+import os
+import struct
+import time
+
+from .connection import CommandException, Connection
+from .const import CAPTURE_OUTBOUND
+from .dispatcher import Dispatcher
+
+MAGIC = b"RIOCAP1\n"
+
+# Timestamp (seconds since the epoch), direction, payload length
+_RECORD = struct.Struct("<dBI")
+
+# Lines replayed between yields to the event loop when replaying at full speed
+REPLAY_YIELD_EVERY = 1000
+
+
+class CaptureError(Exception):
+    """A file is not a valid capture."""
+
+
+class CaptureWriter:
+    """Appends records to a capture file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records = 0
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+
+    def write(self, direction: int, payload: bytes) -> None:
+        """Appends a line sent (CAPTURE_OUTBOUND) or received
+        (CAPTURE_INBOUND) now."""
+        self._file.write(_RECORD.pack(time.time(), direction, len(payload)))
+        self._file.write(payload)
+        self.records += 1
+
+    def flush(self) -> None:
+        """Writes buffered records to disk."""
+        self._file.flush()
+
+    def close(self) -> None:
+        """Flushes and closes the file."""
+        self._file.close()
+
+
+class CaptureReader:
+    """Reads the records of a capture file through a memory map, so large
+    captures are not loaded in memory."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < len(MAGIC):
+            self._file.close()
+            raise CaptureError("%s is not a capture file" % (path,))
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise CaptureError("%s is not a capture file" % (path,))
+
+    def __iter__(self):
+        """Yields (timestamp, direction, payload) for every complete record.
+        A record cut short by an interrupted recording ends the iteration."""
+        data = self._map
+        offset = len(MAGIC)
+        end = len(data)
+        while offset + _RECORD.size <= end:
+            timestamp, direction, length = _RECORD.unpack_from(data, offset)
+            offset += _RECORD.size
+            if offset + length > end:
+                return
+            yield timestamp, direction, data[offset : offset + length]
+            offset += length
+
+    def close(self) -> None:
+        """Releases the memory map and the file."""
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> CaptureReader:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+@dataclass
+class ReplayStats:
+    """Outcome of replaying a capture."""
+
+    inbound: int = 0
+    outbound: int = 0
+    # Error replies and blank lines
+    errors: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Inbound lines processed per second."""
+        return self.inbound / self.elapsed if self.elapsed else 0.0
+
+
+async def replay(
+    path: str, connection: Connection | None = None, speed: float | None = None
+) -> ReplayStats:
+    """Feeds the inbound lines of a capture through a connection's response
+    processing, updating its cache and calling its callbacks.
+
+    With speed unset the capture is replayed as fast as possible, otherwise
+    the original spacing of the lines is kept, divided by speed. Outbound
+    commands are counted but not sent. When no connection is given a fresh,
+    disconnected one is used.
+    """
+    if connection is None:
+        connection = Connection(Dispatcher(), None, None)
+    stats = ReplayStats()
+    started = time.perf_counter()
+    first = None
+    with CaptureReader(path) as reader:
+        for timestamp, direction, payload in reader:
+            if speed:
+                if first is None:
+                    first = timestamp
+                delay = (timestamp - first) / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if direction == CAPTURE_OUTBOUND:
+                stats.outbound += 1
+                continue
+            stats.inbound += 1
+            try:
+                connection._process_response(payload)
+            except CommandException:
+                stats.errors += 1
+            except IndexError:
+                # A blank line
+                stats.errors += 1
+            if not speed and stats.inbound % REPLAY_YIELD_EVERY == 0:
+                # Let callbacks scheduled on the loop run during long replays
+                await asyncio.sleep(0)
+    stats.elapsed = time.perf_counter() - started
+    return stats
@@ -0,0 +1,465 @@
+"""Command line monitor and load tool for Russound controllers.
+
+Run with 'python -m rio' from the integration directory. Every command talks
+to the controller at HOST, or to a local simulator when --simulate is given,
+except replay which plays back a capture recorded with --capture, and scale
+which checks the budgets of a simulated system of the largest size.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from contextlib import asynccontextmanager
+import itertools
+import logging
+import time
+
+from .capture import CaptureError, replay
+from .client import RussoundClient
+from .connection import CommandException
+from .const import (
+    DEFAULT_PORT,
+    MAX_CONTROLLERS,
+    MAX_SOURCES,
+    MAX_ZONES,
+    SCALE_BUDGETS,
+)
+from .scale import check_budgets, run_scale
+from .simulator import RioSimulator
+
+ZONE_COLUMNS = ("name", "status", "currentsource", "volume", "mute", "bass", "treble")
+
+
+def percentile(values: list[float], percent: float) -> float | None:
+    """Returns the nearest-rank percentile of already sorted values."""
+    if not values:
+        return None
+    rank = max(0, min(len(values) - 1, round(len(values) * percent / 100.0) - 1))
+    return values[rank]
+
+
+def _ms(value: float | None) -> str:
+    return "-" if value is None else "%.1fms" % (value * 1000.0)
+
+
+def _s(value: float | None) -> str:
+    return "-" if value is None else "%.3fs" % value
+
+
+def print_table(rows: list[list[str]], header: list[str]) -> None:
+    """Prints rows as left aligned columns."""
+    widths = [
+        max(len(str(row[index])) for row in [header, *rows])
+        for index in range(len(header))
+    ]
+    for row in [header, *rows]:
+        print("  ".join(str(cell).ljust(width) for cell, width in zip(row, widths)))
+
+
+@asynccontextmanager
+async def open_client(args):
+    """Connects a client to the controller, or to a simulator started for the
+    duration of the command."""
+    simulator = None
+    host, port = args.host, args.port
+    if args.simulate:
+        simulator = RioSimulator(
+            controllers=args.sim_controllers,
+            zones=args.sim_zones,
+            sources=args.sim_sources,
+            latency=args.sim_latency,
+        )
+        host, port = "127.0.0.1", await simulator.start()
+    client = RussoundClient(host, port, reconnect=not args.simulate)
+    try:
+        await client.connect()
+        if args.capture:
+            client.connection.start_capture(args.capture)
+        yield client
+    finally:
+        await client.disconnect()
+        if simulator:
+            await simulator.close()
+
+
+async def cmd_monitor(client: RussoundClient, args) -> None:
+    """Streams every zone and source notification until interrupted."""
+    start = time.monotonic()
+
+    def printer(kind):
+        def callback(target, name, value):
+            device = target.device_str() if kind == "zone" else "S[%d]" % target
+            elapsed = time.monotonic() - start
+            print('%9.3f  %s.%s = "%s"' % (elapsed, device, name, value))
+
+        return callback
+
+    zones = await client.enumerate_zones()
+    client.add_zone_callback(printer("zone"))
+    client.add_source_callback(printer("source"))
+    for zone_id, _ in zones:
+        await client.watch_zone(zone_id)
+    if args.all_sources:
+        for source_id, _, _ in await client.enumerate_sources():
+            await client.watch_source(source_id)
+    else:
+        client.source_watcher.start()
+    print("Watching %d zones, press Ctrl+C to stop" % len(zones))
+    await asyncio.Event().wait()
+
+
+async def cmd_zones(client: RussoundClient, args) -> None:
+    """Prints the state of every zone, optionally refreshing it."""
+    zones = await client.enumerate_zones()
+    for zone_id, _ in zones:
+        await client.watch_zone(zone_id)
+    for zone_id, _ in zones:
+        for name in ZONE_COLUMNS:
+            # Makes sure the first table isn't missing values still being pushed
+            try:
+                await client.get_zone_variable(zone_id, name)
+            except CommandException:
+                pass
+    while True:
+        rows = [
+            [str(zone_id)]
+            + [
+                client.get_cached_zone_variable(zone_id, name, "")
+                for name in ZONE_COLUMNS
+            ]
+            for zone_id, _ in zones
+        ]
+        print_table(rows, ["zone", *ZONE_COLUMNS])
+        if not args.interval:
+            return
+        await asyncio.sleep(args.interval)
+        print()
+
+
+async def cmd_discover(client: RussoundClient, args) -> None:
+    """Enumerates zones, sources and presets and reports how long each took."""
+    async for _ in client.discover_zones():
+        client.zone_usable()
+    await client.enumerate_catalog()
+    timing = client.discovery_timing
+    print_table(
+        [
+            ["first zone", min(1, len(client.zones)), _s(timing["first_zone"])],
+            ["zones", len(client.zones), _s(timing["zones"])],
+            ["sources", len(client.sources), _s(timing["sources"])],
+            ["presets", len(client.presets), _s(timing["presets"])],
+        ],
+        ["stage", "found", "since start"],
+    )
+    print()
+    _print_metrics(client)
+
+
+async def cmd_load(client: RussoundClient, args) -> None:
+    """Fires zone commands concurrently and reports throughput and latency.
+
+    --count commands are sent, at most --concurrency of them at a time.
+    """
+    zones = [zone_id for zone_id, _ in await client.enumerate_zones()]
+    if args.mode == "source":
+        sources = [source_id for source_id, _, _ in await client.enumerate_sources()]
+        events = (
+            ("SelectSource", source_id) for source_id in itertools.cycle(sources)
+        )
+    else:
+        events = (
+            ("KeyPress", "Volume", volume)
+            for volume in itertools.cycle(range(args.min_volume, args.max_volume + 1))
+        )
+    commands = [
+        (zones[index % len(zones)], next(events)) for index in range(args.count)
+    ]
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    errors = 0
+
+    async def send(zone_id, event):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await client.send_zone_event(zone_id, *event)
+            except (CommandException, ConnectionError, asyncio.TimeoutError):
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(zone_id, event) for zone_id, event in commands))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(
+        "%d commands in %.3fs, %.1f commands/s, %d errors"
+        % (len(commands), elapsed, len(commands) / elapsed, errors)
+    )
+    print(
+        "latency p50 %s  p95 %s  p99 %s  max %s"
+        % tuple(_ms(percentile(latencies, p)) for p in (50, 95, 99, 100))
+    )
+    print()
+    _print_metrics(client)
+
+
+def _print_metrics(client: RussoundClient) -> None:
+    connection = client.connection
+    rows = []
+    for kind, command in connection.metrics.commands.items():
+        if command.rtt.count:
+            rtt = command.rtt.as_dict()
+            queue = command.queue.as_dict()
+            rows.append(
+                [
+                    kind,
+                    command.rtt.count,
+                    rtt["p50_ms"],
+                    rtt["p95_ms"],
+                    rtt["p99_ms"],
+                    queue["p95_ms"],
+                    command.errors,
+                ]
+            )
+    print_table(
+        rows,
+        [
+            "command",
+            "count",
+            "rtt p50 ms",
+            "rtt p95 ms",
+            "rtt p99 ms",
+            "queue p95 ms",
+            "errors",
+        ],
+    )
+    stages = connection.monitor.stages
+    print(
+        "loop lag p95 %s, line processing p95 %s, callback p95 %s"
+        % tuple(
+            _ms(stages[stage].percentile(95))
+            for stage in ("loop_lag", "process", "callback")
+        )
+    )
+    budget = connection.pacer.budget
+    print(
+        "pacer %.1f/s, throttled %d times, %d decreases"
+        % (budget["rate"], budget["throttled"], budget["decreases"])
+    )
+
+
+async def cmd_replay(args) -> None:
+    """Replays a capture through a disconnected client's cache and callbacks."""
+    client = RussoundClient(None)
+    notifications = 0
+
+    def count(target, name, value):
+        nonlocal notifications
+        notifications += 1
+
+    client.add_zone_callback(count)
+    client.add_source_callback(count)
+    client.add_preset_callback(count)
+    for _ in range(args.repeat):
+        stats = await replay(args.path, client.connection, args.speed)
+        print(
+            "%d lines in %.3fs, %.0f lines/s, %d commands skipped, %d errors"
+            % (stats.inbound, stats.elapsed, stats.rate, stats.outbound, stats.errors)
+        )
+    connection = client.connection
+    print(
+        "%d callbacks, cached %d zones, %d sources, %d presets"
+        % (
+            notifications,
+            len(connection._zone_state),
+            len(connection._source_state),
+            len(connection._preset_state),
+        )
+    )
+
+
+async def cmd_scale(args) -> bool:
+    """Runs the scale test on a simulated system and checks its budgets.
+
+    The system has the largest size the protocol can address, unless smaller
+    sizes are given.
+    """
+    budgets = {
+        "setup": args.max_setup,
+        "resync": args.max_resync,
+        "cpu_per_notification": args.max_cpu_us / 1000000.0,
+        "peak_rss": args.max_rss_mb * 1024 * 1024,
+    }
+    report = await run_scale(
+        controllers=args.controllers,
+        zones=args.zones,
+        sources=args.sources,
+        rounds=args.rounds,
+        rate=args.rate,
+        latency=args.sim_latency,
+        bulk_connections=args.bulk_connections,
+    )
+    failed = check_budgets(report, budgets)
+    print(
+        "%d zones, %d sources, %d presets"
+        % (report.zones, report.sources, report.presets)
+    )
+    print(
+        "churn: %d notifications, %d callbacks, %d state writes"
+        % (report.notifications, report.callbacks, report.writes)
+    )
+    print()
+    rss = report.peak_rss
+    print_table(
+        [
+            ["setup", _s(report.setup), _s(budgets["setup"])],
+            ["resync", _s(report.resync), _s(budgets["resync"])],
+            [
+                "cpu_per_notification",
+                "%.1fus" % (report.cpu_per_notification * 1000000.0),
+                "%.1fus" % (args.max_cpu_us,),
+            ],
+            [
+                "peak_rss",
+                "-" if rss is None else "%.1fMB" % (rss / 1024.0 / 1024.0),
+                "%.1fMB" % (args.max_rss_mb,),
+            ],
+        ],
+        ["budget", "measured", "limit"],
+    )
+    print()
+    if failed:
+        print("Over budget: %s" % (", ".join(failed),))
+    else:
+        print("All budgets met")
+    return not failed
+
+
+COMMANDS = {
+    "monitor": cmd_monitor,
+    "zones": cmd_zones,
+    "discover": cmd_discover,
+    "load": cmd_load,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Returns the command line parser."""
+    parser = argparse.ArgumentParser(prog="python -m rio", description=__doc__)
+    parser.add_argument("--debug", action="store_true", help="enable debug logging")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, command in COMMANDS.items():
+        sub = subparsers.add_parser(name, help=command.__doc__.splitlines()[0])
+        sub.add_argument("host", nargs="?", help="address of the controller")
+        sub.add_argument("--port", type=int, default=DEFAULT_PORT)
+        sub.add_argument(
+            "--simulate", action="store_true", help="run against a local simulator"
+        )
+        sub.add_argument("--sim-controllers", type=int, default=1)
+        sub.add_argument("--sim-zones", type=int, default=6)
+        sub.add_argument("--sim-sources", type=int, default=4)
+        sub.add_argument(
+            "--sim-latency", type=float, default=0.0, help="reply delay in seconds"
+        )
+        sub.add_argument("--capture", help="record the traffic to a capture file")
+        if name == "monitor":
+            sub.add_argument(
+                "--all-sources",
+                action="store_true",
+                help="watch every source instead of the ones in use",
+            )
+        elif name == "zones":
+            sub.add_argument(
+                "--interval", type=float, default=0, help="refresh every N seconds"
+            )
+        elif name == "load":
+            sub.add_argument("--count", type=int, default=100)
+            sub.add_argument("--concurrency", type=int, default=10)
+            sub.add_argument("--mode", choices=("volume", "source"), default="volume")
+            sub.add_argument("--min-volume", type=int, default=5)
+            sub.add_argument("--max-volume", type=int, default=15)
+
+    sub = subparsers.add_parser("replay", help=cmd_replay.__doc__)
+    sub.add_argument("path", help="capture file to replay")
+    sub.add_argument(
+        "--speed",
+        type=float,
+        help="keep the original timing, sped up by this factor "
+        "(default: as fast as possible)",
+    )
+    sub.add_argument("--repeat", type=int, default=1)
+
+    sub = subparsers.add_parser("scale", help=cmd_scale.__doc__.splitlines()[0])
+    sub.add_argument("--controllers", type=int, default=MAX_CONTROLLERS)
+    sub.add_argument("--zones", type=int, default=MAX_ZONES)
+    sub.add_argument("--sources", type=int, default=MAX_SOURCES)
+    sub.add_argument(
+        "--rounds", type=int, default=200, help="rounds of metadata changes"
+    )
+    sub.add_argument(
+        "--rate", type=float, default=20.0, help="rounds of changes per second"
+    )
+    sub.add_argument(
+        "--sim-latency", type=float, default=0.0, help="reply delay in seconds"
+    )
+    sub.add_argument("--bulk-connections", type=int, default=0)
+    sub.add_argument(
+        "--max-setup", type=float, default=SCALE_BUDGETS["setup"], help="seconds"
+    )
+    sub.add_argument(
+        "--max-resync", type=float, default=SCALE_BUDGETS["resync"], help="seconds"
+    )
+    sub.add_argument(
+        "--max-cpu-us",
+        type=float,
+        default=SCALE_BUDGETS["cpu_per_notification"] * 1000000.0,
+        help="CPU microseconds per notification",
+    )
+    sub.add_argument(
+        "--max-rss-mb",
+        type=float,
+        default=SCALE_BUDGETS["peak_rss"] / 1024.0 / 1024.0,
+        help="peak resident memory in megabytes",
+    )
+    return parser
+
+
+def main(argv=None) -> int:
+    """Runs the command line tool."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.WARNING)
+    if args.command == "replay":
+        try:
+            asyncio.run(cmd_replay(args))
+        except (CaptureError, OSError) as err:
+            print("Unable to replay: %s" % (err,))
+            return 1
+        return 0
+    if args.command == "scale":
+        try:
+            return 0 if asyncio.run(cmd_scale(args)) else 1
+        except (ConnectionError, TimeoutError) as err:
+            print("Scale test failed: %s" % (err,))
+            return 1
+
+    if not args.host and not args.simulate:
+        parser.error("a host is required unless --simulate is given")
+
+    async def run():
+        async with open_client(args) as client:
+            await COMMANDS[args.command](client, args)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    except ConnectionError as err:
+        print("Unable to connect: %s" % (err,))
+        return 1
+    return 0
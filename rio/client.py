@@ -0,0 +1,660 @@
+"""Home Assistant independent client for Russound controllers."""
+
+from __future__ import annotations
+
+import logging
+import time
+
+from .connection import (
+    CommandException,
+    Connection,
+    PresetID,
+    UncachedVariable,
+    ZoneID,
+)
+from .const import (
+    DEFAULT_BULK_CONNECTIONS,
+    DEFAULT_PORT,
+    DEFAULT_TIMEOUT,
+    STATE_CONNECTED,
+    STATE_RECONNECTING,
+    DEFAULT_RECONNECT_DELAY,
+    DEFAULT_KEEPALIVE_INTERVAL,
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    EVENT_CONNECTION_CONNECTED,
+    EVENT_CONNECTION_DISCONNECTED,
+    EVENT_CONNECTION_RECONNECTING,
+    SIGNAL_CONTROLLER_EVENT,
+    EVENT_CONTROLLER_CONNECTED,
+    EVENT_CONTROLLER_DISCONNECTED,
+    EVENT_CONTROLLER_RECONNECTING,
+    EVENT_CONTROLLER_UPDATED,
+    MAX_BANKS,
+    MAX_CONTROLLERS,
+    MAX_PRESETS,
+    MAX_SOURCES,
+    MAX_ZONES,
+    SIGNAL_CONNECTION_EVENT,
+    SOURCE_TYPE_TUNER,
+)
+from .dispatcher import Dispatcher
+from .error import RussoundError
+from .pool import ConnectionPool
+from .watch_manager import SourceWatchManager
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def zone_event_effects(event_name, *args):
+    """Returns the (variable, value) pairs a zone event sets the zone to, empty
+    when the effect of the event is relative or unknown."""
+    event = event_name.lower()
+    if event == "zoneon":
+        return (("status", "ON"),)
+    if event == "zoneoff":
+        return (("status", "OFF"),)
+    if event == "selectsource" and len(args) == 1:
+        # Selecting a source also turns the zone on
+        return (("currentsource", str(args[0])), ("status", "ON"))
+    if event == "keypress" and len(args) == 2 and str(args[0]).lower() == "volume":
+        return (("volume", str(args[1])),)
+    return ()
+
+
+class RussoundClient:
+    """Manages the RIO connection to a Russound device.
+
+    Holds the connection and its state cache and offers the zone, source and
+    preset operations of the protocol, without depending on Home Assistant.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = DEFAULT_PORT,
+        *,
+        reconnect: bool = True,
+        keepalive_interval: float | None = DEFAULT_KEEPALIVE_INTERVAL,
+        elide_commands: bool = False,
+        bulk_connections: int = DEFAULT_BULK_CONNECTIONS,
+    ):
+        """
+        Initialize the client using the host and port provided.
+        Up to bulk_connections secondary connections are opened on demand for
+        enumeration and other bulk reads.
+        """
+        self._host = host
+        self._port = port
+        self._reconnect_enabled = reconnect
+        self._reconnect_delay: float = DEFAULT_RECONNECT_DELAY
+        self._timeout: float = DEFAULT_TIMEOUT
+        self._keepalive_interval = keepalive_interval
+        self._elide_commands = elide_commands
+        self._dispatcher = Dispatcher()
+        self._connection = Connection(self._dispatcher, host, port)
+        self._pool = ConnectionPool(self._connection, bulk_connections)
+        self._signals = []
+        self._zones = []
+        self._sources = []
+        self._presets = []
+        self._source_watcher = SourceWatchManager(self)
+        self._discovery_started: float | None = None
+        self._discovery_timing: dict[str, float | None] = dict.fromkeys(
+            ("first_zone", "zones", "sources", "presets")
+        )
+
+    async def connect(self) -> None:
+        """Connect to the controller."""
+        if self.is_connected:
+            return
+
+        self._signals = [
+            self.dispatcher.connect(SIGNAL_CONNECTION_EVENT, self._handle_event)
+        ]
+
+        await self._connection.connect(
+            host=self._host,
+            port=self._port,
+            timeout=self._timeout,
+            auto_reconnect=self._reconnect_enabled,
+            reconnect_delay=self._reconnect_delay,
+            keepalive_interval=self._keepalive_interval,
+            keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT,
+        )
+
+        _LOGGER.debug(
+            "Connected to server %s",
+            self._host,
+        )
+
+    async def disconnect(self) -> None:
+        """
+        Disconnect from hardware, also while reconnecting, and stop watching
+        sources.
+        """
+        self._source_watcher.stop()
+        # First the primary, so the pool doesn't open connections meanwhile
+        await self._connection.disconnect()
+        await self._pool.close()
+
+        try:
+            for signal in self._signals:
+                signal.disconnect()
+        finally:
+            self._signals.clear()
+
+    async def _handle_event(self, event: str, *args) -> None:
+        """Handles updates to the system."""
+        if event == EVENT_CONNECTION_CONNECTED:
+            # Skip refresh until initial load of devices is complete. Preventing any
+            # race conditions.
+            self._dispatcher.send(SIGNAL_CONTROLLER_EVENT, EVENT_CONTROLLER_CONNECTED)
+
+        elif event == EVENT_CONNECTION_RECONNECTING:
+            self._dispatcher.send(
+                SIGNAL_CONTROLLER_EVENT, EVENT_CONTROLLER_RECONNECTING
+            )
+
+        elif event == EVENT_CONNECTION_DISCONNECTED:
+            self._dispatcher.send(
+                SIGNAL_CONTROLLER_EVENT, EVENT_CONTROLLER_DISCONNECTED
+            )
+
+    @property
+    def dispatcher(self) -> Dispatcher:
+        """Returns dispatcher instance."""
+        return self._dispatcher
+
+    @property
+    def source_watcher(self) -> SourceWatchManager:
+        """Returns the manager watching sources in use by powered zones."""
+        return self._source_watcher
+
+    @property
+    def connection(self) -> Connection:
+        """Returns connection instance."""
+        return self._connection
+
+    @property
+    def zones(self) -> list:
+        """Returns the (zone_id, zone_name) tuples found by enumeration."""
+        return self._zones
+
+    @property
+    def sources(self) -> list:
+        """Returns the (source_id, source_name, source_type) tuples found by
+        enumeration."""
+        return self._sources
+
+    @property
+    def presets(self) -> list:
+        """Returns the preset tuples found by enumeration."""
+        return self._presets
+
+    @property
+    def is_connected(self) -> bool:
+        """Returns whether connection is currently connected."""
+        return self._connection._state == STATE_CONNECTED
+
+    @property
+    def is_reconnecting(self) -> bool:
+        """Returns whether connection is currently reconnecting."""
+        return self._connection._state == STATE_RECONNECTING
+
+    async def get_amplifier_model(self):
+        """Get amplifier model name"""
+        return await self._connection._send_cmd("GET C[%d].%s" % (1, "type"))
+
+    def _can_elide_zone_command(self, zone_id, effects) -> bool:
+        """
+        Returns whether the watched state shows the zone already has every
+        (variable, value) pair in effects, making a command setting them
+        redundant.
+        """
+        if (
+            not effects
+            or not self._elide_commands
+            or zone_id not in self._connection._watched_zones
+        ):
+            return False
+        for variable, value in effects:
+            if self._connection.is_provisional_zone_variable(
+                zone_id, variable
+            ) or self._connection.is_stale_zone_variable(zone_id, variable):
+                return False
+            cached = self.get_cached_zone_variable(zone_id, variable)
+            if cached is None or cached != str(value):
+                return False
+        self._connection.metrics.elided += 1
+        _LOGGER.debug(
+            "Elided command, %s already has %s",
+            zone_id.device_str(),
+            ", ".join("%s=%s" % effect for effect in effects),
+        )
+        return True
+
+    async def set_zone_variable(self, zone_id, variable, value):
+        """
+        Set a zone variable to a new value.
+        """
+        if self._can_elide_zone_command(zone_id, ((variable, value),)):
+            return None
+        r = await self._connection._send_cmd(
+            'SET %s.%s="%s"' % (zone_id.device_str(), variable, value)
+        )
+        self._connection._store_provisional_zone_variable(zone_id, variable, str(value))
+        return r
+
+    async def fetch_zone_variables(self, zone_id, variables):
+        """
+        Reads the zone variables missing from the cache as one command group,
+        asking the controller once per zone rather than once per variable.
+        Variables the controller rejects are left uncached.
+        """
+        connection = self._connection
+        cached = connection._zone_state.get(zone_id, {})
+        missing = [
+            variable
+            for variable in variables
+            if variable.lower() not in cached
+            or connection.is_stale_zone_variable(zone_id, variable)
+        ]
+        if not missing:
+            return
+        cmds = ["GET %s.%s" % (zone_id.device_str(), name) for name in missing]
+        try:
+            await self._run_bulk(lambda bulk: bulk._send_cmds(cmds))
+        except CommandException:
+            # The group stopped at the first rejected variable
+            for variable in missing:
+                try:
+                    await self.get_zone_variable(zone_id, variable)
+                except CommandException:
+                    pass
+
+    async def get_zone_variable(self, zone_id, variable, *, bulk=False):
+        """Retrieve the current value of a zone variable.  If the variable is
+        not found in the local cache, or has expired for an unwatched zone,
+        then the value is requested from the controller. With bulk set the
+        request may be sent on a secondary connection."""
+
+        return await self._read(
+            bulk,
+            zone_id,
+            variable,
+            "GET %s.%s" % (zone_id.device_str(), variable),
+            self._connection._zone_state,
+            zone_id in self._connection._watched_zones,
+        )
+
+    def get_cached_zone_variable(self, zone_id, variable, default=None):
+        """Retrieve the current value of a zone variable from the cache or
+        return the default value if the variable is not present."""
+
+        try:
+            return self._retrieve_cached_zone_variable(zone_id, variable)
+        except UncachedVariable:
+            return default
+
+    async def watch_zone(self, zone_id):
+        """Add a zone to the watchlist.
+        Zones on the watchlist will push all
+        state changes (and those of the source they are currently connected to)
+        back to the client"""
+        r = await self._connection._send_cmd("WATCH %s ON" % (zone_id.device_str(),))
+        self._connection._watched_zones.add(zone_id)
+        return r
+
+    async def unwatch_zone(self, zone_id):
+        """Remove a zone from the watchlist."""
+        self._connection._watched_zones.remove(zone_id)
+        return await self._connection._send_cmd(
+            "WATCH %s OFF" % (zone_id.device_str(),)
+        )
+
+    def _zone_event_cmd(self, zone_id, event_name, *args):
+        """Format the RIO command sending an event to a zone."""
+        return "EVENT %s!%s %s" % (
+            zone_id.device_str(),
+            event_name,
+            " ".join(str(x) for x in args),
+        )
+
+    async def send_zone_event(self, zone_id, event_name, *args):
+        """Send an event to a zone."""
+        effects = zone_event_effects(event_name, *args)
+        if self._can_elide_zone_command(zone_id, effects):
+            return None
+        cmd = self._zone_event_cmd(zone_id, event_name, *args)
+        r = await self._connection._send_cmd(cmd)
+        for effect in effects:
+            self._connection._store_provisional_zone_variable(zone_id, *effect)
+        return r
+
+    async def send_zone_events(self, zone_id, *events):
+        """
+        Send an ordered group of events to a zone as one unit. Each event is a
+        tuple of the event name followed by its arguments.
+        The events are sent back to back without any other command in between
+        and the first failing event stops the rest. Returns the reply to the
+        last event sent.
+        """
+        cmds = []
+        effects = []
+        for event_name, *args in events:
+            event_effects = zone_event_effects(event_name, *args)
+            if self._can_elide_zone_command(zone_id, event_effects):
+                continue
+            cmds.append(self._zone_event_cmd(zone_id, event_name, *args))
+            effects.extend(event_effects)
+        if not cmds:
+            return None
+        values = await self._connection._send_cmds(cmds)
+        for effect in effects:
+            self._connection._store_provisional_zone_variable(zone_id, *effect)
+        return values[-1]
+
+    async def discover_zones(self):
+        """
+        Yield (zone_id, zone_name) tuples as the zones are found, so callers
+        can start using a zone before the rest of the system is enumerated.
+        """
+        self._zones = []
+        self._discovery_started = time.monotonic()
+        self._discovery_timing = dict.fromkeys(self._discovery_timing)
+        for controller in range(1, MAX_CONTROLLERS + 1):
+            for zone in range(1, MAX_ZONES + 1):
+                zone_id = ZoneID(zone, controller)
+                try:
+                    name = await self.get_zone_variable(zone_id, "name", bulk=True)
+                except CommandException:
+                    break
+                if name:
+                    self._zones.append((zone_id, name))
+                    yield zone_id, name
+        self._record_discovery("zones")
+
+    async def _read(self, bulk, target, variable, cmd, cache, watched):
+        if not bulk:
+            return await self._connection._read_through(
+                target, variable, cmd, cache, watched
+            )
+        try:
+            # Only go to the pool when the controller has to be asked
+            return self._connection._lookup_cached(target, variable, cache, watched)
+        except UncachedVariable:
+            pass
+        return await self._run_bulk(
+            lambda connection: connection._read_through(
+                target, variable, cmd, cache, watched
+            )
+        )
+
+    async def _run_bulk(self, work):
+        """
+        Runs work(connection) on a connection lent by the pool, finishing it on
+        the primary connection if a secondary one is lost.
+        """
+        async with self._pool.connection() as connection:
+            try:
+                return await work(connection)
+            except (ConnectionError, RussoundError):
+                if connection is self._connection:
+                    raise
+                _LOGGER.debug("Secondary connection lost, retrying on the primary")
+        return await work(self._connection)
+
+    @property
+    def pool(self) -> ConnectionPool:
+        """Returns the pool of secondary connections."""
+        return self._pool
+
+    async def enumerate_zones(self):
+        """Return a list of (zone_id, zone_name) tuples"""
+        return [zone async for zone in self.discover_zones()]
+
+    async def enumerate_catalog(self):
+        """
+        Enumerate the sources and then the presets, sending a controller
+        updated event after each so the source lists can be refreshed.
+        """
+        await self.enumerate_sources()
+        self._record_discovery("sources")
+        self._dispatcher.send(SIGNAL_CONTROLLER_EVENT, EVENT_CONTROLLER_UPDATED)
+        await self.enumerate_presets()
+        self._record_discovery("presets")
+        self._dispatcher.send(SIGNAL_CONTROLLER_EVENT, EVENT_CONTROLLER_UPDATED)
+
+    def zone_usable(self) -> None:
+        """Records that a discovered zone can be used, to be called once it is
+        watched and its entity added. Only the first call is timed."""
+        if self._discovery_timing["first_zone"] is None:
+            self._record_discovery("first_zone")
+
+    def _record_discovery(self, stage: str) -> None:
+        if self._discovery_started is not None:
+            self._discovery_timing[stage] = time.monotonic() - self._discovery_started
+
+    @property
+    def discovery_timing(self) -> dict:
+        """Returns the seconds from the start of zone discovery until the first
+        zone, all zones, the sources and the presets were known."""
+        return dict(self._discovery_timing)
+
+    async def set_source_variable(self, source_id, variable, value):
+        """Change the value of a source variable."""
+        source_id = int(source_id)
+        if (
+            self._elide_commands
+            and source_id in self._connection._watched_sources
+            and not self._connection.is_stale_source_variable(source_id, variable)
+            and self.get_cached_source_variable(source_id, variable) == str(value)
+        ):
+            self._connection.metrics.elided += 1
+            return None
+        return await self._connection._send_cmd(
+            'SET S[%d].%s="%s"' % (source_id, variable, value)
+        )
+
+    async def get_source_variable(self, source_id, variable, *, bulk=False):
+        """Get the current value of a source variable. If the variable is not
+        in the cache, or has expired for an unwatched source, it will be
+        retrieved from the controller. With bulk set the request may be sent
+        on a secondary connection."""
+
+        source_id = int(source_id)
+        return await self._read(
+            bulk,
+            source_id,
+            variable,
+            "GET S[%d].%s" % (source_id, variable),
+            self._connection._source_state,
+            source_id in self._connection._watched_sources,
+        )
+
+    def get_cached_source_variable(self, source_id, variable, default=None):
+        """Get the cached value of a source variable. If the variable is not
+        cached return the default value."""
+
+        source_id = int(source_id)
+        try:
+            return self._retrieve_cached_source_variable(source_id, variable)
+        except UncachedVariable:
+            return default
+
+    async def watch_source(self, source_id):
+        """Add a souce to the watchlist."""
+        source_id = int(source_id)
+        r = await self._connection._send_cmd("WATCH S[%d] ON" % (source_id,))
+        self._connection._watched_sources.add(source_id)
+        return r
+
+    async def unwatch_source(self, source_id):
+        """Remove a souce from the watchlist."""
+        source_id = int(source_id)
+        self._connection._watched_sources.remove(source_id)
+        return await self._connection._send_cmd("WATCH S[%d] OFF" % (source_id,))
+
+    async def get_preset_variable(self, preset_id, variable, *, bulk=False):
+        """Retrieve the current value of a preset variable.  If the variable is
+        not found in the local cache then the value is requested from the
+        controller. With bulk set the request may be sent on a secondary
+        connection."""
+
+        return await self._read(
+            bulk,
+            preset_id,
+            variable,
+            "GET %s.%s" % (preset_id.device_str(), variable),
+            self._connection._preset_state,
+            False,
+        )
+
+    async def calc_preset_index(self, bank_id, preset_id):
+        """
+        Calculates the index of a preset.
+        """
+        return ((bank_id - 1) * 2) + preset_id
+
+    async def enumerate_sources(self):
+        """Return a list of (source_id, source_name, source_type) tuples"""
+        sources = []
+        for source_id in range(1, MAX_SOURCES + 1):
+            try:
+                source_name = await self.get_source_variable(
+                    source_id, "name", bulk=True
+                )
+                source_type = await self.get_source_variable(
+                    source_id, "type", bulk=True
+                )
+                if source_name and source_type:
+                    sources.append((source_id, source_name, source_type))
+            except CommandException:
+                break
+        self._sources = sources
+        return sources
+
+    async def enumerate_presets(self):
+        """Return a list of (source_id, bank_id, preset_id, index_id, preset_name) tuples"""
+        banks = []
+        for source_id in range(1, MAX_SOURCES + 1):
+            try:
+                source_name = await self.get_source_variable(
+                    source_id, "name", bulk=True
+                )
+                source_type = await self.get_source_variable(
+                    source_id, "type", bulk=True
+                )
+                if source_name and source_type:
+                    if source_type == SOURCE_TYPE_TUNER:
+                        for bank_id in range(1, MAX_BANKS + 1):
+                            for preset_id in range(1, MAX_PRESETS + 1):
+                                var_preset_id = PresetID(source_id, bank_id, preset_id)
+                                preset_name = await self.get_preset_variable(
+                                    var_preset_id, "name", bulk=True
+                                )
+                                preset_valid = await self.get_preset_variable(
+                                    var_preset_id, "valid", bulk=True
+                                )
+                                if str(preset_valid) == "TRUE":
+                                    index_id = await self.calc_preset_index(
+                                        bank_id, preset_id
+                                    )
+                                    banks.append(
+                                        (
+                                            source_id,
+                                            bank_id,
+                                            preset_id,
+                                            index_id,
+                                            preset_name,
+                                        )
+                                    )
+            except CommandException:
+                break
+        self._presets = banks
+        return banks
+
+    def _retrieve_cached_zone_variable(self, zone_id, name):
+        """
+        Retrieves the cache state of the named variable for a particular
+        zone. If the variable has not been cached then the UncachedVariable
+        exception is raised.
+        """
+        try:
+            s = self._connection._zone_state[zone_id][name.lower()]
+            _LOGGER.debug(
+                "Zone Cache retrieve %s.%s = %s", zone_id.device_str(), name, s
+            )
+            return s
+        except KeyError:
+            raise UncachedVariable
+
+    def _retrieve_cached_source_variable(self, source_id, name):
+        """
+        Retrieves the cache state of the named variable for a particular
+        source. If the variable has not been cached then the UncachedVariable
+        exception is raised.
+        """
+        try:
+            s = self._connection._source_state[source_id][name.lower()]
+            _LOGGER.debug("Source Cache retrieve S[%d].%s = %s", source_id, name, s)
+            return s
+        except KeyError:
+            raise UncachedVariable
+
+    def _retrieve_cached_preset_variable(self, preset_id, name):
+        """
+        Retrieves the cache state of the named variable for a particular
+        preset. If the variable has not been cached then the UncachedVariable
+        exception is raised.
+        """
+        try:
+            s = self._connection._preset_state[preset_id][name.lower()]
+            _LOGGER.debug(
+                "Preset Cache retrieve: %s.%s = %s", preset_id.device_str(), name, s
+            )
+            return s
+        except KeyError:
+            raise UncachedVariable
+
+    def add_zone_callback(self, callback):
+        """
+        Registers a callback to be called whenever a zone variable changes.
+        The callback will be passed three arguments: the zone_id, the variable
+        name and the variable value.
+        """
+        self._connection._zone_callbacks.append(callback)
+
+    def remove_zone_callback(self, callback):
+        """
+        Removes a previously registered zone callback.
+        """
+        self._connection._zone_callbacks.remove(callback)
+
+    def add_source_callback(self, callback):
+        """
+        Registers a callback to be called whenever a source variable changes.
+        The callback will be passed three arguments: the source_id, the
+        variable name and the variable value.
+        """
+        self._connection._source_callbacks.append(callback)
+
+    def remove_source_callback(self, source_id, callback):
+        """
+        Removes a previously registered source callback.
+        """
+        self._connection._source_callbacks.remove(callback)
+
+    def add_preset_callback(self, callback):
+        """
+        Registers a callback to be called whenever a preset variable changes.
+        The callback will be passed three arguments: the preset_id, the variable
+        name and the variable value.
+        """
+        self._connection._preset_callbacks.append(callback)
+
+    def remove_preset_callback(self, callback):
+        """
+        Removes a previously registered preset callback.
+        """
+        self._connection._preset_callbacks.remove(callback)
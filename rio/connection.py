@@ -0,0 +1,1262 @@
+"""Class handling network connection to Russound device."""
+
+import asyncio
+from collections import deque
+import itertools
+import random
+import re
+import logging
+import time
+from .error import RussoundError, MessageParseError, format_error
+from .const import (
+    DEFAULT_TIMEOUT,
+    DEFAULT_COMMAND_TIMEOUT,
+    DEFAULT_REPLY_TIMEOUT,
+    PROVISIONAL_TIMEOUT,
+    DEFAULT_CACHE_TTL,
+    CACHE_TTL,
+    NEGATIVE_CACHE_TTL,
+    DEFAULT_RECONNECT_DELAY,
+    STATE_DISCONNECTED,
+    STATE_CONNECTED,
+    STATE_RECONNECTING,
+    STATE_HISTORY_SIZE,
+    DEFAULT_RECONNECT_BASE_DELAY,
+    RECONNECT_FAST_DELAY,
+    DEFAULT_KEEPALIVE_INTERVAL,
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    COMMAND_PRIORITY_HIGH,
+    COMMAND_PRIORITY_NORMAL,
+    COMMAND_PRIORITY_LOW,
+    CAPTURE_INBOUND,
+    CAPTURE_OUTBOUND,
+    INBOUND_ALWAYS_APPLY,
+    INBOUND_MAX_DELAY,
+    EVENT_CONNECTION_CONNECTED,
+    EVENT_CONNECTION_RECONNECTING,
+    EVENT_CONNECTION_DISCONNECTED,
+    EVENT_CONNECTION_MESSAGE,
+    SIGNAL_CONNECTION_EVENT,
+)
+
+# from .rio import ZoneID, PresetID
+# r"^VERSION\=(?P<version>(\"\d\d\.\d\d\.\d\d\"))|"
+_re_response = re.compile(
+    r"(?:"
+    r"(?:S\[(?P<preset_source>\d+)\].B\[(?P<preset_bank>\d+)\].P\[(?P<preset>\d+)\])|"
+    r"(?:S\[(?P<source>\d+)\])|"
+    r"(?:C\[(?P<controller>\d+)\].Z\[(?P<zone>\d+)\]))"
+    r"\.(?P<variable>\S+)=\"(?P<value>.*)\""
+)
+# Replies to requests not tied to a zone or source, e.g. 'VERSION="01.02.03"'
+_re_value = re.compile(r"\S+=\"(?P<value>.*)\"")
+
+
+# _re_response = re.compile(
+#     r"(?:"
+#     r"(?:S\[(?P<preset_source>\d+)\].B\[(?P<preset_bank>\d+)\].P\[(?P<preset>\d+)\])|"
+#     r"VERSION\=(?P<version>(\"\d\d\.\d\d\.\d\d\"))|"
+#     r"(?:S\[(?P<source>\d+)\])|"
+#     r"(?:C\[(?P<controller>\d+)\].Z\[(?P<zone>\d+)\]))|"
+#     r"\.(?P<variable>\S+)=\"(?P<value>.*)\""
+# )
+
+# Maintain compat with various 3.x async changes
+if hasattr(asyncio, "ensure_future"):
+    ensure_future = asyncio.ensure_future
+else:
+    ensure_future = getattr(asyncio, "async")
+
+
+class CommandException(Exception):
+    """A command sent to the controller caused an error."""
+
+    pass
+
+
+class UncachedVariable(Exception):
+    """A variable was not found in the cache."""
+
+    pass
+
+
+from . import const
+from .error import (
+    RussoundError,
+    MessageParseError,
+    ConnectionLostError,
+    ReplyTimeoutError,
+    format_error,
+    parse_error_code,
+)
+
+from .dispatcher import Dispatcher
+from .metrics import ConnectionMetrics, command_type
+from .monitor import LoopMonitor
+from .pacer import AdaptivePacer
+
+_LOGGER = logging.getLogger(__name__)
+
+# Caches and callback lists a pooled connection shares with the primary one
+SHARED_STATE = (
+    "_zone_state",
+    "_source_state",
+    "_preset_state",
+    "_fetched",
+    "_negative_cache",
+    "_pending_gets",
+    "_provisional",
+    "_stale",
+    "_variable_names",
+    "_zone_callbacks",
+    "_source_callbacks",
+    "_preset_callbacks",
+)
+
+
+class ZoneID:
+    """Uniquely identifies a zone
+
+    Russound controllers can be linked together to expand the total zone count.
+    Zones are identified by their zone index (1-N) within the controller they
+    belong to and the controller index (1-N) within the entire system.
+    """
+
+    def __init__(self, zone, controller=1):
+        self.zone = int(zone)
+        self.controller = int(controller)
+
+    def __str__(self):
+        return "%d:%d" % (self.controller, self.zone)
+
+    def __eq__(self, other):
+        return (
+            hasattr(other, "zone")
+            and hasattr(other, "controller")
+            and other.zone == self.zone
+            and other.controller == self.controller
+        )
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def device_str(self):
+        """
+        Generate a string that can be used to reference this zone in a RIO
+        command
+        """
+        return "C[%d].Z[%d]" % (self.controller, self.zone)
+
+
+class PresetID:
+    """Uniquely identifies a preset
+    Russound presets can be found as part of a source's bank.
+    Presets are identified by their preset index [1-6]  within a bank [1-6] on the source they
+    belong to.
+    """
+
+    def __init__(self, source, bank, preset):
+        self.source = int(source)
+        self.bank = int(bank)
+        self.preset = int(preset)
+
+    def __str__(self):
+        return "%d:%d:%d" % (self.source, self.bank, self.preset)
+
+    def __eq__(self, other):
+        return (
+            hasattr(other, "source")
+            and hasattr(other, "bank")
+            and hasattr(other, "preset")
+            and other.source == self.source
+            and other.bank == self.bank
+            and other.preset == self.preset
+        )
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def device_str(self):
+        """
+        Generate a string that can be used to reference this preset in a RIO
+        command
+        """
+        return "S[%d].B[%d].P[%d]" % (self.source, self.bank, self.preset)
+
+
+# Events that drive the zone to an absolute state and can safely be sent twice
+IDEMPOTENT_EVENTS = {
+    "allon",
+    "alloff",
+    "restorepreset",
+    "selectsource",
+    "zoneon",
+    "zoneoff",
+}
+
+
+def command_is_idempotent(cmd: str) -> bool:
+    """Returns whether sending a command twice has the same effect as once.
+
+    GET, SET and WATCH set or read absolute values. Events are only idempotent
+    when they select an absolute state, either by name or as a KeyPress with
+    an explicit value (e.g. 'KeyPress Volume 20'). Relative key presses such
+    as Next/Previous, key releases and key codes are not.
+    """
+    verb, _, rest = cmd.partition(" ")
+    verb = verb.upper()
+    if verb in ("GET", "SET", "WATCH"):
+        return True
+    if verb != "EVENT":
+        return False
+    args = rest.partition("!")[2].split()
+    if not args:
+        return False
+    event = args[0].lower()
+    if event == "keypress":
+        return len(args) >= 3
+    return event in IDEMPOTENT_EVENTS
+
+
+class PendingCommand:
+    """A group of one or more commands waiting in the queue to be written by
+    the IO loop.
+
+    The commands of a group are written back to back, each one after the reply
+    to the previous one, and nothing else is sent in between. Groups are
+    ordered by priority first and submission order second, so a group put
+    back after a reconnect keeps its place. Every command of the group must be
+    answered within reply_timeout of being written.
+    """
+
+    __slots__ = (
+        "cmds",
+        "future",
+        "priority",
+        "seq",
+        "enqueued",
+        "deadline",
+        "reply_timeout",
+        "idempotent",
+    )
+
+    def __init__(
+        self,
+        cmds: list[str],
+        future: asyncio.Future,
+        priority: int,
+        seq: int,
+        timeout: float = DEFAULT_COMMAND_TIMEOUT,
+        reply_timeout: float = DEFAULT_REPLY_TIMEOUT,
+    ):
+        self.cmds = cmds
+        self.future = future
+        self.priority = priority
+        self.seq = seq
+        self.enqueued = time.monotonic()
+        self.deadline = self.enqueued + timeout
+        self.reply_timeout = reply_timeout
+        self.idempotent = all(command_is_idempotent(cmd) for cmd in cmds)
+
+    def __str__(self) -> str:
+        return "; ".join(self.cmds)
+
+    def __lt__(self, other: "PendingCommand") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class Connection:
+    """Class handling network connection to hardware device."""
+
+    def __init__(self, dispatcher: Dispatcher, host, port) -> None:
+        """Initializes connection."""
+        self._dispatcher = dispatcher
+        self._host = host
+        self._port = port
+        self._timeout: float = DEFAULT_TIMEOUT
+        self._state: str = STATE_DISCONNECTED
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._response_handler_task: asyncio.Task | None = None
+        self._command_timeout: float = DEFAULT_COMMAND_TIMEOUT
+        self._inflight: PendingCommand | None = None
+        self._reconnect_delay: float | None = None
+        self._reconnect_task: asyncio.Task | None = None
+        self._resync_task: asyncio.Task | None = None
+        self._auto_reconnect: bool = False
+        self._cmd_queue = asyncio.PriorityQueue()
+        self._cmd_seq = itertools.count()
+        self._source_state = {}
+        self._zone_state = {}
+        self._preset_state = {}
+        self._watched_zones = set()
+        self._watched_sources = set()
+        self._zone_callbacks = []
+        self._provisional = {}
+        self._fetched = {}
+        self._negative_cache = {}
+        self._pending_gets = {}
+        self._stale = set()
+        # Lowercase variable names mapped to the spelling the controller uses
+        self._variable_names = {}
+        self._inbound = {}
+        self._inbound_since: float = 0.0
+        self._monitor = LoopMonitor()
+        self._sampling = False
+        self._source_callbacks = []
+        self._preset_callbacks = []
+        self._first_run = True
+        self._metrics = ConnectionMetrics()
+        self._pacer = AdaptivePacer()
+        self._state_history = deque(maxlen=STATE_HISTORY_SIZE)
+        self._reconnect_count = 0
+        self._connection_errors = 0
+        self._keepalive_interval: float | None = DEFAULT_KEEPALIVE_INTERVAL
+        self._keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT
+        self._keepalive_task: asyncio.Task | None = None
+        self._capture = None
+        self._last_activity: float = time.monotonic()
+
+    async def connect(
+        self,
+        host: str,
+        port: int = None,
+        *,
+        timeout: float = None,
+        auto_reconnect: bool = False,
+        reconnect_delay: float = DEFAULT_RECONNECT_DELAY,
+        keepalive_interval: float | None = DEFAULT_KEEPALIVE_INTERVAL,
+        keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+    ) -> None:
+        """Connects to the hardware device.
+
+        Raises ConnectionError when the device can't be reached. Once
+        connected, a lost connection is re-established in the background when
+        auto_reconnect is set, backing off up to reconnect_delay between
+        attempts.
+
+        When keepalive_interval is set, a cheap request is sent whenever the
+        link has been idle for that long. A reply not arriving within
+        keepalive_timeout is treated as a dead connection.
+        """
+        if self._state == const.STATE_CONNECTED:
+            return
+
+        self._host = host
+        self._port = port
+        self._timeout = timeout if timeout else DEFAULT_TIMEOUT
+        self._auto_reconnect = auto_reconnect
+        self._reconnect_delay = reconnect_delay
+        self._keepalive_interval = keepalive_interval
+        self._keepalive_timeout = keepalive_timeout
+        await self._connect()
+        _LOGGER.debug("Connected to %s", self._host)
+        self._dispatcher.send(SIGNAL_CONNECTION_EVENT, EVENT_CONNECTION_CONNECTED)
+
+    async def _connect(self) -> None:
+        """Connect to server."""
+        try:
+            connection = asyncio.open_connection(self._host, self._port)
+            self._reader, self._writer = await asyncio.wait_for(
+                connection, self._timeout
+            )
+        except ConnectionError:
+            # Don't allow subclasses of ConnectionError to be cast as OSErrors below
+            raise
+        except (OSError, asyncio.TimeoutError) as err:
+            # Generalize connection errors
+            raise ConnectionError(format_error(err)) from err
+
+        self._last_activity = time.monotonic()
+        self._response_handler_task = asyncio.create_task(self._response_handler())
+        self._monitor.start()
+        if self._keepalive_interval:
+            self._keepalive_task = asyncio.create_task(self._keepalive())
+        self._set_state(STATE_CONNECTED)
+
+    def _reconnect_backoff(self, attempt: int) -> float:
+        """Returns the delay before a reconnect attempt.
+
+        The first attempt is made almost immediately to recover from short
+        glitches, after that the delay doubles up to reconnect_delay. Jitter
+        keeps several clients from hammering a rebooting controller in step.
+        """
+        if attempt == 0:
+            return RECONNECT_FAST_DELAY
+        delay = min(
+            DEFAULT_RECONNECT_BASE_DELAY * 2 ** (attempt - 1), self._reconnect_delay
+        )
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _reconnect(self):
+        """Reconnect to server."""
+        attempt = 0
+        try:
+            while self._state != STATE_CONNECTED:
+                await asyncio.sleep(self._reconnect_backoff(attempt))
+                attempt += 1
+                try:
+                    await self._connect()
+                except ConnectionError as err:
+                    _LOGGER.debug(
+                        "Failed reconnect attempt %d to %s with '%s'",
+                        attempt,
+                        self._host,
+                        err,
+                    )
+                    await self._disconnect()
+                else:
+                    _LOGGER.debug(
+                        "Reconnected to %s after %d attempts", self._host, attempt
+                    )
+                    # Cancelled when the connection is lost again meanwhile
+                    self._resync_task = asyncio.create_task(self._resync())
+                    try:
+                        await asyncio.wait([self._resync_task])
+                    finally:
+                        self._resync_task.cancel()
+                        self._resync_task = None
+                    if self._state != STATE_CONNECTED:
+                        continue
+                    self._reconnect_task = None
+                    self._reconnect_count += 1
+                    self._dispatcher.send(
+                        SIGNAL_CONNECTION_EVENT, EVENT_CONNECTION_CONNECTED
+                    )
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.debug("Unhandled exception %s('%s')", type(err).__name__, err)
+            raise
+
+    async def _resync(self):
+        """Brings the cache back in line with the controller after a
+        reconnect.
+
+        All watches are re-established as one batch, the controller then pushes
+        the current value of every watched variable and only the ones that
+        changed reach the callbacks. Cached state of unwatched zones and
+        sources was not kept up to date while disconnected, so it is dropped
+        and fetched again on the next read.
+        """
+        for zone_id in list(self._zone_state):
+            if zone_id not in self._watched_zones:
+                del self._zone_state[zone_id]
+        for source_id in list(self._source_state):
+            if source_id not in self._watched_sources:
+                del self._source_state[source_id]
+        # Updated in place, pooled connections share the set
+        self._stale.difference_update(
+            [
+                (target, name)
+                for target, name in self._stale
+                if target not in self._zone_state and target not in self._source_state
+            ]
+        )
+        # The controller may have been reconfigured while it was away
+        self._negative_cache.clear()
+
+        cmds = [
+            "WATCH %s ON" % (zone_id.device_str(),) for zone_id in self._watched_zones
+        ]
+        cmds += [
+            "WATCH S[%d] ON" % (source_id,) for source_id in self._watched_sources
+        ]
+        results = await asyncio.gather(
+            *(self._send_cmd(cmd, COMMAND_PRIORITY_HIGH) for cmd in cmds),
+            return_exceptions=True,
+        )
+        for cmd, result in zip(cmds, results):
+            if isinstance(result, Exception):
+                _LOGGER.warning("Failed to restore '%s': %s", cmd, result)
+
+    async def disconnect(self):
+        """Disconnect from server."""
+        if self._state == STATE_DISCONNECTED:
+            return
+        # Cancel pending reconnect task
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+            try:
+                await self._reconnect_task
+            except:  # pylint: disable=bare-except
+                # Ensure completes
+                pass
+            self._reconnect_task = None
+
+        await self._disconnect()
+        self._set_state(STATE_DISCONNECTED)
+        self._abort_pending(replay=False)
+        self.stop_capture()
+
+        _LOGGER.debug("Disconnected from %s", self._host)
+        self._dispatcher.send(SIGNAL_CONNECTION_EVENT, EVENT_CONNECTION_DISCONNECTED)
+
+    async def _disconnect(self):
+        """Disconnect from server."""
+        self._monitor.stop()
+        if self._keepalive_task:
+            if self._keepalive_task is not asyncio.current_task():
+                self._keepalive_task.cancel()
+            self._keepalive_task = None
+
+        if self._response_handler_task:
+            self._response_handler_task.cancel()
+            try:
+                await self._response_handler_task
+            except:  # pylint: disable=bare-except
+                # Ensure completes
+                pass
+            self._response_handler_task = None
+
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+        self._reader = None
+        # self._pending_requests.clear()
+
+    def _set_state(self, state: str) -> None:
+        """Updates the connection state and records the transition."""
+        if state != self._state:
+            self._state_history.append((time.time(), state))
+        self._state = state
+
+    @property
+    def state_history(self) -> list[tuple[float, str]]:
+        """Returns the recent (timestamp, state) transitions."""
+        return list(self._state_history)
+
+    @property
+    def reconnect_count(self) -> int:
+        """Returns how many times the connection was re-established."""
+        return self._reconnect_count
+
+    @property
+    def connection_errors(self) -> int:
+        """Returns how many times the connection was lost."""
+        return self._connection_errors
+
+    @property
+    def pacer(self) -> AdaptivePacer:
+        """Returns the pacer limiting the rate commands are sent at."""
+        return self._pacer
+
+    @property
+    def metrics(self) -> ConnectionMetrics:
+        """Returns the command and traffic metrics of this connection."""
+        return self._metrics
+
+    @property
+    def monitor(self) -> LoopMonitor:
+        """Timing of the lines received and of the event loop."""
+        return self._monitor
+
+    def is_connected(self) -> bool:
+        """Checks how long ago reading while loop, was active."""
+        if self._state == STATE_CONNECTED:
+            return True
+        else:
+            return False
+
+    async def _handle_connection_error(self, err: Exception):
+        """Handle connection failures and schedule reconnect."""
+        if self._state != STATE_CONNECTED:
+            # Already being handled, or the connection was closed on purpose
+            return
+        self._set_state(STATE_RECONNECTING)
+        self._connection_errors += 1
+        await self._disconnect()
+        _LOGGER.debug(
+            "Disconnected from %s %s('%s')", self._host, type(err).__name__, err
+        )
+        self._abort_pending(replay=self._auto_reconnect)
+        if not self._auto_reconnect:
+            self._set_state(STATE_DISCONNECTED)
+            self._dispatcher.send(
+                SIGNAL_CONNECTION_EVENT, EVENT_CONNECTION_DISCONNECTED
+            )
+            return
+        self._dispatcher.send(SIGNAL_CONNECTION_EVENT, EVENT_CONNECTION_RECONNECTING)
+        if self._reconnect_task is not None and not self._reconnect_task.done():
+            # Lost while the watches were being restored, the running reconnect
+            # loop stops the resync and tries again
+            if self._resync_task is not None:
+                self._resync_task.cancel()
+            return
+        self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    def _store_cached_zone_variable(self, zone_id, name, value):
+        """
+        Stores the current known value of a zone variable into the cache.
+        Calls any zone callbacks when the value changed.
+        """
+        name = name.lower()
+        if self._provisional:
+            provisional = self._provisional.pop((zone_id, name), None)
+            if provisional:
+                # The controller confirmed or corrected the expected value
+                provisional[1].cancel()
+        if self._stale:
+            self._stale.discard((zone_id, name))
+        self._write_zone_variable(zone_id, name, value)
+
+    def _write_zone_variable(self, zone_id, name, value):
+        zone_state = self._zone_state.setdefault(zone_id, {})
+        if zone_state.get(name) == value:
+            return
+        if value is None:
+            del zone_state[name]
+        else:
+            zone_state[name] = value
+        _LOGGER.debug("Zone Cache store %s.%s = %s", zone_id.device_str(), name, value)
+        if self._sampling:
+            self._monitor.run_callbacks(self._zone_callbacks, zone_id, name, value)
+            return
+        for callback in self._zone_callbacks:
+            callback(zone_id, name, value)
+
+    def _store_provisional_zone_variable(self, zone_id, name, value):
+        """
+        Stores the value a successful command is expected to have set, ahead of
+        the controller's notification, and calls any zone callbacks.
+        The value stays provisional until the controller reports the variable.
+        If that doesn't happen within PROVISIONAL_TIMEOUT the variable is read
+        back, and the previous value is restored if that fails.
+        """
+        name = name.lower()
+        key = (zone_id, name)
+        previous = self._zone_state.get(zone_id, {}).get(name)
+        provisional = self._provisional.pop(key, None)
+        if provisional:
+            provisional[1].cancel()
+            previous = provisional[0]
+        elif previous == value:
+            return
+        handle = asyncio.get_running_loop().call_later(
+            PROVISIONAL_TIMEOUT, self._expire_provisional, zone_id, name
+        )
+        self._provisional[key] = (previous, handle)
+        self._write_zone_variable(zone_id, name, value)
+
+    def is_provisional_zone_variable(self, zone_id, name) -> bool:
+        """Returns whether a cached zone variable still awaits confirmation
+        from the controller."""
+        return (zone_id, name.lower()) in self._provisional
+
+    def is_stale_zone_variable(self, zone_id, name) -> bool:
+        """Returns whether a cached zone variable was restored from a snapshot
+        and not yet confirmed by the controller."""
+        return (zone_id, name.lower()) in self._stale
+
+    def is_stale_source_variable(self, source_id, name) -> bool:
+        """Returns whether a cached source variable was restored from a
+        snapshot and not yet confirmed by the controller."""
+        return (int(source_id), name.lower()) in self._stale
+
+    def variable_name(self, name: str) -> str:
+        """Returns the spelling the controller uses in its notifications for a
+        cached, lowercase, variable name."""
+        return self._variable_names.get(name, name)
+
+    @property
+    def stale_count(self) -> int:
+        """Number of restored variables still awaiting confirmation."""
+        return len(self._stale)
+
+    def share_state(self, primary: "Connection") -> None:
+        """
+        Makes this connection read and write the caches of primary and call its
+        callbacks, so replies received here are seen by the users of primary.
+        """
+        for name in SHARED_STATE:
+            setattr(self, name, getattr(primary, name))
+
+    def snapshot(self) -> dict:
+        """
+        Returns the cached zone and source state in a compact, JSON friendly
+        form that restore() can load again. Values still awaiting confirmation
+        of a command are saved as they were before the command.
+        """
+        zones = {
+            str(zone_id): dict(state) for zone_id, state in self._zone_state.items()
+        }
+        for (zone_id, name), (previous, _) in self._provisional.items():
+            state = zones.get(str(zone_id))
+            if state is None:
+                continue
+            if previous is None:
+                state.pop(name, None)
+            else:
+                state[name] = previous
+        return {
+            "zones": {key: state for key, state in zones.items() if state},
+            "sources": {
+                str(source_id): dict(state)
+                for source_id, state in self._source_state.items()
+                if state
+            },
+        }
+
+    def restore(self, snapshot: dict) -> int:
+        """
+        Loads a snapshot taken by snapshot() into the cache, without calling
+        any callbacks, so the last known state is available before the
+        controller is reached. Restored values are marked stale until the
+        controller reports them. Only a change reported by the controller
+        reaches the callbacks. Values already cached are kept.
+        Returns the number of values restored.
+        """
+        restored = 0
+        for key, values in snapshot.get("zones", {}).items():
+            controller, zone = key.split(":")
+            zone_id = ZoneID(zone, controller)
+            state = self._zone_state.setdefault(zone_id, {})
+            for name, value in values.items():
+                if name not in state:
+                    state[name] = value
+                    self._stale.add((zone_id, name))
+                    restored += 1
+        for key, values in snapshot.get("sources", {}).items():
+            source_id = int(key)
+            state = self._source_state.setdefault(source_id, {})
+            for name, value in values.items():
+                if name not in state:
+                    state[name] = value
+                    self._stale.add((source_id, name))
+                    restored += 1
+        return restored
+
+    def _expire_provisional(self, zone_id, name):
+        asyncio.create_task(self._reconcile_zone_variable(zone_id, name))
+
+    async def _reconcile_zone_variable(self, zone_id, name):
+        """Reads back a provisional zone variable, rolling it back on failure."""
+        try:
+            await self._send_cmd(
+                "GET %s.%s" % (zone_id.device_str(), name), COMMAND_PRIORITY_LOW
+            )
+        except (CommandException, RussoundError, ConnectionError, asyncio.TimeoutError):
+            pass
+        provisional = self._provisional.pop((zone_id, name), None)
+        if provisional:
+            _LOGGER.debug("Rolled back unconfirmed %s.%s", zone_id.device_str(), name)
+            self._write_zone_variable(zone_id, name, provisional[0])
+
+    def _store_cached_source_variable(self, source_id, name, value):
+        """
+        Stores the current known value of a source variable into the cache.
+        Calls any source callbacks when the value changed.
+        """
+        source_state = self._source_state.setdefault(source_id, {})
+        name = name.lower()
+        if self._stale:
+            self._stale.discard((source_id, name))
+        if source_state.get(name) == value:
+            return
+        source_state[name] = value
+        _LOGGER.debug("Source Cache store S[%d].%s = %s", source_id, name, value)
+        if self._sampling:
+            self._monitor.run_callbacks(
+                self._source_callbacks, source_id, name, value
+            )
+            return
+        for callback in self._source_callbacks:
+            callback(source_id, name, value)
+
+    def _store_cached_preset_variable(self, preset_id, name, value):
+        """
+        Stores the current known value of a zone variable into the cache.
+        Calls any zone callbacks.
+        """
+        preset_state = self._preset_state.setdefault(preset_id, {})
+        name = name.lower()
+        if preset_state.get(name) == value:
+            return
+        preset_state[name] = value
+        _LOGGER.debug(
+            "Preset Cache store %s.%s = %s", preset_id.device_str(), name, value
+        )
+        for callback in self._preset_callbacks:
+            callback(preset_id, name, value)
+
+    def _defer_inbound(self, store, target, name, value) -> None:
+        """
+        Holds a notification until the lines already received are read,
+        replacing any pending value of the same variable.
+        """
+        name = name.lower()
+        key = (target, name)
+        if key in self._inbound:
+            self._metrics.record_superseded(name)
+        elif not self._inbound:
+            self._inbound_since = time.monotonic()
+        self._inbound[key] = (store, value)
+        self._metrics.coalesced += 1
+
+    def _discard_inbound(self, target, name) -> None:
+        """Drops the pending notification of a variable a reply just set, which
+        is older than the reply."""
+        if self._inbound:
+            self._inbound.pop((target, name.lower()), None)
+
+    def _flush_inbound(self) -> None:
+        """Applies the pending notifications to the cache and callbacks."""
+        pending = self._inbound
+        if not pending:
+            return
+        self._inbound = {}
+        self._monitor.record("pending", time.monotonic() - self._inbound_since)
+        self._sampling = self._monitor.sample()
+        try:
+            for (target, name), (store, value) in pending.items():
+                store(target, name, value)
+        finally:
+            self._sampling = False
+
+    async def _settle_inbound(self, net_future) -> None:
+        """
+        Applies the pending notifications unless more lines were received.
+        Those mean processing lags behind, so they are read first and
+        supersede older values of the same variables, for at most
+        INBOUND_MAX_DELAY.
+        """
+        await asyncio.sleep(0)
+        waited = time.monotonic() - self._inbound_since
+        if not net_future.done() or waited > INBOUND_MAX_DELAY:
+            self._flush_inbound()
+
+    def _receive(self, response):
+        """Processes a line read by the IO loop, timing a sample of them."""
+        if self._capture:
+            self._capture.write(CAPTURE_INBOUND, response)
+        if not self._monitor.sample():
+            return self._process_response(response, coalesce=True)
+        started = time.perf_counter()
+        self._sampling = True
+        try:
+            return self._process_response(response, coalesce=True)
+        finally:
+            self._sampling = False
+            self._monitor.record("process", time.perf_counter() - started)
+
+    def _process_response(self, res, coalesce=False):
+        try:
+            s = str(res, "utf-8").strip()
+        except UnicodeDecodeError:
+            self._metrics.record_parse_failure()
+            return None, None
+        ty, payload = s[0], s[2:]
+        if ty == "E":
+            _LOGGER.debug("Device responded with error: %s", payload)
+            self._metrics.record_inbound("other")
+            raise CommandException(payload)
+
+        m = _re_response.match(payload)
+        if not m:
+            self._metrics.record_inbound("other")
+            if ty == "N":
+                self._metrics.record_parse_failure()
+            m = _re_value.match(payload)
+            return ty, m["value"] if m else None
+        _LOGGER.debug(m)
+        p = m.groupdict()
+        if ty == "N":
+            variable = p["variable"]
+            if variable.lower() not in self._variable_names:
+                self._variable_names[variable.lower()] = variable
+        # Notifications are coalesced by the IO loop, replies are applied at once
+        defer = (
+            coalesce and ty == "N" and p["variable"].lower() not in INBOUND_ALWAYS_APPLY
+        )
+        if p["source"]:
+            self._metrics.record_inbound("source")
+            source_id = int(p["source"])
+            if defer:
+                store = self._store_cached_source_variable
+                self._defer_inbound(store, source_id, p["variable"], p["value"])
+            else:
+                self._discard_inbound(source_id, p["variable"])
+                self._store_cached_source_variable(
+                    source_id, p["variable"], p["value"]
+                )
+        elif p["zone"]:
+            self._metrics.record_inbound("zone")
+            zone_id = ZoneID(controller=p["controller"], zone=p["zone"])
+            if defer:
+                store = self._store_cached_zone_variable
+                self._defer_inbound(store, zone_id, p["variable"], p["value"])
+            else:
+                self._discard_inbound(zone_id, p["variable"])
+                self._store_cached_zone_variable(zone_id, p["variable"], p["value"])
+        elif p["preset_source"]:
+            self._metrics.record_inbound("preset")
+            preset_id = PresetID(p["preset_source"], p["preset_bank"], p["preset"])
+            self._store_cached_preset_variable(preset_id, p["variable"], p["value"])
+        return ty, p["value"]
+
+    def _abort_pending(self, replay: bool) -> None:
+        """Settles the commands caught by a lost connection.
+
+        With replay set, idempotent commands still within their deadline are
+        put back in the queue and sent once the connection is restored. All
+        other commands fail with ConnectionLostError.
+        """
+        commands = []
+        if self._inflight:
+            commands.append(self._inflight)
+            self._inflight = None
+        while not self._cmd_queue.empty():
+            commands.append(self._cmd_queue.get_nowait())
+
+        now = time.monotonic()
+        for command in commands:
+            if command.future.done():
+                continue
+            if replay and command.idempotent and command.deadline > now:
+                self._cmd_queue.put_nowait(command)
+                self._metrics.replayed += 1
+            else:
+                command.future.set_exception(
+                    ConnectionLostError(
+                        "Connection to %s lost, '%s' may not have been applied"
+                        % (self._host, command)
+                    )
+                )
+                self._metrics.aborted += 1
+
+    async def _send_cmd(
+        self, cmd, priority=COMMAND_PRIORITY_NORMAL, reply_timeout=DEFAULT_REPLY_TIMEOUT
+    ):
+        """Queues a command and waits for the controller's reply.
+
+        Idempotent commands wait out a reconnect and are sent once the
+        connection is back, as long as that happens before the command
+        timeout. Other commands fail immediately while reconnecting.
+        """
+        values = await self._send_cmds([cmd], priority, reply_timeout)
+        return values[0]
+
+    async def _send_cmds(
+        self,
+        cmds,
+        priority=COMMAND_PRIORITY_NORMAL,
+        reply_timeout=DEFAULT_REPLY_TIMEOUT,
+    ):
+        """Queues an ordered group of commands as one unit and waits for all
+        of them to complete.
+
+        No other command is sent while the group is being processed. The first
+        command that fails stops the group and its error is raised, otherwise
+        the values of all replies are returned in order. A group is only
+        replayed after a reconnect when every command in it is idempotent.
+        A command not answered within reply_timeout of being written raises
+        ReplyTimeoutError and drops the connection.
+        """
+        future = asyncio.Future()
+        command = PendingCommand(
+            list(cmds),
+            future,
+            priority,
+            next(self._cmd_seq),
+            self._command_timeout,
+            reply_timeout,
+        )
+        if self._state == STATE_DISCONNECTED or (
+            self._state == STATE_RECONNECTING and not command.idempotent
+        ):
+            self._metrics.aborted += 1
+            raise ConnectionLostError(
+                "Not connected to %s, '%s' was not sent" % (self._host, command)
+            )
+        await self._cmd_queue.put(command)
+        self._metrics.record_queue_depth(self._cmd_queue.qsize())
+        return await asyncio.wait_for(future, self._command_timeout)
+
+    def _lookup_cached(self, target, name, cache, watched):
+        """
+        Returns the cached value of a variable when it is still valid, raises
+        a remembered error reply as CommandException, and raises
+        UncachedVariable when the controller has to be asked.
+        """
+        name = name.lower()
+        key = (target, name)
+        now = time.monotonic()
+        negative = self._negative_cache.get(key)
+        if negative:
+            if negative[0] > now:
+                self._metrics.negative_hits += 1
+                raise CommandException(negative[1])
+            del self._negative_cache[key]
+
+        try:
+            value = cache[target][name]
+        except KeyError:
+            raise UncachedVariable from None
+        ttl = CACHE_TTL.get(name, DEFAULT_CACHE_TTL)
+        fresh = watched and key not in self._stale
+        if fresh or now - self._fetched.get(key, 0.0) < ttl:
+            self._metrics.cache_hits += 1
+            return value
+        raise UncachedVariable
+
+    async def _read_through(self, target, name, cmd, cache, watched):
+        """
+        Returns a variable from the cache, fetching it with the GET command
+        cmd when needed.
+        Values of watched targets are kept fresh by the controller and never
+        expire. Values read from unwatched targets are reused for the TTL of
+        the variable. Error replies are remembered for NEGATIVE_CACHE_TTL and
+        raised again without asking the controller. Concurrent reads of the
+        same variable share a single request.
+        """
+        name = name.lower()
+        key = (target, name)
+        try:
+            return self._lookup_cached(target, name, cache, watched)
+        except UncachedVariable:
+            pass
+
+        self._metrics.cache_misses += 1
+        pending = self._pending_gets.get(cmd)
+        if pending is None:
+            pending = asyncio.ensure_future(self._fetch(key, cmd))
+            self._pending_gets[cmd] = pending
+            pending.add_done_callback(lambda future: self._fetch_done(cmd, future))
+        else:
+            self._metrics.shared_requests += 1
+        return await asyncio.shield(pending)
+
+    async def _fetch(self, key, cmd):
+        try:
+            value = await self._send_cmd(cmd)
+        except CommandException as err:
+            expiry = time.monotonic() + NEGATIVE_CACHE_TTL
+            self._negative_cache[key] = (expiry, str(err))
+            raise
+        self._fetched[key] = time.monotonic()
+        return value
+
+    def _fetch_done(self, cmd, future):
+        self._pending_gets.pop(cmd, None)
+        if not future.cancelled():
+            # Mark the error as retrieved when every reader gave up waiting
+            future.exception()
+
+    def _release_queue_future(self, queue_future: asyncio.Future) -> None:
+        """Returns a command taken from the queue by a stopping IO loop."""
+        if queue_future.done() and not queue_future.cancelled():
+            self._cmd_queue.put_nowait(queue_future.result())
+        else:
+            queue_future.cancel()
+
+    def start_capture(self, path: str) -> None:
+        """Starts appending every line sent and received to a capture file.
+
+        Recording costs a single check per line while no capture is running.
+        """
+        from .capture import CaptureWriter
+
+        self.stop_capture()
+        self._capture = CaptureWriter(path)
+        _LOGGER.debug("Capturing traffic of %s to %s", self._host, path)
+
+    def stop_capture(self) -> None:
+        """Stops a running capture and closes its file."""
+        if self._capture:
+            self._capture.close()
+            _LOGGER.debug(
+                "Captured %d lines to %s", self._capture.records, self._capture.path
+            )
+            self._capture = None
+
+    @property
+    def rtt(self) -> float | None:
+        """Returns the moving average round-trip time in seconds."""
+        return self._metrics.rtt_average
+
+    async def _keepalive(self) -> None:
+        """Probes an idle link and reports a missed reply as a dead
+        connection."""
+        while True:
+            idle = time.monotonic() - self._last_activity
+            if idle < self._keepalive_interval:
+                await asyncio.sleep(self._keepalive_interval - idle)
+                continue
+
+            self._metrics.keepalive_sent += 1
+            try:
+                # Queued behind other commands, the IO loop times the reply from
+                # the moment the probe is written and drops a dead link
+                await self._send_cmd(
+                    "GET VERSION",
+                    COMMAND_PRIORITY_LOW,
+                    reply_timeout=self._keepalive_timeout,
+                )
+            except CommandException:
+                # Any reply proves the link is alive
+                pass
+            except ReplyTimeoutError:
+                self._metrics.keepalive_missed += 1
+                return
+            except asyncio.TimeoutError:
+                # Still queued after the command timeout, the replies to the
+                # commands ahead of it keep the link busy rather than dead
+                _LOGGER.debug("Keepalive probe not sent within the command timeout")
+            except ConnectionError:
+                return
+
+    def _reply_timed_out(self, command: PendingCommand, cmd: str) -> None:
+        """Fails the command in flight and raises ReplyTimeoutError, ending
+        the IO loop so the dead connection is dropped."""
+        err = ReplyTimeoutError(
+            "No reply to '%s' from %s within %.1fs"
+            % (cmd, self._host, command.reply_timeout)
+        )
+        _LOGGER.warning("%s", err)
+        self._inflight = None
+        if not command.future.done():
+            command.future.set_exception(err)
+        raise err
+
+    async def _response_handler(self) -> None:
+        # self._ioloop_future = ensure_future(self._ioloop())
+        queue_future = ensure_future(self._cmd_queue.get())
+        net_future = ensure_future(self._reader.readline())
+        try:
+            _LOGGER.debug("Starting IO loop")
+            while True:
+                #######################################################
+                # _LOGGER.info("While loop: %s", self._cmd_queue.get())
+                #######################################################
+                if self._inbound:
+                    await self._settle_inbound(net_future)
+
+                done, pending = await asyncio.wait(
+                    [queue_future, net_future], return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if net_future in done:
+                    response = net_future.result()
+                    self._last_activity = time.monotonic()
+                    try:
+                        self._receive(response)
+                    except CommandException:
+                        pass
+                    net_future = ensure_future(self._reader.readline())
+
+                if queue_future in done:
+                    command = queue_future.result()
+                    queue_future = ensure_future(self._cmd_queue.get())
+                    self._metrics.record_queue_depth(self._cmd_queue.qsize())
+                    if command.future.done():
+                        # The caller stopped waiting before the command was sent
+                        continue
+
+                    self._inflight = command
+                    values = []
+                    error = None
+                    for cmd in command.cmds:
+                        # Lines keep being read while the pacer holds it back
+                        ready = time.monotonic() + self._pacer.reserve()
+                        while ready > time.monotonic():
+                            if self._inbound:
+                                await self._settle_inbound(net_future)
+                            await asyncio.wait(
+                                [net_future], timeout=ready - time.monotonic()
+                            )
+                            if net_future.done():
+                                response = net_future.result()
+                                net_future = ensure_future(self._reader.readline())
+                                self._last_activity = time.monotonic()
+                                try:
+                                    self._receive(response)
+                                except CommandException:
+                                    pass
+                        kind = command_type(cmd)
+                        data = bytearray(cmd + "\r", "utf-8")
+                        self._writer.write(data)
+                        if self._capture:
+                            self._capture.write(CAPTURE_OUTBOUND, data)
+                        await self._writer.drain()
+                        written = time.monotonic()
+                        self._last_activity = written
+
+                        while True:
+                            if self._inbound:
+                                await self._settle_inbound(net_future)
+                            if not net_future.done():
+                                # Notifications don't count, only the reply
+                                await asyncio.wait(
+                                    [net_future],
+                                    timeout=written
+                                    + command.reply_timeout
+                                    - time.monotonic(),
+                                )
+                                if not net_future.done():
+                                    self._reply_timed_out(command, cmd)
+                            response = net_future.result()
+                            net_future = ensure_future(self._reader.readline())
+                            self._last_activity = time.monotonic()
+                            try:
+                                ty, value = self._receive(response)
+                                if ty == "S":
+                                    self._metrics.record_command(
+                                        kind,
+                                        command.enqueued,
+                                        written,
+                                        self._last_activity,
+                                    )
+                                    self._pacer.on_response(
+                                        self._last_activity - written
+                                    )
+                                    values.append(value)
+                                    break
+                            except CommandException as e:
+                                self._metrics.record_command(
+                                    kind,
+                                    command.enqueued,
+                                    written,
+                                    self._last_activity,
+                                    error=True,
+                                )
+                                self._pacer.on_error(parse_error_code(str(e)))
+                                error = e
+                                break
+                        if error:
+                            break
+
+                    # The caller must see the state reported ahead of the reply
+                    if self._inbound:
+                        self._flush_inbound()
+                    self._inflight = None
+                    if not command.future.done():
+                        if error:
+                            command.future.set_exception(error)
+                        else:
+                            command.future.set_result(values)
+            _LOGGER.debug("IO loop exited")
+        except asyncio.CancelledError as err:
+            # Only _disconnect cancels the IO loop, it owns any reconnect
+            _LOGGER.debug("IO loop cancelled")
+            self._flush_inbound()
+            self._writer.close()
+            self._release_queue_future(queue_future)
+            net_future.cancel()
+            return
+        except IndexError as err:
+            _LOGGER.debug("Index error")
+            self._flush_inbound()
+            self._writer.close()
+            self._release_queue_future(queue_future)
+            net_future.cancel()
+            # self.close()
+            asyncio.create_task(self._handle_connection_error(err))
+            return
+        except Exception as err:
+            _LOGGER.debug(err)
+            self._flush_inbound()
+            self._writer.close()
+            self._release_queue_future(queue_future)
+            net_future.cancel()
+            # self.close()
+            asyncio.create_task(self._handle_connection_error(err))
+            return
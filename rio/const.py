@@ -0,0 +1,160 @@
+"""Constants of the Russound RIO protocol client."""
+
+# Defaults
+DEFAULT_PORT = 9621
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_COMMAND_TIMEOUT = 30.0
+# A reply not received this many seconds after its command was written means
+# the connection is dead
+DEFAULT_REPLY_TIMEOUT = 10.0
+PROVISIONAL_TIMEOUT = 3.0
+
+# How long values read from unwatched zones and sources stay valid, by variable
+DEFAULT_CACHE_TTL = 10.0
+CACHE_TTL = {
+    "name": 3600.0,
+    "type": 3600.0,
+    "valid": 3600.0,
+}
+# How long an error reply to a GET is remembered
+NEGATIVE_CACHE_TTL = 300.0
+DEFAULT_RECONNECT_DELAY = 10.0
+DEFAULT_RECONNECT_BASE_DELAY = 0.5
+RECONNECT_FAST_DELAY = 0.1
+DEFAULT_KEEPALIVE_INTERVAL = 30.0
+DEFAULT_KEEPALIVE_TIMEOUT = 5.0
+DEFAULT_SOURCE_UNWATCH_DELAY = 60.0
+
+# Command pacing, in commands per second
+DEFAULT_PACER_RATE = 50.0
+PACER_MIN_RATE = 2.0
+PACER_MAX_RATE = 500.0
+PACER_BURST = 10.0
+
+# Command queue priorities, lower values are sent first
+COMMAND_PRIORITY_HIGH = 0
+COMMAND_PRIORITY_NORMAL = 1
+COMMAND_PRIORITY_LOW = 2
+
+# Notifications received while earlier ones are still pending are coalesced,
+# keeping only the newest value of every variable. Pending values are applied
+# at the latest after INBOUND_MAX_DELAY seconds. Power and source changes are
+# never coalesced.
+INBOUND_MAX_DELAY = 0.1
+INBOUND_ALWAYS_APPLY = frozenset(("status", "currentsource"))
+
+# Loop lag and stall monitor: one of every MONITOR_SAMPLE_EVERY received lines
+# is timed, samples above the threshold of their stage (in seconds) are logged
+# at most once every MONITOR_WARN_INTERVAL seconds
+MONITOR_SAMPLE_EVERY = 16
+MONITOR_PROBE_INTERVAL = 1.0
+MONITOR_WARN_INTERVAL = 300.0
+MONITOR_THRESHOLDS = {
+    "loop_lag": 0.2,
+    "pending": 0.5,
+    "process": 0.05,
+    "callback": 0.02,
+}
+
+# Direction of the lines recorded in a traffic capture
+CAPTURE_INBOUND = 0
+CAPTURE_OUTBOUND = 1
+
+# Type of the internal tuners, the only sources with presets
+SOURCE_TYPE_TUNER = "RNET AM/FM Tuner (Internal)"
+
+# Secondary connections for bulk reads, closed after being idle this long
+DEFAULT_BULK_CONNECTIONS = 0
+BULK_IDLE_TIMEOUT = 30.0
+# Bulk work stays on the primary connection this long after a secondary one
+# failed to open
+BULK_RETRY_DELAY = 60.0
+
+# Audio settings of a zone, pushed by the controller while the zone is watched
+ZONE_SETTINGS = ("bass", "treble", "balance", "loudness", "turnOnVolume")
+
+# Largest system the protocol can address
+MAX_CONTROLLERS = 7
+MAX_ZONES = 16
+MAX_SOURCES = 16
+MAX_BANKS = 6
+MAX_PRESETS = 6
+
+# Budgets of the scale test ('python -m rio scale'): seconds from connecting
+# until the catalog is known, seconds until the entities are up to date again
+# after the controller dropped the connection, CPU seconds per notification
+# while metadata changes constantly, and peak resident memory in bytes
+SCALE_BUDGETS = {
+    "setup": 30.0,
+    "resync": 5.0,
+    "cpu_per_notification": 0.001,
+    "peak_rss": 128 * 1024 * 1024,
+}
+
+# Connection
+STATE_CONNECTED = "connected"
+STATE_DISCONNECTED = "disconnected"
+STATE_RECONNECTING = "reconnecting"
+STATE_CONNECTION = "connection"
+STATE_HISTORY_SIZE = 20
+
+# Signals
+SIGNAL_CONTROLLER_EVENT = "controller"
+SIGNAL_CONNECTION_EVENT = "connection"
+# Sent with the zone id and name once a discovered zone is watched
+SIGNAL_ZONE_ADDED = "zone_added"
+
+# Events
+EVENT_CONTROLLER_CONNECTED = "controller_connected"
+EVENT_CONTROLLER_DISCONNECTED = "controller_disconnected"
+EVENT_CONTROLLER_RECONNECTING = "controller_reconnecting"
+EVENT_CONTROLLER_UPDATED = "controller_updated"
+EVENT_CONNECTION_MESSAGE = "message"
+EVENT_CONNECTION_CONNECTED = "connection_connected"
+EVENT_CONNECTION_RECONNECTING = "connection_reconnecting"
+EVENT_CONNECTION_DISCONNECTED = "connection_disconnected"
+
+# Control Protocol Statuses
+SUCCESS = 0
+ERROR_MESSAGE_TO_LONG = 1
+ERROR_MESSAGE_INVALID_CHARACTERS = 2
+ERROR_CHECKSUM_ERROR = 3
+ERROR_INVALID_DEVICE = 4
+ERROR_DEVICE_UNAVAILABLE = 5
+ERROR_INVALID_ZONE_SYNTAX = 6
+ERROR_INVALID_ZONE = 7
+ERROR_INVALID_REQUEST = 10
+ERROR_INVALID_NUMBER_PARAMETERS = 11
+ERROR_INVALID_PARAMETER = 12
+ERROR_DEVICE_ID_CONFLICT = 13
+ERROR_INVALID_SEQ_NUMBER = 14
+ERROR_INVALID_PASSCODE = 16
+ERROR_INVALID_CONTENT_HANDLE = 17
+ERROR_NETWORK_ERROR = 18
+ERROR_INVALID_SERIAL_SYNTAX = 19
+ERROR_DEVICE_IN_STANDBY = 20
+ERROR_REJECTED_WHILE_PAIRED = 32
+
+ERROR_UNDETERMINED_ERROR = 999
+RESPONSE_ERROR = {
+    SUCCESS: "Success",
+    ERROR_MESSAGE_TO_LONG: "Message too long",
+    ERROR_MESSAGE_INVALID_CHARACTERS: "Message contains invalid characters",
+    ERROR_CHECKSUM_ERROR: "Checksum error",
+    ERROR_INVALID_DEVICE: "Invalid device",
+    ERROR_DEVICE_UNAVAILABLE: "Device unavailable",
+    ERROR_INVALID_ZONE_SYNTAX: "Invalid zone syntax",
+    ERROR_INVALID_ZONE: "Invalid zone",
+    ERROR_INVALID_REQUEST: "Invalid request",
+    ERROR_INVALID_NUMBER_PARAMETERS: "Invalid number of parameters",
+    ERROR_INVALID_PARAMETER: "Invalid parameter",
+    ERROR_DEVICE_ID_CONFLICT: "Device identifier conflict",
+    ERROR_INVALID_SEQ_NUMBER: "Invalid sequence number",
+    ERROR_INVALID_PASSCODE: "Invalid passcode",
+    ERROR_INVALID_CONTENT_HANDLE: "Invalid content handle",
+    ERROR_NETWORK_ERROR: "Network error",
+    ERROR_INVALID_SERIAL_SYNTAX: "Invalid serial syntax",
+    ERROR_DEVICE_IN_STANDBY: "Device in standby",
+    ERROR_REJECTED_WHILE_PAIRED: "Command is rejected while in paired state",
+    ERROR_UNDETERMINED_ERROR: "Undetermined error",
+}
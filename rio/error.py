@@ -17,6 +17,22 @@ DEFAULT_MESSAGES = {
 }
 
 
+def parse_error_code(payload: str) -> int:
+    """Returns the protocol status code of an 'E' response payload.
+
+    The controller reports either a numeric status or its description.
+    """
+    payload = payload.strip()
+    code = payload.split(" ", 1)[0]
+    if code.isdigit() and int(code) in const.RESPONSE_ERROR:
+        return int(code)
+    lowered = payload.lower()
+    for code, message in const.RESPONSE_ERROR.items():
+        if code != const.SUCCESS and message.lower() in lowered:
+            return code
+    return const.ERROR_UNDETERMINED_ERROR
+
+
 def format_error(err: Exception | asyncio.TimeoutError) -> str:
     """Formats error message based on a base error."""
     msg: str | None = str(err)
@@ -33,6 +49,14 @@ class SystemNotFoundError(Exception):
     """Error finding system."""
 
 
+class ConnectionLostError(RussoundError, ConnectionError):
+    """A command could not be completed because the connection was lost."""
+
+
+class ReplyTimeoutError(RussoundError, asyncio.TimeoutError):
+    """The controller didn't reply to a command, the connection is dropped."""
+
+
 class MessageError(RussoundError, RuntimeError):
     """Errors from the Russound Control Protocol."""
 
@@ -0,0 +1,302 @@
+"""Lightweight counters describing the load on a controller connection."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+import time
+
+# Upper bounds (in seconds) of the latency histogram buckets. The last bucket
+# catches everything slower than the largest bound.
+LATENCY_BUCKETS = (
+    0.0001,
+    0.0002,
+    0.0005,
+    0.001,
+    0.002,
+    0.005,
+    0.01,
+    0.02,
+    0.05,
+    0.1,
+    0.2,
+    0.5,
+    1.0,
+    2.0,
+    5.0,
+    10.0,
+)
+
+COMMAND_TYPES = ("GET", "SET", "WATCH", "EVENT", "OTHER")
+INBOUND_TYPES = ("source", "zone", "preset", "other")
+
+RATE_WINDOW = 60
+
+# Weight of a new sample in the round-trip time moving average
+RTT_SMOOTHING = 0.125
+
+# Variables counted separately in the superseded notification counts, the
+# rest are added up under SUPERSEDED_OTHER
+SUPERSEDED_VARIABLES_MAX = 32
+SUPERSEDED_OTHER = "other"
+
+
+def command_type(cmd: str) -> str:
+    """Returns the metrics bucket for a raw RIO command string."""
+    verb = cmd.split(" ", 1)[0].upper()
+    return verb if verb in COMMAND_TYPES else "OTHER"
+
+
+class LatencyHistogram:
+    """Fixed size histogram of latencies.
+
+    All storage is allocated up front so recording a sample only increments
+    existing counters.
+    """
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        """Adds a sample (in seconds) to the histogram."""
+        self._counts[bisect_left(self._bounds, value)] += 1
+        if not self.count or value < self.min:
+            self.min = value
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent: float) -> float | None:
+        """Returns an estimate of the given percentile.
+
+        The samples of the bucket holding the percentile are assumed to be
+        spread evenly over the bucket, which is narrowed to the smallest and
+        largest value seen.
+        """
+        if not self.count:
+            return None
+        rank = self.count * percent / 100.0
+        seen = 0
+        for index, count in enumerate(self._counts):
+            if count and seen + count >= rank:
+                lower = self._bounds[index - 1] if index else 0.0
+                upper = self._bounds[index] if index < len(self._bounds) else self.max
+                lower = max(lower, self.min)
+                upper = max(lower, min(upper, self.max))
+                return lower + (upper - lower) * max(0.0, rank - seen) / count
+            seen += count
+        return self.max
+
+    @property
+    def mean(self) -> float | None:
+        """Average of all recorded samples."""
+        return self.total / self.count if self.count else None
+
+    def reset(self) -> None:
+        """Clears all samples."""
+        for index in range(len(self._counts)):
+            self._counts[index] = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+    def as_dict(self) -> dict:
+        """Returns a summary of the histogram in milliseconds."""
+
+        def ms(value):
+            return None if value is None else round(value * 1000.0, 3)
+
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.mean),
+            "p50_ms": ms(self.percentile(50)),
+            "p95_ms": ms(self.percentile(95)),
+            "p99_ms": ms(self.percentile(99)),
+            "max_ms": ms(self.max if self.count else None),
+        }
+
+
+class RateCounter:
+    """Counts events per second over a fixed ring of one second slots."""
+
+    def __init__(self, size: int = RATE_WINDOW):
+        self._size = size
+        self._slots = [0] * size
+        self._stamps = [0] * size
+        self.total = 0
+
+    def add(self, now: float = None) -> None:
+        """Records a single event."""
+        second = int(time.monotonic() if now is None else now)
+        index = second % self._size
+        if self._stamps[index] != second:
+            self._stamps[index] = second
+            self._slots[index] = 0
+        self._slots[index] += 1
+        self.total += 1
+
+    def rate(self, window: int = 10, now: float = None) -> float:
+        """Returns the average number of events per second over the last
+        window seconds, excluding the current partial second."""
+        window = max(1, min(window, self._size - 1))
+        current = int(time.monotonic() if now is None else now)
+        count = 0
+        for index in range(self._size):
+            if current - window <= self._stamps[index] < current:
+                count += self._slots[index]
+        return count / window
+
+
+class CommandMetrics:
+    """Latency statistics for a single command type."""
+
+    def __init__(self):
+        self.queue = LatencyHistogram()
+        self.rtt = LatencyHistogram()
+        self.total = LatencyHistogram()
+        self.errors = 0
+
+    def as_dict(self) -> dict:
+        """Returns a summary of the command statistics."""
+        return {
+            "queue": self.queue.as_dict(),
+            "rtt": self.rtt.as_dict(),
+            "total": self.total.as_dict(),
+            "errors": self.errors,
+        }
+
+
+class ConnectionMetrics:
+    """Collects command latency, queue depth and inbound traffic counters."""
+
+    def __init__(self):
+        self.commands = {name: CommandMetrics() for name in COMMAND_TYPES}
+        self.inbound = {name: RateCounter() for name in INBOUND_TYPES}
+        self.parse_failures = 0
+        self.queue_depth = 0
+        self.queue_depth_max = 0
+        self.rtt_average: float | None = None
+        self.keepalive_sent = 0
+        self.keepalive_missed = 0
+        self.replayed = 0
+        self.aborted = 0
+        self.elided = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.negative_hits = 0
+        self.shared_requests = 0
+        self.coalesced = 0
+        self.superseded = 0
+        self.superseded_variables: dict[str, int] = {}
+
+    def record_command(
+        self,
+        kind: str,
+        enqueued: float,
+        written: float,
+        responded: float,
+        error: bool = False,
+    ) -> None:
+        """Records the timeline of a single completed command."""
+        command = self.commands[kind]
+        command.queue.record(written - enqueued)
+        command.rtt.record(responded - written)
+        command.total.record(responded - enqueued)
+        if error:
+            command.errors += 1
+        self.record_rtt(responded - written)
+
+    def record_rtt(self, rtt: float) -> None:
+        """Folds a round-trip time sample into the moving average."""
+        if self.rtt_average is None:
+            self.rtt_average = rtt
+        else:
+            self.rtt_average += RTT_SMOOTHING * (rtt - self.rtt_average)
+
+    def record_queue_depth(self, depth: int) -> None:
+        """Records the current depth of the command queue."""
+        self.queue_depth = depth
+        if depth > self.queue_depth_max:
+            self.queue_depth_max = depth
+
+    def record_inbound(self, kind: str) -> None:
+        """Records a line received from the controller."""
+        self.inbound[kind].add()
+
+    def record_superseded(self, variable: str) -> None:
+        """Records a notification replaced by a newer value before it was
+        applied."""
+        self.superseded += 1
+        variables = self.superseded_variables
+        if variable not in variables and len(variables) >= SUPERSEDED_VARIABLES_MAX:
+            variable = SUPERSEDED_OTHER
+        variables[variable] = variables.get(variable, 0) + 1
+
+    def record_parse_failure(self) -> None:
+        """Records a line that could not be parsed."""
+        self.parse_failures += 1
+
+    def inbound_rate(self, window: int = 10) -> float:
+        """Returns the total inbound lines per second."""
+        return sum(counter.rate(window) for counter in self.inbound.values())
+
+    def latency_percentile(self, kind: str, percent: float) -> float | None:
+        """Returns the round-trip latency percentile (seconds) of a command
+        type."""
+        return self.commands[kind].rtt.percentile(percent)
+
+    def reset(self) -> None:
+        """Clears the latency histograms and peak values."""
+        for command in self.commands.values():
+            command.queue.reset()
+            command.rtt.reset()
+            command.total.reset()
+            command.errors = 0
+        self.queue_depth_max = self.queue_depth
+
+    def as_dict(self) -> dict:
+        """Returns a plain snapshot of all metrics."""
+        return {
+            "commands": {
+                name: command.as_dict() for name, command in self.commands.items()
+            },
+            "inbound": {
+                name: {
+                    "total": counter.total,
+                    "per_second": round(counter.rate(), 2),
+                }
+                for name, counter in self.inbound.items()
+            },
+            "parse_failures": self.parse_failures,
+            "queue_depth": self.queue_depth,
+            "queue_depth_max": self.queue_depth_max,
+            "rtt_average_ms": (
+                None
+                if self.rtt_average is None
+                else round(self.rtt_average * 1000.0, 3)
+            ),
+            "keepalive": {
+                "sent": self.keepalive_sent,
+                "missed": self.keepalive_missed,
+            },
+            "replayed": self.replayed,
+            "aborted": self.aborted,
+            "elided": self.elided,
+            "cache": {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "negative_hits": self.negative_hits,
+                "shared_requests": self.shared_requests,
+            },
+            "coalescing": {
+                "deferred": self.coalesced,
+                "superseded": self.superseded,
+                "superseded_variables": dict(self.superseded_variables),
+            },
+        }
@@ -0,0 +1,133 @@
+"""Sampling monitor of the time spent between receiving a line and the end
+of its callbacks, and of the lag of the event loop running the connection."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from .const import (
+    MONITOR_PROBE_INTERVAL,
+    MONITOR_SAMPLE_EVERY,
+    MONITOR_THRESHOLDS,
+    MONITOR_WARN_INTERVAL,
+)
+from .metrics import LatencyHistogram
+
+_LOGGER = logging.getLogger(__name__)
+
+# loop_lag: delay of a timer on the event loop, a busy loop delays every line
+# pending: time notifications waited to be coalesced before being applied
+# process: parsing a line, storing it and running its callbacks
+# callback: a single callback
+MONITOR_STAGES = ("loop_lag", "pending", "process", "callback")
+
+
+def callback_owner(callback) -> str:
+    """Names the entity, or else the function, behind a callback."""
+    owner = getattr(callback, "__self__", None)
+    entity_id = getattr(owner, "entity_id", None)
+    if entity_id:
+        return entity_id
+    return getattr(callback, "__qualname__", repr(callback))
+
+
+class LoopMonitor:
+    """Collects latency percentiles per stage and the longest callback of each
+    owner, warning at most once every MONITOR_WARN_INTERVAL per stage when a
+    sample exceeds its threshold.
+
+    Only one of every MONITOR_SAMPLE_EVERY lines is timed, the others cost a
+    single counter increment.
+    """
+
+    def __init__(self, sample_every: int = MONITOR_SAMPLE_EVERY):
+        self.stages = {stage: LatencyHistogram() for stage in MONITOR_STAGES}
+        self.longest_callbacks: dict[str, float] = {}
+        self._sample_every = sample_every
+        self._lines = 0
+        self._warned: dict[str, float] = {}
+        self._probe_task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Starts probing the event loop lag."""
+        if self._probe_task is None:
+            self._probe_task = asyncio.create_task(self._probe())
+
+    def stop(self) -> None:
+        """Stops probing the event loop lag."""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
+
+    async def _probe(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + MONITOR_PROBE_INTERVAL
+            await asyncio.sleep(MONITOR_PROBE_INTERVAL)
+            self.record("loop_lag", max(0.0, loop.time() - expected))
+
+    def sample(self) -> bool:
+        """Returns whether the next line should be timed."""
+        self._lines += 1
+        return self._lines % self._sample_every == 0
+
+    def record(self, stage: str, elapsed: float, culprit: str = None) -> None:
+        """Adds a sample (in seconds) to a stage."""
+        self.stages[stage].record(elapsed)
+        if elapsed > MONITOR_THRESHOLDS[stage]:
+            self._warn(stage, elapsed, culprit)
+
+    def run_callbacks(self, callbacks: list, *args) -> None:
+        """Calls callbacks with args, timing each of them."""
+        for callback in callbacks:
+            started = time.perf_counter()
+            callback(*args)
+            elapsed = time.perf_counter() - started
+            owner = callback_owner(callback)
+            if elapsed > self.longest_callbacks.get(owner, 0.0):
+                self.longest_callbacks[owner] = elapsed
+            self.record("callback", elapsed, owner)
+
+    def _warn(self, stage, elapsed, culprit) -> None:
+        now = time.monotonic()
+        last = self._warned.get(stage)
+        if last is not None and now - last < MONITOR_WARN_INTERVAL:
+            return
+        self._warned[stage] = now
+        if stage == "loop_lag":
+            _LOGGER.warning(
+                "The event loop was blocked for %.0fms, delaying every "
+                "Russound notification",
+                elapsed * 1000.0,
+            )
+        else:
+            _LOGGER.warning(
+                "Handling a Russound notification took %.0fms in stage %s%s",
+                elapsed * 1000.0,
+                stage,
+                " (%s)" % (culprit,) if culprit else "",
+            )
+
+    def reset(self) -> None:
+        """Clears all samples."""
+        for histogram in self.stages.values():
+            histogram.reset()
+        self.longest_callbacks.clear()
+
+    def as_dict(self) -> dict:
+        """Returns the stage percentiles and the slowest callbacks."""
+        slowest = sorted(
+            self.longest_callbacks.items(), key=lambda item: item[1], reverse=True
+        )
+        return {
+            "sample_every": self._sample_every,
+            "lines": self._lines,
+            "stages": {
+                stage: histogram.as_dict() for stage, histogram in self.stages.items()
+            },
+            "longest_callbacks_ms": {
+                owner: round(elapsed * 1000.0, 3) for owner, elapsed in slowest
+            },
+        }
@@ -0,0 +1,110 @@
+"""Adaptive pacing of commands written to the controller."""
+
+from __future__ import annotations
+
+import logging
+import time
+
+from . import const
+
+_LOGGER = logging.getLogger(__name__)
+
+# Status codes the controller uses to push back when it is overloaded
+CONGESTION_ERRORS = (const.ERROR_DEVICE_UNAVAILABLE, const.ERROR_NETWORK_ERROR)
+
+# Additive increase per successful command, in commands per second
+RATE_INCREASE = 1.0
+# Multiplicative decrease applied on congestion
+RATE_DECREASE = 0.5
+# Minimum time between two decreases, in seconds
+RATE_DECREASE_HOLDOFF = 1.0
+# A round trip this many times slower than the fastest one seen is congestion
+RTT_CONGESTION_FACTOR = 4.0
+# Round trips below this are never treated as congestion
+RTT_CONGESTION_MIN = 0.05
+# How fast the fastest round trip seen is allowed to drift upwards
+RTT_FLOOR_DECAY = 0.01
+
+
+class AdaptivePacer:
+    """Token bucket limiting how fast commands are written to the controller.
+
+    The rate follows additive-increase/multiplicative-decrease: every reply
+    within the expected round-trip time raises the rate a little, while
+    congestion errors or round trips far above the fastest one seen halve it.
+    Decreases are applied at most once per hold-off period so a single burst
+    of errors doesn't collapse the rate.
+    """
+
+    def __init__(
+        self,
+        rate: float = const.DEFAULT_PACER_RATE,
+        min_rate: float = const.PACER_MIN_RATE,
+        max_rate: float = const.PACER_MAX_RATE,
+        burst: float = const.PACER_BURST,
+    ):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.decreases = 0
+        self.throttled = 0
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+        self._rtt_floor: float | None = None
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Takes the budget of one command and returns how many seconds to
+        wait before writing it, without waiting."""
+        self._refill(time.monotonic())
+        self._tokens -= 1.0
+        if self._tokens >= 0.0:
+            return 0.0
+        self.throttled += 1
+        return -self._tokens / self.rate
+
+    def on_response(self, rtt: float) -> None:
+        """Adjusts the rate after a successful reply."""
+        if self._rtt_floor is None or rtt < self._rtt_floor:
+            self._rtt_floor = rtt
+        else:
+            self._rtt_floor += RTT_FLOOR_DECAY * (rtt - self._rtt_floor)
+
+        congested = rtt > self._rtt_floor * RTT_CONGESTION_FACTOR
+        if congested and rtt > RTT_CONGESTION_MIN:
+            self._decrease("round trip %.0fms" % (rtt * 1000.0))
+        else:
+            self.rate = min(self.max_rate, self.rate + RATE_INCREASE)
+
+    def on_error(self, code: int) -> None:
+        """Adjusts the rate after an error reply."""
+        if code in CONGESTION_ERRORS:
+            self._decrease(const.RESPONSE_ERROR[code])
+
+    def _decrease(self, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < RATE_DECREASE_HOLDOFF:
+            return
+        self._last_decrease = now
+        self.rate = max(self.min_rate, self.rate * RATE_DECREASE)
+        self.decreases += 1
+        _LOGGER.debug("Command rate lowered to %.1f/s (%s)", self.rate, reason)
+
+    @property
+    def budget(self) -> dict:
+        """Returns the current rate and available burst."""
+        self._refill(time.monotonic())
+        return {
+            "rate": round(self.rate, 2),
+            "tokens": round(self._tokens, 2),
+            "burst": self.burst,
+            "decreases": self.decreases,
+            "throttled": self.throttled,
+        }
@@ -0,0 +1,149 @@
+"""Secondary connections to a controller for bulk reads.
+
+Enumerating zones, sources and presets takes hundreds of GETs. Sent on the
+primary connection they queue up behind, and delay, notifications and
+interactive commands. A pool of secondary connections takes this work. The
+connections share the primary's caches and callbacks, are opened when bulk
+work arrives and are closed again after BULK_IDLE_TIMEOUT seconds without
+any. A controller that refuses them is left alone for BULK_RETRY_DELAY
+seconds, rather than being asked again for every batch of bulk work.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+import logging
+import time
+
+from .connection import Connection
+from .const import BULK_IDLE_TIMEOUT, BULK_RETRY_DELAY, DEFAULT_TIMEOUT
+from .dispatcher import Dispatcher
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """Up to size secondary connections sharing the state of a primary one.
+
+    With a size of 0, or when a secondary connection can't be opened, bulk
+    work runs on the primary connection. After a failed open no other one is
+    tried for retry_delay seconds.
+    """
+
+    def __init__(
+        self,
+        primary: Connection,
+        size: int = 0,
+        idle_timeout: float = BULK_IDLE_TIMEOUT,
+        retry_delay: float = BULK_RETRY_DELAY,
+    ):
+        self._primary = primary
+        self._size = size
+        self._idle_timeout = idle_timeout
+        self._retry_delay = retry_delay
+        self._retry_at = 0.0
+        self._slots = asyncio.Semaphore(size) if size else None
+        self._idle: list[Connection] = []
+        self._busy: set[Connection] = set()
+        self._close_timer: asyncio.TimerHandle | None = None
+        self.opened = 0
+        self.failures = 0
+
+    @asynccontextmanager
+    async def connection(self):
+        """Lends a connection for bulk work, a secondary one when possible."""
+        if not self._slots or not self._primary.is_connected():
+            yield self._primary
+            return
+        async with self._slots:
+            connection = await self._acquire()
+            if connection is None:
+                yield self._primary
+                return
+            self._busy.add(connection)
+            try:
+                yield connection
+            finally:
+                self._busy.discard(connection)
+                self._release(connection)
+
+    async def _acquire(self) -> Connection | None:
+        while self._idle:
+            connection = self._idle.pop()
+            if connection.is_connected():
+                return connection
+        if self.cooling_off:
+            return None
+        connection = Connection(Dispatcher(), self._primary._host, None)
+        connection.share_state(self._primary)
+        try:
+            await connection.connect(
+                self._primary._host,
+                self._primary._port,
+                timeout=self._primary._timeout or DEFAULT_TIMEOUT,
+                keepalive_interval=None,
+            )
+        except ConnectionError as err:
+            self.failures += 1
+            self._retry_at = time.monotonic() + self._retry_delay
+            _LOGGER.debug(
+                "Using the primary connection for bulk work for %.0f seconds: %s",
+                self._retry_delay,
+                err,
+            )
+            return None
+        self.opened += 1
+        if not self._primary.is_connected():
+            # Disconnected while this one was being opened
+            await connection.disconnect()
+            return None
+        return connection
+
+    @property
+    def cooling_off(self) -> bool:
+        """Returns True while no secondary connection is opened after a
+        failure."""
+        return time.monotonic() < self._retry_at
+
+    def _release(self, connection: Connection) -> None:
+        if not connection.is_connected():
+            return
+        if not self._primary.is_connected():
+            asyncio.create_task(connection.disconnect())
+            return
+        self._idle.append(connection)
+        if self._close_timer:
+            self._close_timer.cancel()
+        self._close_timer = asyncio.get_running_loop().call_later(
+            self._idle_timeout, self._close_idle
+        )
+
+    def _close_idle(self) -> None:
+        self._close_timer = None
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            asyncio.create_task(connection.disconnect())
+
+    async def close(self) -> None:
+        """Closes every secondary connection."""
+        if self._close_timer:
+            self._close_timer.cancel()
+            self._close_timer = None
+        connections = [*self._idle, *self._busy]
+        self._idle = []
+        await asyncio.gather(
+            *(connection.disconnect() for connection in connections),
+            return_exceptions=True,
+        )
+
+    def as_dict(self) -> dict:
+        """Returns the state of the pool."""
+        return {
+            "size": self._size,
+            "idle": len(self._idle),
+            "busy": len(self._busy),
+            "opened": self.opened,
+            "failures": self.failures,
+            "cooling_off": self.cooling_off,
+        }
@@ -0,0 +1,338 @@
+"""RIO proxy sharing a single controller session between several clients."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import defaultdict
+import logging
+import re
+
+from . import const
+from .connection import CommandException, Connection, PresetID, ZoneID
+from .dispatcher import Dispatcher
+
+_LOGGER = logging.getLogger(__name__)
+
+# A client whose unsent notifications exceed this many bytes is disconnected
+# rather than buffering without bound.
+MAX_CLIENT_BUFFER = 1024 * 1024
+
+_re_target = re.compile(
+    r"^(?:"
+    r"(?:S\[(?P<preset_source>\d+)\]\.B\[(?P<preset_bank>\d+)\]\.P\[(?P<preset>\d+)\])|"
+    r"(?:S\[(?P<source>\d+)\])|"
+    r"(?:C\[(?P<controller>\d+)\]\.Z\[(?P<zone>\d+)\]))"
+    r"(?:\.(?P<variable>\w+))?$"
+)
+_re_line = re.compile(rb"[\r\n]")
+
+
+def _parse_target(target: str):
+    """Returns the ZoneID, source id or PresetID named by a RIO device string
+    and the variable that follows it, if any."""
+    m = _re_target.match(target)
+    if not m:
+        return None, None
+    if m["zone"]:
+        return ZoneID(m["zone"], m["controller"]), m["variable"]
+    if m["source"]:
+        return int(m["source"]), m["variable"]
+    return PresetID(m["preset_source"], m["preset_bank"], m["preset"]), m["variable"]
+
+
+class ProxyClient:
+    """A downstream RIO session and the devices it watches."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.peer = writer.get_extra_info("peername")
+        self.zones: set[ZoneID] = set()
+        self.sources: set[int] = set()
+
+    def send(self, line: str) -> None:
+        """Queues a line to the client, dropping it when it can't keep up."""
+        if self.writer.is_closing():
+            return
+        if self.writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+            _LOGGER.warning("Dropping proxy client %s, it is not reading", self.peer)
+            self.writer.close()
+            return
+        self.writer.write(bytearray(line + "\r\n", "utf-8"))
+
+
+class RioProxy:
+    """Serves RIO to several clients over one upstream connection.
+
+    GETs for watched zones and sources are answered from the connection's
+    state cache, other GETs go through its read-through cache. SET and EVENT
+    commands share the connection's command queue. Upstream watches are
+    reference counted over the clients watching a device, and notifications
+    are fanned out to the clients that watch the device they belong to.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = const.DEFAULT_PORT,
+        listen_host: str = "0.0.0.0",
+        listen_port: int = const.DEFAULT_PORT,
+    ):
+        self._host = host
+        self._port = port
+        self._listen_host = listen_host
+        self._listen_port = listen_port
+        self._dispatcher = Dispatcher()
+        self._connection = Connection(self._dispatcher, host, port)
+        self._server: asyncio.AbstractServer | None = None
+        self._clients: set[ProxyClient] = set()
+        self._zone_clients: dict[ZoneID, set[ProxyClient]] = defaultdict(set)
+        self._source_clients: dict[int, set[ProxyClient]] = defaultdict(set)
+        self._watching: dict[object, asyncio.Future] = {}
+        self._handlers: set[asyncio.Task] = set()
+
+    @property
+    def connection(self) -> Connection:
+        """Returns the upstream connection."""
+        return self._connection
+
+    @property
+    def port(self) -> int | None:
+        """Returns the port the proxy listens on."""
+        if not self._server:
+            return None
+        return self._server.sockets[0].getsockname()[1]
+
+    @property
+    def clients(self) -> int:
+        """Returns the number of connected clients."""
+        return len(self._clients)
+
+    async def start(self) -> None:
+        """Connects upstream and starts accepting clients."""
+        await self._connection.connect(self._host, self._port, auto_reconnect=True)
+        self._connection._zone_callbacks.append(self._zone_callback)
+        self._connection._source_callbacks.append(self._source_callback)
+        self._server = await asyncio.start_server(
+            self._handle_client, self._listen_host, self._listen_port
+        )
+        _LOGGER.info(
+            "Proxying %s:%d on %s:%d",
+            self._host,
+            self._port,
+            self._listen_host,
+            self.port,
+        )
+
+    async def close(self) -> None:
+        """Disconnects all clients and the upstream connection."""
+        if self._server:
+            self._server.close()
+        for client in list(self._clients):
+            client.writer.close()
+        if self._handlers:
+            await asyncio.wait(self._handlers)
+        if self._server:
+            await self._server.wait_closed()
+            self._server = None
+        self._connection._zone_callbacks.remove(self._zone_callback)
+        self._connection._source_callbacks.remove(self._source_callback)
+        await self._connection.disconnect()
+
+    async def serve_forever(self) -> None:
+        """Runs the proxy until cancelled."""
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    def _zone_callback(self, zone_id, name, value) -> None:
+        clients = self._zone_clients.get(zone_id)
+        if clients and value is not None:
+            name = self._connection.variable_name(name)
+            line = 'N %s.%s="%s"' % (zone_id.device_str(), name, value)
+            for client in clients:
+                client.send(line)
+
+    def _source_callback(self, source_id, name, value) -> None:
+        clients = self._source_clients.get(source_id)
+        if clients:
+            name = self._connection.variable_name(name)
+            line = 'N S[%d].%s="%s"' % (source_id, name, value)
+            for client in clients:
+                client.send(line)
+
+    async def _handle_client(self, reader, writer) -> None:
+        client = ProxyClient(writer)
+        self._clients.add(client)
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        _LOGGER.debug("Proxy client %s connected", client.peer)
+        buffer = b""
+        try:
+            while True:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                *lines, buffer = _re_line.split(buffer + data)
+                for line in lines:
+                    cmd = line.decode("utf-8", "replace").strip()
+                    reply = await self._handle_command(client, cmd) if cmd else None
+                    if reply:
+                        client.send(reply)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._clients.discard(client)
+            writer.close()
+            for zone_id in list(client.zones):
+                await self._unwatch(client, zone_id)
+            for source_id in list(client.sources):
+                await self._unwatch(client, source_id)
+            self._handlers.discard(task)
+            _LOGGER.debug("Proxy client %s disconnected", client.peer)
+
+    async def _handle_command(self, client: ProxyClient, cmd: str) -> str:
+        """Handles one command of a client and returns the reply line."""
+        verb, _, args = cmd.partition(" ")
+        verb = verb.upper()
+        try:
+            if verb == "GET":
+                return await self._get(args.strip())
+            if verb == "WATCH":
+                return await self._watch_command(client, args.strip())
+            await self._connection._send_cmd(cmd)
+            return "S"
+        except CommandException as err:
+            return "E %s" % (err,)
+        except (ConnectionError, asyncio.TimeoutError):
+            return "E %s" % (const.RESPONSE_ERROR[const.ERROR_DEVICE_UNAVAILABLE],)
+
+    async def _get(self, key: str) -> str:
+        connection = self._connection
+        target, variable = _parse_target(key)
+        if target is None or variable is None:
+            value = await connection._send_cmd("GET " + key)
+        elif isinstance(target, ZoneID):
+            value = await connection._read_through(
+                target,
+                variable,
+                "GET " + key,
+                connection._zone_state,
+                target in connection._watched_zones,
+            )
+        elif isinstance(target, PresetID):
+            value = await connection._read_through(
+                target, variable, "GET " + key, connection._preset_state, False
+            )
+        else:
+            value = await connection._read_through(
+                target,
+                variable,
+                "GET " + key,
+                connection._source_state,
+                target in connection._watched_sources,
+            )
+        return 'S %s="%s"' % (key, "" if value is None else value)
+
+    async def _watch_command(self, client: ProxyClient, args: str) -> str:
+        device, _, state = args.partition(" ")
+        target, variable = _parse_target(device)
+        if target is None or variable or isinstance(target, PresetID):
+            # Watches not tied to a zone or source are not shared
+            await self._connection._send_cmd("WATCH " + args)
+            return "S"
+        if state.upper() == "OFF":
+            await self._unwatch(client, target)
+            return "S"
+        await self._watch(client, target)
+        client.send("S")
+        self._send_snapshot(client, target)
+        return ""
+
+    def _subscribers(self, target) -> tuple[dict, set, set, str]:
+        connection = self._connection
+        if isinstance(target, ZoneID):
+            return (
+                connection._zone_state,
+                self._zone_clients[target],
+                connection._watched_zones,
+                target.device_str(),
+            )
+        return (
+            connection._source_state,
+            self._source_clients[target],
+            connection._watched_sources,
+            "S[%d]" % (target,),
+        )
+
+    async def _watch(self, client: ProxyClient, target) -> None:
+        """Subscribes a client to a device, watching it upstream for the first
+        subscriber."""
+        _, clients, watched, device = self._subscribers(target)
+        (client.zones if isinstance(target, ZoneID) else client.sources).add(target)
+        clients.add(client)
+        if target in watched:
+            return
+        pending = self._watching.get(target)
+        if pending is None:
+            pending = asyncio.ensure_future(
+                self._connection._send_cmd("WATCH %s ON" % (device,))
+            )
+            self._watching[target] = pending
+            pending.add_done_callback(lambda _: self._watching.pop(target, None))
+        try:
+            await asyncio.shield(pending)
+        except Exception:
+            clients.discard(client)
+            client.zones.discard(target)
+            client.sources.discard(target)
+            raise
+        watched.add(target)
+
+    async def _unwatch(self, client: ProxyClient, target) -> None:
+        """Unsubscribes a client from a device, and stops watching it upstream
+        once nobody is left."""
+        _, clients, watched, device = self._subscribers(target)
+        client.zones.discard(target)
+        client.sources.discard(target)
+        clients.discard(client)
+        if clients or target not in watched:
+            return
+        watched.discard(target)
+        try:
+            await self._connection._send_cmd("WATCH %s OFF" % (device,))
+        except (CommandException, ConnectionError, asyncio.TimeoutError) as err:
+            _LOGGER.debug("Failed to stop watching %s: %s", device, err)
+
+    def _send_snapshot(self, client: ProxyClient, target) -> None:
+        """Sends the cached variables of a device as notifications, as the
+        controller does when a watch is started."""
+        cache, _, _, device = self._subscribers(target)
+        for name, value in list(cache.get(target, {}).items()):
+            name = self._connection.variable_name(name)
+            client.send('N %s.%s="%s"' % (device, name, value))
+
+
+def main() -> None:
+    """Runs the proxy from the command line."""
+    parser = argparse.ArgumentParser(description=RioProxy.__doc__.splitlines()[0])
+    parser.add_argument("host", help="address of the Russound controller")
+    parser.add_argument("--port", type=int, default=const.DEFAULT_PORT)
+    parser.add_argument("--listen-host", default="0.0.0.0")
+    parser.add_argument("--listen-port", type=int, default=const.DEFAULT_PORT)
+    parser.add_argument("--debug", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
+    proxy = RioProxy(args.host, args.port, args.listen_host, args.listen_port)
+    try:
+        asyncio.run(proxy.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
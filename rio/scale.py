@@ -0,0 +1,372 @@
+"""Scale test of the client against a simulated system of the largest size.
+
+The protocol addresses at most 7 controllers of 16 zones, and 16 sources
+with 6 banks of 6 presets each. run_scale drives a simulator of that size
+through the discovery the integration performs, a WATCH resync after the
+controller drops the connection and sustained metadata changes on every
+source, and check_budgets compares the measurements with SCALE_BUDGETS.
+
+The simulator runs on an event loop in a thread of its own, so the CPU time
+measured on the client's thread is spent by the client and the entities
+only. Home Assistant is replaced by ZoneEntity, which follows the same
+callbacks as the media player of a zone and reads the same cached values
+when it writes its state. Peak RSS is that of the whole process, simulator
+included.
+
+Run with 'python -m rio scale'.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import sys
+import threading
+import time
+
+from .client import RussoundClient
+from .connection import ZoneID
+from .const import (
+    EVENT_CONTROLLER_CONNECTED,
+    MAX_BANKS,
+    MAX_CONTROLLERS,
+    MAX_PRESETS,
+    MAX_SOURCES,
+    MAX_ZONES,
+    SCALE_BUDGETS,
+    SIGNAL_CONTROLLER_EVENT,
+    ZONE_SETTINGS,
+)
+from .simulator import RioSimulator
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Longest wait for the client to catch up with the simulator, in seconds
+WAIT_TIMEOUT = 60.0
+
+# Source variables changed on every round of churn
+CHURN_VARIABLES = ("songName", "artistName", "albumName", "coverArtURL")
+
+# Cached values a media player shows
+ZONE_VARIABLES = ("status", "volume", "mute", "currentsource")
+SOURCE_VARIABLES = (
+    "name",
+    "songname",
+    "artistname",
+    "albumname",
+    "channel",
+    "coverarturl",
+)
+
+
+class SimulatorThread:
+    """Runs a RioSimulator on an event loop in a thread of its own."""
+
+    def __init__(self, simulator: RioSimulator):
+        self.simulator = simulator
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="rio-simulator", daemon=True
+        )
+
+    async def run(self, coro):
+        """Runs a coroutine on the simulator's loop and returns its result."""
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        return await asyncio.wrap_future(future)
+
+    async def call(self, func, *args):
+        """Calls func(*args) on the simulator's loop and returns its result."""
+
+        async def call():
+            return func(*args)
+
+        return await self.run(call())
+
+    async def start(self) -> int:
+        """Starts the thread and the simulator, returns its port."""
+        self._thread.start()
+        return await self.run(self.simulator.start())
+
+    async def stop(self) -> None:
+        """Stops the simulator and the thread."""
+        await self.run(self.simulator.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        await asyncio.get_running_loop().run_in_executor(None, self._thread.join)
+        self._loop.close()
+
+
+class ZoneEntity:
+    """Stand-in for the media player of a zone.
+
+    Like RussoundMediaPlayer it is called for every zone and source change and
+    writes its state when its zone, or the source the zone listens to, changed.
+    """
+
+    def __init__(self, client: RussoundClient, zone_id: ZoneID):
+        self._client = client
+        self.zone_id = zone_id
+        self.callbacks = 0
+        self.writes = 0
+        self.state: dict[str, str | None] = {}
+        client.add_zone_callback(self._zone_callback)
+        client.add_source_callback(self._source_callback)
+
+    def _current_source(self) -> int:
+        return int(
+            self._client.get_cached_zone_variable(self.zone_id, "currentsource", 0)
+        )
+
+    def _zone_callback(self, zone_id, *args):
+        self.callbacks += 1
+        if zone_id == self.zone_id:
+            self.write_state()
+
+    def _source_callback(self, source_id, *args):
+        self.callbacks += 1
+        if source_id == self._current_source():
+            self.write_state()
+
+    def write_state(self) -> None:
+        """Reads every value the media player exposes from the cache."""
+        client = self._client
+        state = {
+            name: client.get_cached_zone_variable(self.zone_id, name)
+            for name in ZONE_VARIABLES
+        }
+        source_id = self._current_source()
+        for name in SOURCE_VARIABLES:
+            state[name] = client.get_cached_source_variable(source_id, name)
+        self.state = state
+        self.writes += 1
+
+
+@dataclass
+class ScaleReport:
+    """Measurements of a scale test."""
+
+    zones: int = 0
+    sources: int = 0
+    presets: int = 0
+    # Seconds from connecting until the catalog was known
+    setup: float = 0.0
+    # Seconds from the controller dropping the connection until changes made
+    # meanwhile reached the entities
+    resync: float = 0.0
+    # Lines received, callbacks called and entity states written during churn
+    notifications: int = 0
+    callbacks: int = 0
+    writes: int = 0
+    # CPU seconds of the client's thread during churn
+    cpu: float = 0.0
+    # Bytes, None where the platform doesn't report it
+    peak_rss: int | None = None
+
+    @property
+    def cpu_per_notification(self) -> float:
+        """CPU seconds per line received during churn."""
+        return self.cpu / self.notifications if self.notifications else 0.0
+
+
+def peak_rss() -> int | None:
+    """Returns the peak resident set size of the process in bytes."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def check_budgets(report: ScaleReport, budgets: dict = SCALE_BUDGETS) -> list[str]:
+    """Returns the names of the budgets the report exceeds."""
+    measured = {
+        "setup": report.setup,
+        "resync": report.resync,
+        "cpu_per_notification": report.cpu_per_notification,
+        "peak_rss": report.peak_rss,
+    }
+    return [
+        name
+        for name, budget in budgets.items()
+        if measured[name] is not None and measured[name] > budget
+    ]
+
+
+async def _wait_for(predicate, what: str) -> None:
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError("Timed out waiting for %s" % (what,))
+        await asyncio.sleep(0.01)
+
+
+def _inbound_lines(client: RussoundClient) -> int:
+    return sum(
+        counter.total for counter in client.connection.metrics.inbound.values()
+    )
+
+
+def _power_on(simulator: RioSimulator, zones: list[ZoneID], sources: int) -> None:
+    # Spread the zones over the sources, so every source is in use
+    for index, zone_id in enumerate(zones):
+        device = zone_id.device_str()
+        simulator.set(device, "currentSource", index % sources + 1)
+        simulator.set(device, "status", "ON")
+
+
+def _drop_and_change(simulator: RioSimulator, zones: list[ZoneID]) -> None:
+    simulator.drop_sessions()
+    # Made while disconnected, only the resync brings these in
+    for zone_id in zones:
+        simulator.set(zone_id.device_str(), "volume", "25")
+
+
+def _song(round_: int, source_id: int) -> str:
+    return "Song %d-%d" % (round_, source_id)
+
+
+def _churn(simulator: RioSimulator, round_: int, sources: int) -> None:
+    for source_id in range(1, sources + 1):
+        device = "S[%d]" % (source_id,)
+        simulator.set(device, "songName", _song(round_, source_id))
+        simulator.set(device, "artistName", "Artist %d" % (round_,))
+        simulator.set(device, "albumName", "Album %d" % (round_,))
+        simulator.set(
+            device, "coverArtURL", "http://art.invalid/%d/%d" % (round_, source_id)
+        )
+
+
+async def run_scale(
+    controllers: int = MAX_CONTROLLERS,
+    zones: int = MAX_ZONES,
+    sources: int = MAX_SOURCES,
+    rounds: int = 200,
+    rate: float = 20.0,
+    latency: float = 0.0,
+    bulk_connections: int = 0,
+) -> ScaleReport:
+    """Runs the scale test and returns its measurements.
+
+    All sources are tuners with MAX_BANKS banks of MAX_PRESETS presets. Churn
+    changes len(CHURN_VARIABLES) variables of every source per round, at rate
+    rounds per second.
+    """
+    report = ScaleReport()
+    simulator = SimulatorThread(
+        RioSimulator(
+            controllers=controllers,
+            zones=zones,
+            sources=sources,
+            tuners=sources,
+            banks=MAX_BANKS,
+            presets=MAX_PRESETS,
+            latency=latency,
+        )
+    )
+    port = await simulator.start()
+    client = RussoundClient(
+        "127.0.0.1",
+        port,
+        keepalive_interval=None,
+        bulk_connections=bulk_connections,
+    )
+    try:
+        entities = await _setup(client, report)
+        zone_ids = [entity.zone_id for entity in entities]
+
+        await simulator.call(_power_on, simulator.simulator, zone_ids, sources)
+        await _wait_for(
+            lambda: len(client.connection._watched_sources) == len(client.sources),
+            "the sources in use to be watched",
+        )
+
+        await _resync(client, simulator, entities, report)
+        await _sustained_churn(client, simulator, entities, report, rounds, rate)
+    finally:
+        await client.disconnect()
+        await simulator.stop()
+    report.peak_rss = peak_rss()
+    return report
+
+
+async def _setup(client: RussoundClient, report: ScaleReport) -> list[ZoneEntity]:
+    # The same steps as the media player platform
+    started = time.perf_counter()
+    await client.connect()
+    entities = []
+    async for zone_id, _ in client.discover_zones():
+        await client.watch_zone(zone_id)
+        entities.append(ZoneEntity(client, zone_id))
+        client.zone_usable()
+        await client.fetch_zone_variables(zone_id, ZONE_SETTINGS)
+    client.source_watcher.start()
+    await client.enumerate_catalog()
+    report.setup = time.perf_counter() - started
+    report.zones = len(client.zones)
+    report.sources = len(client.sources)
+    report.presets = len(client.presets)
+    return entities
+
+
+async def _resync(
+    client: RussoundClient,
+    simulator: SimulatorThread,
+    entities: list[ZoneEntity],
+    report: ScaleReport,
+) -> None:
+    reconnected = asyncio.Event()
+
+    async def controller_event(event: str, *args) -> None:
+        if event == EVENT_CONTROLLER_CONNECTED:
+            reconnected.set()
+
+    signal = client.dispatcher.connect(SIGNAL_CONTROLLER_EVENT, controller_event)
+    try:
+        started = time.perf_counter()
+        await simulator.call(
+            _drop_and_change,
+            simulator.simulator,
+            [entity.zone_id for entity in entities],
+        )
+        await asyncio.wait_for(reconnected.wait(), WAIT_TIMEOUT)
+        await _wait_for(
+            lambda: all(entity.state.get("volume") == "25" for entity in entities),
+            "the resync",
+        )
+        report.resync = time.perf_counter() - started
+    finally:
+        signal.disconnect()
+
+
+async def _sustained_churn(
+    client: RussoundClient,
+    simulator: SimulatorThread,
+    entities: list[ZoneEntity],
+    report: ScaleReport,
+    rounds: int,
+    rate: float,
+) -> None:
+    sources = [source_id for source_id, _, _ in client.sources]
+    lines = _inbound_lines(client)
+    callbacks = sum(entity.callbacks for entity in entities)
+    writes = sum(entity.writes for entity in entities)
+    loop = asyncio.get_running_loop()
+    cpu = time.thread_time()
+    started = loop.time()
+    for round_ in range(rounds):
+        await simulator.call(_churn, simulator.simulator, round_, len(sources))
+        await asyncio.sleep(max(0.0, started + (round_ + 1) / rate - loop.time()))
+    await _wait_for(
+        lambda: all(
+            client.get_cached_source_variable(source_id, "songname")
+            == _song(rounds - 1, source_id)
+            for source_id in sources
+        ),
+        "the last round of changes",
+    )
+    report.cpu = time.thread_time() - cpu
+    report.notifications = _inbound_lines(client) - lines
+    report.callbacks = sum(entity.callbacks for entity in entities) - callbacks
+    report.writes = sum(entity.writes for entity in entities) - writes
@@ -0,0 +1,306 @@
+"""Stand-in Russound controller speaking RIO over TCP.
+
+The simulator keeps zone, source and preset variables in memory and answers
+GET, SET, WATCH and EVENT commands the way a controller does, pushing 'N'
+notifications to every session watching a device. It allows the connection,
+the proxy and the integration to be exercised without hardware.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter, defaultdict
+import logging
+import re
+
+from . import const
+
+_LOGGER = logging.getLogger(__name__)
+
+TUNER_TYPE = const.SOURCE_TYPE_TUNER
+STREAMER_TYPE = "Streamer"
+
+_re_device = re.compile(
+    r"^(?P<device>C\[\d+\]\.Z\[\d+\]|S\[\d+\](?:\.B\[\d+\]\.P\[\d+\])?|C\[\d+\])"
+    r"\.(?P<variable>\w+)$"
+)
+_re_set = re.compile(r"^(?P<key>\S+)=\"(?P<value>.*)\"$")
+_re_line = re.compile(rb"[\r\n]")
+
+
+def _error(code: int) -> str:
+    return "E %s" % (const.RESPONSE_ERROR[code],)
+
+
+class _Session:
+    """A client connected to the simulator."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.watching: set[str] = set()
+
+    def send(self, line: str) -> None:
+        if not self.writer.is_closing():
+            self.writer.write(bytearray(line + "\r\n", "utf-8"))
+
+
+class RioSimulator:
+    """In-memory Russound controller.
+
+    Zones are created on every controller, sources are numbered from 1 with
+    the first `tuners` of them being tuners carrying `banks` banks of
+    `presets` presets each. A `latency` (in seconds) is added before every
+    reply to mimic the round trip of real hardware. While `busy` is above 0,
+    commands are refused as an overloaded controller does, counting it down.
+    """
+
+    def __init__(
+        self,
+        controllers: int = 1,
+        zones: int = 6,
+        sources: int = 4,
+        tuners: int = 1,
+        banks: int = 6,
+        presets: int = 6,
+        latency: float = 0.0,
+        version: str = "01.08.00",
+    ):
+        self.latency = latency
+        self.version = version
+        self.busy = 0
+        self.received: Counter = Counter()
+        self._devices: dict[str, dict[str, list[str]]] = {}
+        self._watchers: dict[str, set[_Session]] = defaultdict(set)
+        self._sessions: set[_Session] = set()
+        self._server: asyncio.AbstractServer | None = None
+        self._handlers: set[asyncio.Task] = set()
+
+        for controller in range(1, controllers + 1):
+            self._add_device("C[%d]" % controller, type="MCA-88", name="")
+            for zone in range(1, zones + 1):
+                self._add_device(
+                    "C[%d].Z[%d]" % (controller, zone),
+                    name="Zone %d-%d" % (controller, zone),
+                    status="OFF",
+                    volume="10",
+                    currentSource="1",
+                    mute="OFF",
+                    bass="0",
+                    treble="0",
+                    balance="0",
+                    loudness="OFF",
+                    turnOnVolume="20",
+                )
+        for source in range(1, sources + 1):
+            tuner = source <= tuners
+            self._add_device(
+                "S[%d]" % source,
+                name=("Tuner %d" if tuner else "Source %d") % source,
+                type=TUNER_TYPE if tuner else STREAMER_TYPE,
+                channel="",
+                songName="",
+                artistName="",
+                albumName="",
+                coverArtURL="",
+                mode="",
+            )
+            if not tuner:
+                continue
+            for bank in range(1, banks + 1):
+                for preset in range(1, presets + 1):
+                    self._add_device(
+                        "S[%d].B[%d].P[%d]" % (source, bank, preset),
+                        name="Preset %d-%d" % (bank, preset),
+                        valid="TRUE",
+                    )
+
+    def _add_device(self, device: str, **variables: str) -> None:
+        self._devices[device] = {
+            name.lower(): [name, value] for name, value in variables.items()
+        }
+
+    @property
+    def port(self) -> int | None:
+        """Returns the TCP port the simulator listens on."""
+        if not self._server:
+            return None
+        return self._server.sockets[0].getsockname()[1]
+
+    @property
+    def sessions(self) -> int:
+        """Returns the number of connected clients."""
+        return len(self._sessions)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Starts listening and returns the port. A port of 0 picks a free
+        one."""
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        _LOGGER.debug("Simulator listening on %s:%d", host, self.port)
+        return self.port
+
+    async def close(self) -> None:
+        """Disconnects all clients and stops listening."""
+        if self._server:
+            self._server.close()
+        for session in list(self._sessions):
+            session.writer.close()
+        if self._handlers:
+            await asyncio.wait(self._handlers)
+        if self._server:
+            await self._server.wait_closed()
+            self._server = None
+
+    def drop_sessions(self) -> None:
+        """Closes every client connection, as a rebooting controller would."""
+        for session in list(self._sessions):
+            session.writer.close()
+
+    def get(self, device: str, variable: str) -> str | None:
+        """Returns the current value of a variable."""
+        entry = self._devices.get(device, {}).get(variable.lower())
+        return entry[1] if entry else None
+
+    def set(self, device: str, variable: str, value) -> None:
+        """Changes a variable and notifies the sessions watching its device,
+        e.g. to simulate new track metadata."""
+        variables = self._devices.setdefault(device, {})
+        entry = variables.get(variable.lower())
+        value = str(value)
+        if entry is None:
+            variables[variable.lower()] = entry = [variable, value]
+        elif entry[1] == value:
+            return
+        entry[1] = value
+        line = 'N %s.%s="%s"' % (device, entry[0], value)
+        for session in self._watchers.get(device, ()):
+            session.send(line)
+
+    async def _handle_client(self, reader, writer) -> None:
+        session = _Session(writer)
+        self._sessions.add(session)
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        buffer = b""
+        try:
+            while True:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                *lines, buffer = _re_line.split(buffer + data)
+                for line in lines:
+                    cmd = line.decode("utf-8", "replace").strip()
+                    if not cmd:
+                        continue
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    self._handle_command(session, cmd)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._handlers.discard(task)
+            self._sessions.discard(session)
+            for device in session.watching:
+                self._watchers[device].discard(session)
+            writer.close()
+
+    def _handle_command(self, session: _Session, cmd: str) -> None:
+        verb, _, args = cmd.partition(" ")
+        verb = verb.upper()
+        self.received[verb] += 1
+        if self.busy:
+            self.busy -= 1
+            session.send(_error(const.ERROR_DEVICE_UNAVAILABLE))
+        elif verb == "GET":
+            session.send(self._get(args))
+        elif verb == "SET":
+            session.send(self._set(args))
+        elif verb == "WATCH":
+            self._watch(session, args)
+        elif verb == "EVENT":
+            self._event(session, args)
+        else:
+            session.send(_error(const.ERROR_INVALID_REQUEST))
+
+    def _lookup(self, key: str):
+        m = _re_device.match(key)
+        if not m:
+            return None, None
+        variables = self._devices.get(m["device"])
+        if variables is None:
+            return m["device"], None
+        return m["device"], variables.get(m["variable"].lower())
+
+    def _get(self, key: str) -> str:
+        if key.upper() == "VERSION":
+            return 'S VERSION="%s"' % (self.version,)
+        device, entry = self._lookup(key)
+        if device is None or device not in self._devices:
+            return _error(const.ERROR_INVALID_ZONE)
+        if entry is None:
+            return _error(const.ERROR_INVALID_REQUEST)
+        return 'S %s="%s"' % (key, entry[1])
+
+    def _set(self, args: str) -> str:
+        m = _re_set.match(args)
+        if not m:
+            return _error(const.ERROR_INVALID_PARAMETER)
+        device, entry = self._lookup(m["key"])
+        if device is None or entry is None:
+            return _error(const.ERROR_INVALID_REQUEST)
+        self.set(device, entry[0], m["value"])
+        return "S"
+
+    def _watch(self, session: _Session, args: str) -> None:
+        device, _, state = args.partition(" ")
+        if device.upper() == "SYSTEM":
+            session.send("S")
+            return
+        if device not in self._devices:
+            session.send(_error(const.ERROR_INVALID_ZONE))
+            return
+        if state.upper() == "OFF":
+            session.watching.discard(device)
+            self._watchers[device].discard(session)
+            session.send("S")
+            return
+        session.watching.add(device)
+        self._watchers[device].add(session)
+        session.send("S")
+        for name, value in self._devices[device].values():
+            session.send('N %s.%s="%s"' % (device, name, value))
+
+    def _event(self, session: _Session, args: str) -> None:
+        device, _, event = args.partition("!")
+        zone = self._devices.get(device)
+        if zone is None or ".Z[" not in device:
+            session.send(_error(const.ERROR_INVALID_ZONE))
+            return
+        name, *params = event.split()
+        name = name.lower()
+        session.send("S")
+        if name in ("zoneon", "allon"):
+            self.set(device, "status", "ON")
+        elif name in ("zoneoff", "alloff"):
+            self.set(device, "status", "OFF")
+        elif name == "selectsource" and params:
+            self.set(device, "currentSource", params[0])
+            self.set(device, "status", "ON")
+        elif name == "restorepreset" and params:
+            self._restore_preset(device, int(params[0]))
+        elif name == "keypress" and len(params) == 2 and params[0] == "Volume":
+            self.set(device, "volume", params[1])
+        elif name == "keypress" and params[:1] in (["VolumeUp"], ["VolumeDown"]):
+            step = 1 if params[0] == "VolumeUp" else -1
+            volume = int(self.get(device, "volume")) + step
+            self.set(device, "volume", max(0, min(50, volume)))
+        elif name == "keycode" and params == ["13"]:
+            muted = self.get(device, "mute") == "ON"
+            self.set(device, "mute", "OFF" if muted else "ON")
+
+    def _restore_preset(self, zone: str, index: int) -> None:
+        source = self.get(zone, "currentSource")
+        bank, preset = divmod(index - 1, 6)
+        name = self.get("S[%s].B[%d].P[%d]" % (source, bank + 1, preset + 1), "name")
+        if name is not None:
+            self.set("S[%s]" % (source,), "channel", name)
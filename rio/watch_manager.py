@@ -0,0 +1,118 @@
+"""Watches sources only while a powered zone is listening to them."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from .const import DEFAULT_SOURCE_UNWATCH_DELAY
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SourceWatchManager:
+    """Keeps the set of watched sources in line with the watched zones.
+
+    A source is watched as soon as a watched zone that is ON has it as its
+    current source, and unwatched once no such zone is left for the grace
+    period. This keeps idle sources from streaming metadata nobody shows.
+    """
+
+    def __init__(self, russ, grace: float = DEFAULT_SOURCE_UNWATCH_DELAY):
+        self._russ = russ
+        self._grace = grace
+        self._started = False
+        self._watching: set[int] = set()
+        self._unwatch_handles: dict[int, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        """Starts following zone power and source changes."""
+        if self._started:
+            return
+        self._started = True
+        self._russ.add_zone_callback(self._zone_callback)
+        self.refresh()
+
+    def stop(self) -> None:
+        """Stops following zones and cancels pending unwatches."""
+        if not self._started:
+            return
+        self._started = False
+        self._russ.remove_zone_callback(self._zone_callback)
+        for handle in self._unwatch_handles.values():
+            handle.cancel()
+        self._unwatch_handles.clear()
+        for task in self._tasks:
+            task.cancel()
+
+    def wanted_sources(self) -> set[int]:
+        """Returns the sources selected by a watched zone that is on."""
+        connection = self._russ.connection
+        wanted = set()
+        for zone_id in connection._watched_zones:
+            state = connection._zone_state.get(zone_id, {})
+            if state.get("status") != "ON":
+                continue
+            try:
+                wanted.add(int(state.get("currentsource", 0)))
+            except ValueError:
+                continue
+        wanted.discard(0)
+        return wanted
+
+    def _zone_callback(self, zone_id, name, value) -> None:
+        if name in ("status", "currentsource"):
+            self.refresh()
+
+    def refresh(self) -> None:
+        """Watches newly needed sources and schedules unwatching idle ones."""
+        watched = self._russ.connection._watched_sources
+        wanted = self.wanted_sources()
+
+        for source_id in wanted:
+            handle = self._unwatch_handles.pop(source_id, None)
+            if handle:
+                handle.cancel()
+            if source_id not in watched and source_id not in self._watching:
+                self._watching.add(source_id)
+                self._spawn(self._watch(source_id))
+
+        loop = asyncio.get_running_loop()
+        for source_id in watched - wanted:
+            if source_id not in self._unwatch_handles:
+                self._unwatch_handles[source_id] = loop.call_later(
+                    self._grace, self._unwatch_later, source_id
+                )
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _unwatch_later(self, source_id: int) -> None:
+        self._unwatch_handles.pop(source_id, None)
+        if source_id in self.wanted_sources():
+            return
+        self._spawn(self._unwatch(source_id))
+
+    async def _watch(self, source_id: int) -> None:
+        try:
+            await self._russ.watch_source(source_id)
+            _LOGGER.debug("Watching source %d", source_id)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.debug("Failed to watch source %d: %s", source_id, err)
+        finally:
+            self._watching.discard(source_id)
+        if self._started:
+            # The zone may have moved on while the watch was being set up
+            self.refresh()
+
+    async def _unwatch(self, source_id: int) -> None:
+        if source_id not in self._russ.connection._watched_sources:
+            return
+        try:
+            await self._russ.unwatch_source(source_id)
+            _LOGGER.debug("Stopped watching idle source %d", source_id)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.debug("Failed to unwatch source %d: %s", source_id, err)
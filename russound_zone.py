@@ -1,9 +1,25 @@
 import logging
+from .browse_media import (
+    CONTENT_PRESET,
+    CONTENT_SOURCE,
+    PresetBrowser,
+    parse_content_id,
+)
+from .cover_art import CoverArtCache
 from .russound import Russound
 from .russound_zone_entity import RussoundZoneEntity
 from homeassistant.components.media_player import MediaPlayerEntity
-from .const import DOMAIN as RUSSOUND_DOMAIN
+from .const import (
+    CONF_PRESETS_IN_SOURCE_LIST,
+    DEFAULT_PRESETS_IN_SOURCE_LIST,
+    DOMAIN as RUSSOUND_DOMAIN,
+    EVENT_CONTROLLER_CONNECTED,
+    EVENT_CONTROLLER_UPDATED,
+    SIGNAL_CONTROLLER_EVENT,
+    SOURCE_TYPE_TUNER,
+)
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.device_registry import DeviceInfo
 
 _LOGGER = logging.getLogger(__name__)
@@ -24,6 +40,8 @@ RUSSOUND_FEATURES = (
     | MediaPlayerEntityFeature.TURN_ON
     | MediaPlayerEntityFeature.TURN_OFF
     | MediaPlayerEntityFeature.SELECT_SOURCE
+    | MediaPlayerEntityFeature.BROWSE_MEDIA
+    | MediaPlayerEntityFeature.PLAY_MEDIA
 )
 
 
@@ -66,14 +84,39 @@ class RussoundMediaPlayer(RussoundZoneEntity, MediaPlayerEntity):
     _attr_supported_features = RUSSOUND_FEATURES
 
     def __init__(
-        self, entry: ConfigEntry, russ: Russound, zone_id, name, sources, presets
+        self,
+        entry: ConfigEntry,
+        russ: Russound,
+        zone_id,
+        name,
+        sources,
+        presets,
+        art_cache: CoverArtCache,
+        browser: PresetBrowser,
     ):
         """Initialize the zone device."""
         super().__init__(entry, russ, zone_id, name)
+        self._art_cache = art_cache
+        self._browser = browser
+        # Presets are always reachable through media browsing
+        self._presets_in_source_list = entry.options.get(
+            CONF_PRESETS_IN_SOURCE_LIST, DEFAULT_PRESETS_IN_SOURCE_LIST
+        )
+        self._sources = self._compile_sources(
+            sources, presets, self._presets_in_source_list
+        )
+        self._presets = presets
+        self._callback_count = 0
+
+    @staticmethod
+    def _compile_sources(sources, presets, include_presets=True):
+        """Returns the (source_id, name, preset index) entries of the source
+        list, listing the presets of tuners after the tuner itself when
+        include_presets is set."""
         compliled_sources = []
         for source_id, source_name, source_type in sources:
             compliled_sources.append((source_id, source_name, None))
-            if source_type == "RNET AM/FM Tuner (Internal)":
+            if include_presets and source_type == SOURCE_TYPE_TUNER:
                 for (
                     preset_source_id,
                     bank_id,
@@ -85,9 +128,7 @@ class RussoundMediaPlayer(RussoundZoneEntity, MediaPlayerEntity):
                         compliled_sources.append(
                             (source_id, source_name + ": " + preset_name, index_id)
                         )
-
-        self._sources = compliled_sources
-        self._presets = presets
+        return compliled_sources
 
     def _zone_var(self, name, default=None):
         return self._russ.get_cached_zone_variable(self._zone_id, name, default)
@@ -110,23 +151,55 @@ class RussoundMediaPlayer(RussoundZoneEntity, MediaPlayerEntity):
 
     def _zone_callback_handler(self, zone_id, *args):
         if zone_id == self._zone_id:
+            self._callback_count += 1
             self.schedule_update_ha_state()
 
     def _source_callback_handler(self, source_id, *args):
         current = int(self._zone_var("currentsource", 0))
         if source_id == current:
+            self._callback_count += 1
             self.schedule_update_ha_state()
 
+    async def _controller_event_handler(self, event: str, *args) -> None:
+        if event == EVENT_CONTROLLER_UPDATED:
+            # More of the source and preset catalog is known
+            self._sources = self._compile_sources(
+                self._russ.sources, self._russ.presets, self._presets_in_source_list
+            )
+            self._presets = self._russ.presets
+            self.async_write_ha_state()
+            return
+        await self._update_connection_state(event == EVENT_CONTROLLER_CONNECTED)
+
     async def async_added_to_hass(self):
         """Register callback handlers."""
         self._russ.add_zone_callback(self._zone_callback_handler)
         self._russ.add_source_callback(self._source_callback_handler)
+        self._signals = [
+            self._russ.dispatcher.connect(
+                SIGNAL_CONTROLLER_EVENT, self._controller_event_handler
+            )
+        ]
+
+    async def async_will_remove_from_hass(self):
+        """Unregister callback handlers."""
+        self._russ.remove_zone_callback(self._zone_callback_handler)
+        self._russ.remove_source_callback(None, self._source_callback_handler)
+        for signal in self._signals:
+            signal.disconnect()
+        self._signals.clear()
 
     @property
     def should_poll(self):
         """No polling needed."""
         return False
 
+    @property
+    def callback_count(self) -> int:
+        """Number of changes of its zone or current source this entity has
+        handled."""
+        return self._callback_count
+
     #
     #
     #
@@ -225,6 +298,13 @@ class RussoundMediaPlayer(RussoundZoneEntity, MediaPlayerEntity):
         """Image url of current playing media."""
         return self._source_na_var("coverarturl")
 
+    async def async_get_media_image(self) -> tuple[bytes | None, str | None]:
+        """Fetch the cover art through the cache shared by all zones."""
+        url = self.media_image_url
+        if url is None:
+            return None, None
+        return await self._art_cache.async_get(url)
+
     @property
     def volume_level(self):
         """Volume level of the media player (0..1).
@@ -295,14 +375,36 @@ class RussoundMediaPlayer(RussoundZoneEntity, MediaPlayerEntity):
                 )
                 break
             else:
-                await self._russ.send_zone_event(
-                    self._zone_id, "SelectSource", source_id
-                )
-                await self._russ.send_zone_event(
-                    self._zone_id, "RestorePreset", preset_id
+                await self._russ.send_zone_events(
+                    self._zone_id,
+                    ("SelectSource", source_id),
+                    ("RestorePreset", preset_id),
                 )
                 break
 
+    async def async_browse_media(
+        self, media_content_type: str | None = None, media_content_id: str | None = None
+    ) -> BrowseMedia:
+        """Browse the sources and the presets of the tuners."""
+        return self._browser.browse(media_content_id)
+
+    async def async_play_media(self, media_type: str, media_id: str, **kwargs) -> None:
+        """Select a source, or a tuner preset, from the browse tree."""
+        kind, ids = parse_content_id(media_id)
+        if kind == CONTENT_SOURCE and len(ids) == 1:
+            await self._russ.send_zone_event(self._zone_id, "SelectSource", ids[0])
+            return
+        if kind == CONTENT_PRESET and len(ids) == 3:
+            preset = self._browser.find_preset(*ids)
+            if preset is not None:
+                await self._russ.send_zone_events(
+                    self._zone_id,
+                    ("SelectSource", preset[0]),
+                    ("RestorePreset", preset[3]),
+                )
+                return
+        raise HomeAssistantError(f"Unknown media {media_id}")
+
     async def async_media_next_track(self):
         """Next Track."""
         """_LOGGER.warning("trying to execute next track")"""
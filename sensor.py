@@ -0,0 +1,126 @@
+"""Diagnostic sensors exposing the load on the Russound RIO connection."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+import logging
+
+from homeassistant.components.sensor import (
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN as RUSSOUND_DOMAIN
+from .rio.connection import Connection
+from .russound import Russound
+from .russound_entity import RussoundEntity
+
+_LOGGER = logging.getLogger(__name__)
+
+# Metrics are sampled from in-memory counters, the connection itself is never
+# touched by an update.
+SCAN_INTERVAL = timedelta(seconds=30)
+
+
+def _latency_ms(kind: str) -> Callable[[Connection], float | None]:
+    def value(connection: Connection) -> float | None:
+        latency = connection.metrics.latency_percentile(kind, 95)
+        return None if latency is None else round(latency * 1000.0, 1)
+
+    return value
+
+
+@dataclass(frozen=True, kw_only=True)
+class RussoundSensorEntityDescription(SensorEntityDescription):
+    """Describes a Russound connection metric sensor."""
+
+    value_fn: Callable[[Connection], float | int | None]
+
+
+SENSORS: tuple[RussoundSensorEntityDescription, ...] = (
+    RussoundSensorEntityDescription(
+        key="queue_depth",
+        name="Command queue depth",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda connection: connection.metrics.queue_depth,
+    ),
+    RussoundSensorEntityDescription(
+        key="queue_depth_max",
+        name="Command queue depth peak",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda connection: connection.metrics.queue_depth_max,
+    ),
+    RussoundSensorEntityDescription(
+        key="inbound_rate",
+        name="Inbound lines per second",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="lines/s",
+        value_fn=lambda connection: round(connection.metrics.inbound_rate(), 2),
+    ),
+    RussoundSensorEntityDescription(
+        key="parse_failures",
+        name="Parse failures",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda connection: connection.metrics.parse_failures,
+    ),
+    RussoundSensorEntityDescription(
+        key="command_rate",
+        name="Command rate budget",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="commands/s",
+        value_fn=lambda connection: round(connection.pacer.rate, 1),
+    ),
+    *(
+        RussoundSensorEntityDescription(
+            key=f"{kind.lower()}_latency_p95",
+            name=f"{kind} latency p95",
+            state_class=SensorStateClass.MEASUREMENT,
+            native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+            value_fn=_latency_ms(kind),
+        )
+        for kind in ("GET", "SET", "WATCH", "EVENT")
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities
+):
+    """Set up the metric sensors from a config entry."""
+    controller: Russound = hass.data[RUSSOUND_DOMAIN][entry.entry_id]
+    async_add_entities(
+        RussoundMetricSensor(entry, controller, description) for description in SENSORS
+    )
+
+
+class RussoundMetricSensor(RussoundEntity, SensorEntity):
+    """Sensor reporting a single connection metric of the amp."""
+
+    entity_description: RussoundSensorEntityDescription
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_should_poll = True
+
+    def __init__(
+        self,
+        entry: ConfigEntry,
+        russ: Russound,
+        description: RussoundSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(entry)
+        self._russ = russ
+        self.entity_description = description
+        self._attr_unique_id = f"{self._unique_id} - {description.key}"
+
+    @property
+    def native_value(self) -> float | int | None:
+        """Return the current value of the metric."""
+        return self.entity_description.value_fn(self._russ.connection)
@@ -0,0 +1,64 @@
+"""Persistence of the last known zone and source state across restarts."""
+
+from __future__ import annotations
+
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, STORAGE_SAVE_DELAY, STORAGE_VERSION
+from .rio.client import RussoundClient
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RussoundStateStore:
+    """Snapshots the state cache of a client's connection to local storage.
+
+    The snapshot is loaded into the cache before the controller is reached,
+    so entities show their last known state right away. Changes are written
+    behind, at most once every STORAGE_SAVE_DELAY seconds.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, client: RussoundClient):
+        self._client = client
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self._save_scheduled = False
+
+    async def async_restore(self) -> None:
+        """Loads the last snapshot into the cache of the connection."""
+        data = await self._store.async_load()
+        if not data:
+            return
+        try:
+            restored = self._client.connection.restore(data)
+        except (AttributeError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring unreadable state snapshot: %s", err)
+            return
+        _LOGGER.debug("Restored %d cached values", restored)
+
+    def start(self) -> None:
+        """Starts saving changes of the cache."""
+        self._client.add_zone_callback(self._on_change)
+        self._client.add_source_callback(self._on_change)
+
+    async def async_stop(self) -> None:
+        """Stops saving changes and writes the snapshot one last time."""
+        self._client.remove_zone_callback(self._on_change)
+        self._client.remove_source_callback(None, self._on_change)
+        await self._store.async_save(self._data_to_save())
+
+    @callback
+    def _on_change(self, target, name, value) -> None:
+        # A steady stream of changes must not keep postponing the write, so
+        # only the first change since the last write schedules one
+        if self._save_scheduled:
+            return
+        self._save_scheduled = True
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        self._save_scheduled = False
+        return self._client.connection.snapshot()
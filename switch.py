@@ -0,0 +1,48 @@
+"""Switch entities for the audio settings of a zone."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.switch import SwitchEntity, SwitchEntityDescription
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .zone_settings import RussoundZoneSettingEntity, async_setup_zone_settings
+
+SWITCHES: tuple[SwitchEntityDescription, ...] = (
+    SwitchEntityDescription(
+        key="loudness",
+        name="Loudness",
+        icon="mdi:equalizer",
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities
+):
+    """Set up the zone setting switches from a config entry."""
+    await async_setup_zone_settings(
+        hass, entry, async_add_entities, SWITCHES, RussoundZoneSwitch
+    )
+
+
+class RussoundZoneSwitch(RussoundZoneSettingEntity, SwitchEntity):
+    """An on/off audio setting of a zone."""
+
+    entity_description: SwitchEntityDescription
+
+    @property
+    def is_on(self) -> bool | None:
+        """Return the setting from the cache."""
+        value = self._cached_value
+        return None if value is None else value == "ON"
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        """Turn the setting on."""
+        await self._async_set("ON")
+
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        """Turn the setting off."""
+        await self._async_set("OFF")
@@ -0,0 +1,66 @@
+"""Helpers of the tests driving the RIO client against the simulator."""
+
+import asyncio
+import time
+
+from russound_rio.rio.client import RussoundClient
+from russound_rio.rio.connection import Connection
+from russound_rio.rio.dispatcher import Dispatcher
+from russound_rio.rio.simulator import RioSimulator
+
+# Longest wait for the client to catch up with the simulator, in seconds
+WAIT_TIMEOUT = 10.0
+
+
+async def wait_for(predicate, what: str) -> None:
+    """Waits until predicate() is true, failing after WAIT_TIMEOUT."""
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while not predicate():
+        assert time.monotonic() < deadline, "Timed out waiting for %s" % (what,)
+        await asyncio.sleep(0.01)
+
+
+def run_with_simulator(test, **simulator_args):
+    """Runs test(simulator) on a new event loop, with a simulator listening
+    on a free local port."""
+
+    async def main():
+        simulator = RioSimulator(**simulator_args)
+        await simulator.start()
+        try:
+            await test(simulator)
+        finally:
+            await simulator.close()
+
+    asyncio.run(main())
+
+
+async def connect(simulator: RioSimulator, **connect_args) -> Connection:
+    """Returns a connection to the simulator, without keepalive unless asked
+    for."""
+    connect_args.setdefault("keepalive_interval", None)
+    connection = Connection(Dispatcher(), "127.0.0.1", simulator.port)
+    await connection.connect("127.0.0.1", simulator.port, **connect_args)
+    return connection
+
+
+async def connect_client(simulator: RioSimulator, **client_args) -> RussoundClient:
+    """Returns a client connected to the simulator, without keepalive."""
+    client = RussoundClient(
+        "127.0.0.1", simulator.port, keepalive_interval=None, **client_args
+    )
+    await client.connect()
+    return client
+
+
+def run_with_client(test, client_args=None, **simulator_args):
+    """Runs test(client, simulator) with a client connected to a simulator."""
+
+    async def main(simulator):
+        client = await connect_client(simulator, **(client_args or {}))
+        try:
+            await test(client, simulator)
+        finally:
+            await client.disconnect()
+
+    run_with_simulator(main, **simulator_args)
@@ -0,0 +1,21 @@
+"""Makes the integration importable as a package without Home Assistant.
+
+The integration's __init__ needs Home Assistant, so the package is
+registered with its path only, under the name of its directory, which is
+what pytest imports when it sets up the directory, and as russound_rio, the
+name the tests import the modules under test from.
+"""
+
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+package = sys.modules.get("russound_rio")
+if package is None:
+    package = types.ModuleType("russound_rio")
+    package.__file__ = os.path.join(ROOT, "__init__.py")
+    package.__path__ = [ROOT]
+    sys.modules["russound_rio"] = package
+sys.modules.setdefault(os.path.basename(ROOT), package)
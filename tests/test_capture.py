@@ -0,0 +1,74 @@
+"""Tests of traffic capture and replay."""
+
+import asyncio
+
+import pytest
+
+from common import connect, run_with_simulator, wait_for
+from russound_rio.rio.capture import CaptureError, CaptureReader, CaptureWriter, replay
+from russound_rio.rio.connection import ZoneID
+from russound_rio.rio.const import CAPTURE_INBOUND, CAPTURE_OUTBOUND
+
+ZONE = ZoneID(1, 1)
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "traffic.cap")
+    records = [
+        (CAPTURE_OUTBOUND, b"GET C[1].Z[1].volume\r"),
+        (CAPTURE_INBOUND, b'S C[1].Z[1].volume="10"\r\n'),
+    ]
+    writer = CaptureWriter(path)
+    for direction, payload in records:
+        writer.write(direction, payload)
+    writer.close()
+    # A record cut short by an interrupted recording is left out
+    with open(path, "ab") as file:
+        file.write(b"\x00\x01")
+
+    with CaptureReader(path) as reader:
+        assert [(d, bytes(p)) for _, d, p in reader] == records
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.txt"
+    path.write_bytes(b"not a capture file")
+    with pytest.raises(CaptureError):
+        CaptureReader(str(path))
+
+
+def test_replay_rebuilds_the_cache(tmp_path):
+    path = str(tmp_path / "traffic.cap")
+
+    async def test(simulator):
+        connection = await connect(simulator)
+        try:
+            connection.start_capture(path)
+            await connection._send_cmd("WATCH %s ON" % (ZONE.device_str(),))
+            simulator.set(ZONE.device_str(), "volume", 30)
+            await wait_for(
+                lambda: connection._zone_state.get(ZONE, {}).get("volume") == "30",
+                "the notification",
+            )
+            recorded = dict(connection._zone_state[ZONE])
+        finally:
+            connection.stop_capture()
+            await connection.disconnect()
+
+        stats = await replay(path)
+        assert stats.outbound == 1
+        assert stats.inbound == len(recorded) + 2
+        assert stats.errors == 0
+
+        changes = []
+        replayed = await connect(simulator)
+        try:
+            replayed._zone_callbacks.append(lambda *args: changes.append(args))
+            await replay(path, replayed)
+            await asyncio.sleep(0)
+            assert replayed._zone_state[ZONE] == recorded
+            assert (ZONE, "volume", "30") in changes
+        finally:
+            await replayed.disconnect()
+
+    run_with_simulator(test)
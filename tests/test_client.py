@@ -0,0 +1,206 @@
+"""Tests of the RIO client against the simulated controller."""
+
+import asyncio
+
+import pytest
+
+from common import run_with_client, wait_for
+from russound_rio.rio import connection as connection_module
+from russound_rio.rio.connection import CommandException, ZoneID
+
+ZONE = ZoneID(1, 1)
+DEVICE = ZONE.device_str()
+OTHER_ZONE = ZoneID(2, 1)
+
+
+def test_resync_after_drop():
+    async def test(client, simulator):
+        await client.watch_zone(ZONE)
+        simulator.drop_sessions()
+        # Made while disconnected, only the resync brings it in
+        simulator.set(DEVICE, "volume", 25)
+        await wait_for(
+            lambda: (
+                client.is_connected
+                and client.get_cached_zone_variable(ZONE, "volume") == "25"
+            ),
+            "the resync",
+        )
+        assert simulator.sessions == 1
+
+    run_with_client(test)
+
+
+def test_redundant_commands_are_elided():
+    async def test(client, simulator):
+        await client.watch_zone(ZONE)
+        await wait_for(
+            lambda: client.get_cached_zone_variable(ZONE, "volume") == "10",
+            "the watched state",
+        )
+        sets = simulator.received["SET"]
+        await client.set_zone_variable(ZONE, "volume", 10)
+        assert simulator.received["SET"] == sets
+        assert client.connection.metrics.elided == 1
+
+        await client.set_zone_variable(ZONE, "volume", 15)
+        assert simulator.received["SET"] == sets + 1
+        assert simulator.get(DEVICE, "volume") == "15"
+
+        # Selecting the current source also turns the zone on
+        await client.send_zone_event(ZONE, "SelectSource", 1)
+        assert simulator.received["EVENT"] == 1
+        assert simulator.get(DEVICE, "status") == "ON"
+
+    run_with_client(test, {"elide_commands": True})
+
+
+def test_provisional_value_settled_by_notification(monkeypatch):
+    monkeypatch.setattr(connection_module, "PROVISIONAL_TIMEOUT", 0.05)
+
+    async def test(client, simulator):
+        connection = client.connection
+        await client.watch_zone(ZONE)
+        await wait_for(
+            lambda: client.get_cached_zone_variable(ZONE, "volume") == "10",
+            "the watched state",
+        )
+        # A command succeeded, its notification is still on the way
+        connection._store_provisional_zone_variable(ZONE, "volume", "15")
+        assert connection.is_provisional_zone_variable(ZONE, "volume")
+        simulator.set(DEVICE, "volume", 15)
+        await wait_for(
+            lambda: not connection.is_provisional_zone_variable(ZONE, "volume"),
+            "the notification",
+        )
+        await asyncio.sleep(0.1)
+        assert client.get_cached_zone_variable(ZONE, "volume") == "15"
+
+    run_with_client(test)
+
+
+def test_provisional_value_read_back(monkeypatch):
+    monkeypatch.setattr(connection_module, "PROVISIONAL_TIMEOUT", 0.05)
+
+    async def test(client, simulator):
+        connection = client.connection
+        # Not watched, so no notification confirms the change
+        await client.set_zone_variable(OTHER_ZONE, "volume", 15)
+        assert connection.is_provisional_zone_variable(OTHER_ZONE, "volume")
+        gets = simulator.received["GET"]
+        await wait_for(
+            lambda: not connection.is_provisional_zone_variable(OTHER_ZONE, "volume"),
+            "the read back",
+        )
+        assert simulator.received["GET"] == gets + 1
+        assert client.get_cached_zone_variable(OTHER_ZONE, "volume") == "15"
+
+    run_with_client(test)
+
+
+def test_provisional_value_rolled_back(monkeypatch):
+    monkeypatch.setattr(connection_module, "PROVISIONAL_TIMEOUT", 0.05)
+
+    async def test(client, simulator):
+        connection = client.connection
+        assert await client.get_zone_variable(OTHER_ZONE, "volume") == "10"
+        await client.set_zone_variable(OTHER_ZONE, "volume", 15)
+        assert client.get_cached_zone_variable(OTHER_ZONE, "volume") == "15"
+        # The read back is refused
+        simulator.busy = 1
+        await wait_for(
+            lambda: not connection.is_provisional_zone_variable(OTHER_ZONE, "volume"),
+            "the read back",
+        )
+        assert client.get_cached_zone_variable(OTHER_ZONE, "volume") == "10"
+
+    run_with_client(test)
+
+
+def test_read_through_cache_expires(monkeypatch):
+    monkeypatch.setattr(connection_module, "DEFAULT_CACHE_TTL", 0.1)
+
+    async def test(client, simulator):
+        gets = simulator.received["GET"]
+        assert await client.get_zone_variable(OTHER_ZONE, "volume") == "10"
+        simulator.set(OTHER_ZONE.device_str(), "volume", 20)
+        assert await client.get_zone_variable(OTHER_ZONE, "volume") == "10"
+        assert simulator.received["GET"] == gets + 1
+        await asyncio.sleep(0.15)
+        assert await client.get_zone_variable(OTHER_ZONE, "volume") == "20"
+        assert simulator.received["GET"] == gets + 2
+
+    run_with_client(test)
+
+
+def test_error_replies_are_cached(monkeypatch):
+    monkeypatch.setattr(connection_module, "NEGATIVE_CACHE_TTL", 0.1)
+
+    async def test(client, simulator):
+        gets = simulator.received["GET"]
+        for _ in range(2):
+            with pytest.raises(CommandException):
+                await client.get_zone_variable(OTHER_ZONE, "unknown")
+        assert simulator.received["GET"] == gets + 1
+        assert client.connection.metrics.negative_hits == 1
+        await asyncio.sleep(0.15)
+        with pytest.raises(CommandException):
+            await client.get_zone_variable(OTHER_ZONE, "unknown")
+        assert simulator.received["GET"] == gets + 2
+
+    run_with_client(test)
+
+
+def test_concurrent_reads_share_a_request():
+    async def test(client, simulator):
+        gets = simulator.received["GET"]
+        values = await asyncio.gather(
+            *(client.get_zone_variable(OTHER_ZONE, "name") for _ in range(5))
+        )
+        assert values == ["Zone 1-2"] * 5
+        assert simulator.received["GET"] == gets + 1
+        assert client.connection.metrics.shared_requests == 4
+
+    run_with_client(test)
+
+
+def test_discover_and_watch():
+    async def test(client, simulator):
+        zones = []
+        async for zone_id, name in client.discover_zones():
+            if not zones:
+                # Only timed once the caller made the zone usable
+                assert client.discovery_timing["first_zone"] is None
+            await client.watch_zone(zone_id)
+            client.zone_usable()
+            zones.append((zone_id, name))
+        assert zones == [(ZoneID(zone, 1), "Zone 1-%d" % zone) for zone in (1, 2, 3)]
+        assert client.discovery_timing["first_zone"] is not None
+
+        await wait_for(
+            lambda: client.get_cached_zone_variable(ZONE, "status") == "OFF",
+            "the watched state",
+        )
+        simulator.set(DEVICE, "volume", 30)
+        await wait_for(
+            lambda: client.get_cached_zone_variable(ZONE, "volume") == "30",
+            "the notification",
+        )
+
+    run_with_client(test, zones=3)
+
+
+def test_notifications_are_coalesced():
+    async def test(client, simulator):
+        await client.watch_source(1)
+        for song in range(50):
+            simulator.set("S[1]", "songName", "Song %d" % (song,))
+        await wait_for(
+            lambda: client.get_cached_source_variable(1, "songname") == "Song 49",
+            "the last song",
+        )
+        metrics = client.connection.metrics
+        assert metrics.superseded > 0
+        assert metrics.superseded_variables["songname"] == metrics.superseded
+
+    run_with_client(test)
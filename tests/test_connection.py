@@ -0,0 +1,143 @@
+"""Tests of the RIO connection against the simulated controller."""
+
+import asyncio
+import json
+
+from common import connect, run_with_simulator, wait_for
+from russound_rio.rio.connection import Connection, ZoneID
+from russound_rio.rio.dispatcher import Dispatcher
+from russound_rio.rio.metrics import (
+    SUPERSEDED_OTHER,
+    SUPERSEDED_VARIABLES_MAX,
+    ConnectionMetrics,
+)
+
+ZONE = ZoneID(1, 1)
+
+
+def test_keepalive_probes_idle_link():
+    async def test(simulator):
+        connection = await connect(
+            simulator, keepalive_interval=0.05, keepalive_timeout=1.0
+        )
+        try:
+            await wait_for(lambda: simulator.received["GET"] >= 2, "keepalive probes")
+            assert connection.metrics.keepalive_missed == 0
+            assert connection.is_connected()
+        finally:
+            await connection.disconnect()
+
+    run_with_simulator(test)
+
+
+def test_keepalive_drops_dead_link():
+    async def test(simulator):
+        connection = await connect(
+            simulator, keepalive_interval=0.05, keepalive_timeout=0.1
+        )
+        try:
+            # The controller stops answering in time
+            simulator.latency = 1.0
+            await wait_for(lambda: not connection.is_connected(), "the link to drop")
+            assert connection.metrics.keepalive_missed == 1
+        finally:
+            await connection.disconnect()
+
+    run_with_simulator(test)
+
+
+def test_keepalive_survives_command_timeout(monkeypatch):
+    send_cmd = Connection._send_cmd
+    probes = []
+
+    async def timing_out_once(self, cmd, *args, **kwargs):
+        probes.append(cmd)
+        if len(probes) == 1:
+            raise asyncio.TimeoutError
+        return await send_cmd(self, cmd, *args, **kwargs)
+
+    monkeypatch.setattr(Connection, "_send_cmd", timing_out_once)
+
+    async def test(simulator):
+        connection = await connect(
+            simulator, keepalive_interval=0.05, keepalive_timeout=1.0
+        )
+        try:
+            await wait_for(lambda: len(probes) >= 2, "the next probe")
+            assert connection.metrics.keepalive_missed == 0
+        finally:
+            await connection.disconnect()
+
+    run_with_simulator(test)
+
+
+async def watch(connection, zone_id):
+    """Watches a zone and waits for its state to be cached."""
+    await connection._send_cmd("WATCH %s ON" % (zone_id.device_str(),))
+    connection._watched_zones.add(zone_id)
+    await wait_for(
+        lambda: "turnonvolume" in connection._zone_state.get(zone_id, {}),
+        "the watched state",
+    )
+
+
+def test_snapshot_and_restore():
+    async def test(simulator):
+        connection = await connect(simulator)
+        try:
+            await watch(connection, ZONE)
+            # Awaiting confirmation, saved as it was before the command
+            connection._store_provisional_zone_variable(ZONE, "volume", "15")
+            snapshot = json.loads(json.dumps(connection.snapshot()))
+        finally:
+            await connection.disconnect()
+        assert snapshot["zones"]["1:1"]["volume"] == "10"
+        assert snapshot["zones"]["1:1"]["currentsource"] == "1"
+
+        restored = Connection(Dispatcher(), "127.0.0.1", simulator.port)
+        changes = []
+        restored._zone_callbacks.append(lambda *args: changes.append(args))
+        assert restored.restore(snapshot) == len(snapshot["zones"]["1:1"])
+        assert changes == []
+        assert restored._zone_state[ZONE]["volume"] == "10"
+        assert restored.is_stale_zone_variable(ZONE, "volume")
+        # Values already cached are kept
+        assert restored.restore(snapshot) == 0
+
+        # Changed while the integration was away
+        simulator.set(ZONE.device_str(), "volume", 25)
+        await restored.connect("127.0.0.1", simulator.port, keepalive_interval=None)
+        try:
+            await watch(restored, ZONE)
+            await wait_for(lambda: restored.stale_count == 0, "the confirmations")
+            # Only the change reaches the callbacks
+            assert changes == [(ZONE, "volume", "25")]
+        finally:
+            await restored.disconnect()
+
+    run_with_simulator(test)
+
+
+def test_reply_supersedes_pending_notification():
+    async def test():
+        connection = Connection(Dispatcher(), None, None)
+        connection._process_response(
+            b'N %s.volume="10"' % (ZONE.device_str().encode(),), coalesce=True
+        )
+        # The reply was sent after the notification, so it holds the newer value
+        connection._process_response(
+            b'S %s.volume="20"' % (ZONE.device_str().encode(),)
+        )
+        connection._flush_inbound()
+        assert connection._zone_state[ZONE]["volume"] == "20"
+
+    asyncio.run(test())
+
+
+def test_superseded_counts_are_bounded():
+    metrics = ConnectionMetrics()
+    for index in range(SUPERSEDED_VARIABLES_MAX + 10):
+        metrics.record_superseded("variable%d" % (index,))
+    assert len(metrics.superseded_variables) == SUPERSEDED_VARIABLES_MAX + 1
+    assert metrics.superseded_variables[SUPERSEDED_OTHER] == 10
+    assert metrics.superseded == SUPERSEDED_VARIABLES_MAX + 10
@@ -0,0 +1,117 @@
+"""Tests of the cover art cache against a local HTTP server."""
+
+import asyncio
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web  # noqa: E402
+
+from russound_rio.cover_art import CoverArtCache  # noqa: E402
+
+IMAGE = b"\x89PNG cover art"
+ETAG = '"art-1"'
+
+
+class ArtServer:
+    """Serves one image with an ETag, answering conditional requests."""
+
+    def __init__(self):
+        self.requests = 0
+        self.conditional = 0
+        self.fail = False
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.fail:
+            return web.Response(status=500)
+        if request.headers.get("If-None-Match") == ETAG:
+            self.conditional += 1
+            return web.Response(status=304)
+        return web.Response(
+            body=IMAGE, content_type="image/png", headers={"ETag": ETAG}
+        )
+
+
+def run(test, **cache_args):
+    """Runs test(cache, server, url) with a cache in front of a local server."""
+
+    async def main():
+        server = ArtServer()
+        app = web.Application()
+        app.router.add_get("/art.png", server.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        try:
+            async with aiohttp.ClientSession() as session:
+                cache = CoverArtCache(session, **cache_args)
+                await test(cache, server, "http://127.0.0.1:%d/art.png" % (port,))
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(main())
+
+
+def test_miss_then_hit():
+    async def test(cache, server, url):
+        assert await cache.async_get(url) == (IMAGE, "image/png")
+        assert await cache.async_get(url) == (IMAGE, "image/png")
+        assert server.requests == 1
+        assert (cache.misses, cache.hits) == (1, 1)
+        assert cache.as_dict()["bytes"] == len(IMAGE)
+
+    run(test)
+
+
+def test_concurrent_requests_share_a_download():
+    async def test(cache, server, url):
+        results = await asyncio.gather(*(cache.async_get(url) for _ in range(3)))
+        assert results == [(IMAGE, "image/png")] * 3
+        assert server.requests == 1
+        assert cache.shared_requests == 2
+
+    run(test)
+
+
+def test_expired_entry_is_revalidated():
+    async def test(cache, server, url):
+        await cache.async_get(url)
+        assert await cache.async_get(url) == (IMAGE, "image/png")
+        assert server.conditional == 1
+        assert cache.revalidated == 1
+        assert cache.hits == 0
+
+    run(test, revalidate_after=0)
+
+
+def test_error_keeps_cached_copy():
+    async def test(cache, server, url):
+        await cache.async_get(url)
+        server.fail = True
+        assert await cache.async_get(url) == (IMAGE, "image/png")
+        assert cache.errors == 1
+
+    run(test, revalidate_after=0)
+
+
+def test_error_without_copy():
+    async def test(cache, server, url):
+        server.fail = True
+        assert await cache.async_get(url) == (None, None)
+        assert cache.errors == 1
+        assert cache.as_dict()["entries"] == 0
+
+    run(test)
+
+
+def test_eviction_by_count():
+    async def test(cache, server, url):
+        await cache.async_get(url)
+        await cache.async_get(url + "?other")
+        assert cache.evictions == 1
+        assert cache.as_dict()["entries"] == 1
+
+    run(test, max_entries=1)
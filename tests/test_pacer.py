@@ -0,0 +1,58 @@
+"""Tests of the adaptive command pacing against the simulated controller."""
+
+import asyncio
+
+import pytest
+
+from common import connect, run_with_simulator, wait_for
+from russound_rio.rio.connection import CommandException, ZoneID
+from russound_rio.rio.pacer import RATE_DECREASE, RATE_INCREASE
+
+ZONE = ZoneID(1, 1)
+
+
+def test_backs_off_after_errors_and_recovers():
+    async def test(simulator):
+        connection = await connect(simulator)
+        pacer = connection.pacer
+        try:
+            rate = pacer.rate
+            simulator.busy = 3
+            for _ in range(3):
+                with pytest.raises(CommandException):
+                    await connection._send_cmd("GET VERSION")
+            # A burst of errors halves the rate once
+            assert pacer.decreases == 1
+            assert pacer.rate == rate * RATE_DECREASE
+
+            for _ in range(10):
+                await connection._send_cmd("GET VERSION")
+            assert pacer.rate == rate * RATE_DECREASE + 10 * RATE_INCREASE
+        finally:
+            await connection.disconnect()
+
+    run_with_simulator(test)
+
+
+def test_notifications_flow_while_paced():
+    async def test(simulator):
+        connection = await connect(simulator)
+        try:
+            await connection._send_cmd("WATCH %s ON" % (ZONE.device_str(),))
+            connection.pacer.rate = 2.0
+            connection.pacer.burst = 1.0
+            await connection._send_cmd("GET VERSION")
+            # Held back by the pacer for half a second
+            paced = asyncio.ensure_future(connection._send_cmd("GET VERSION"))
+            simulator.set(ZONE.device_str(), "volume", 30)
+            await wait_for(
+                lambda: connection._zone_state.get(ZONE, {}).get("volume") == "30",
+                "the notification",
+            )
+            assert connection.pacer.throttled >= 1
+            assert not paced.done()
+            await paced
+        finally:
+            await connection.disconnect()
+
+    run_with_simulator(test)
@@ -0,0 +1,75 @@
+"""Tests of the pool of secondary connections for bulk reads."""
+
+import socket
+
+from common import connect, run_with_simulator, wait_for
+from russound_rio.rio.pool import ConnectionPool
+
+DEVICE = "C[1].Z[1]"
+
+
+def unused_port() -> int:
+    """Returns a local port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_with_pool(test, **pool_args):
+    """Runs test(pool, primary, simulator) with a pool of one connection."""
+
+    async def main(simulator):
+        primary = await connect(simulator)
+        pool = ConnectionPool(primary, 1, **pool_args)
+        try:
+            await test(pool, primary, simulator)
+        finally:
+            await pool.close()
+            await primary.disconnect()
+
+    run_with_simulator(main)
+
+
+def test_lends_a_secondary_connection():
+    async def test(pool, primary, simulator):
+        async with pool.connection() as connection:
+            assert connection is not primary
+            assert simulator.sessions == 2
+            await connection._send_cmd("GET %s.volume" % (DEVICE,))
+        # Reused while idle
+        async with pool.connection() as reused:
+            assert reused is connection
+        assert pool.opened == 1
+        assert pool.as_dict()["idle"] == 1
+
+    run_with_pool(test)
+
+
+def test_falls_back_to_the_primary():
+    async def test(pool, primary, simulator):
+        port, primary._port = primary._port, unused_port()
+        for _ in range(2):
+            async with pool.connection() as connection:
+                assert connection is primary
+        # Not tried again while cooling off
+        assert pool.failures == 1
+        assert pool.cooling_off
+
+        primary._port = port
+        await wait_for(lambda: not pool.cooling_off, "the end of the cool-off")
+        async with pool.connection() as connection:
+            assert connection is not primary
+        assert pool.opened == 1
+
+    run_with_pool(test, retry_delay=0.2)
+
+
+def test_closes_idle_connections():
+    async def test(pool, primary, simulator):
+        async with pool.connection() as connection:
+            assert connection is not primary
+        await wait_for(lambda: simulator.sessions == 1, "the idle connection to close")
+        assert not connection.is_connected()
+        assert pool.as_dict()["idle"] == 0
+
+    run_with_pool(test, idle_timeout=0.05)
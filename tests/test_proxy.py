@@ -0,0 +1,108 @@
+"""Tests of the RIO proxy between the simulated controller and raw clients."""
+
+import asyncio
+
+import pytest
+
+from common import run_with_simulator, wait_for
+from russound_rio.rio.proxy import RioProxy
+
+DEVICE = "C[1].Z[1]"
+
+
+class RawClient:
+    """A RIO session to the proxy, as a third party client would open."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, proxy: RioProxy) -> "RawClient":
+        return cls(*await asyncio.open_connection("127.0.0.1", proxy.port))
+
+    def send(self, cmd: str) -> None:
+        self.writer.write(bytearray(cmd + "\r", "utf-8"))
+
+    async def expect(self, line: str) -> list[str]:
+        """Reads lines up to the given one, returns the lines read before it."""
+        lines = []
+        while True:
+            received = await asyncio.wait_for(self.reader.readline(), 5.0)
+            assert received, "Connection closed while waiting for %s" % (line,)
+            received = received.decode().strip()
+            if received == line:
+                return lines
+            lines.append(received)
+
+    async def expect_nothing(self) -> None:
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(self.reader.readline(), 0.1)
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def run_with_proxy(test):
+    """Runs test(proxy, simulator) with a proxy in front of a simulator."""
+
+    async def main(simulator):
+        proxy = RioProxy("127.0.0.1", simulator.port, "127.0.0.1", 0)
+        await proxy.start()
+        try:
+            await test(proxy, simulator)
+        finally:
+            await proxy.close()
+
+    run_with_simulator(main, zones=2)
+
+
+def test_watches_are_shared_and_reference_counted():
+    async def test(proxy, simulator):
+        first = await RawClient.open(proxy)
+        second = await RawClient.open(proxy)
+        watches = simulator.received["WATCH"]
+
+        for client in (first, second):
+            client.send("WATCH %s ON" % (DEVICE,))
+            await client.expect("S")
+            # The watch state is replayed from the cache, in the controller's
+            # spelling
+            await client.expect('N %s.currentSource="1"' % (DEVICE,))
+        assert simulator.received["WATCH"] == watches + 1
+
+        simulator.set(DEVICE, "volume", 30)
+        for client in (first, second):
+            await client.expect('N %s.volume="30"' % (DEVICE,))
+
+        first.send("WATCH %s OFF" % (DEVICE,))
+        await first.expect("S")
+        assert simulator.received["WATCH"] == watches + 1
+        simulator.set(DEVICE, "volume", 31)
+        await second.expect('N %s.volume="31"' % (DEVICE,))
+        await first.expect_nothing()
+
+        # The upstream watch ends with the last client watching
+        await second.close()
+        await wait_for(
+            lambda: simulator.received["WATCH"] == watches + 2, "the upstream unwatch"
+        )
+        assert proxy.clients == 1
+        await first.close()
+
+    run_with_proxy(test)
+
+
+def test_gets_are_answered_from_the_cache():
+    async def test(proxy, simulator):
+        client = await RawClient.open(proxy)
+        client.send("WATCH %s ON" % (DEVICE,))
+        await client.expect('N %s.turnOnVolume="20"' % (DEVICE,))
+        gets = simulator.received["GET"]
+        client.send("GET %s.volume" % (DEVICE,))
+        await client.expect('S %s.volume="10"' % (DEVICE,))
+        assert simulator.received["GET"] == gets
+        await client.close()
+
+    run_with_proxy(test)
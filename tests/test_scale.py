@@ -0,0 +1,25 @@
+"""Tests of the scale test on a reduced simulated system."""
+
+import asyncio
+
+import pytest
+
+from russound_rio.rio.scale import check_budgets, run_scale
+
+
+@pytest.mark.parametrize("bulk_connections", [0, 2])
+def test_reduced_system_within_budgets(bulk_connections):
+    report = asyncio.run(
+        run_scale(
+            controllers=1,
+            zones=4,
+            sources=2,
+            rounds=10,
+            rate=50.0,
+            bulk_connections=bulk_connections,
+        )
+    )
+    assert report.zones == 4
+    assert report.sources == 2
+    assert report.notifications > 0
+    assert check_budgets(report) == []
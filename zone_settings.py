@@ -0,0 +1,115 @@
+"""Shared plumbing of the zone audio setting entities (number and switch).
+
+The settings are read from the state cache only, the controller pushes every
+change while the zone is watched. A single cache callback per platform routes
+changes to the entity of the zone and variable, so the cost of a notification
+doesn't grow with the number of setting entities.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import EntityDescription
+
+from .const import (
+    DOMAIN as RUSSOUND_DOMAIN,
+    EVENT_CONTROLLER_CONNECTED,
+    EVENT_CONTROLLER_UPDATED,
+    SIGNAL_CONTROLLER_EVENT,
+    SIGNAL_ZONE_ADDED,
+)
+from .russound import Russound
+from .russound_zone_entity import RussoundZoneEntity
+
+
+class RussoundZoneSettingEntity(RussoundZoneEntity):
+    """Entity showing one audio setting variable of a zone."""
+
+    _attr_entity_category = EntityCategory.CONFIG
+
+    def __init__(
+        self,
+        entry: ConfigEntry,
+        russ: Russound,
+        zone_id,
+        name,
+        description: EntityDescription,
+    ) -> None:
+        """Initialize the setting."""
+        super().__init__(entry, russ, zone_id, name)
+        self.entity_description = description
+        self._attr_unique_id = f"{self._unique_id} - {description.key}"
+        self._attr_available = russ.is_connected
+
+    @property
+    def _cached_value(self) -> str | None:
+        return self._russ.get_cached_zone_variable(
+            self._zone_id, self.entity_description.key
+        )
+
+    async def _async_set(self, value) -> None:
+        await self._russ.set_zone_variable(
+            self._zone_id, self.entity_description.key, value
+        )
+
+
+async def async_setup_zone_settings(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities,
+    descriptions: tuple[EntityDescription, ...],
+    entity_class: Callable[..., RussoundZoneSettingEntity],
+) -> None:
+    """Adds a setting entity per description for every zone, including zones
+    discovered later, and keeps them up to date from the cache."""
+    controller: Russound = hass.data[RUSSOUND_DOMAIN][entry.entry_id]
+    entities: dict[tuple, RussoundZoneSettingEntity] = {}
+
+    def add_zone(zone_id, name) -> None:
+        new_entities = []
+        for description in descriptions:
+            key = (zone_id, description.key.lower())
+            if key not in entities:
+                entities[key] = entity_class(
+                    entry, controller, zone_id, name, description
+                )
+                new_entities.append(entities[key])
+        if new_entities:
+            async_add_entities(new_entities)
+
+    async def zone_added(zone_id, name) -> None:
+        add_zone(zone_id, name)
+
+    def value_changed(zone_id, name, value) -> None:
+        entity = entities.get((zone_id, name))
+        if entity is not None and entity.hass is not None:
+            entity.async_write_ha_state()
+
+    async def controller_event(event: str, *args) -> None:
+        if event == EVENT_CONTROLLER_UPDATED:
+            return
+        for entity in entities.values():
+            if entity.hass is not None:
+                await entity._update_connection_state(
+                    event == EVENT_CONTROLLER_CONNECTED
+                )
+
+    # Zones found before this platform was set up, the signal brings the rest
+    for zone_id, name in controller.zones:
+        add_zone(zone_id, name)
+    signals = [
+        controller.dispatcher.connect(SIGNAL_ZONE_ADDED, zone_added),
+        controller.dispatcher.connect(SIGNAL_CONTROLLER_EVENT, controller_event),
+    ]
+    controller.add_zone_callback(value_changed)
+
+    def unload() -> None:
+        controller.remove_zone_callback(value_changed)
+        for signal in signals:
+            signal.disconnect()
+
+    entry.async_on_unload(unload)